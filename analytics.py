@@ -0,0 +1,254 @@
+"""
+Prediction Analytics
+--------------------
+Summary tables over the prediction history that are updated in the same
+transaction as every batch written by PatientDatabase: disease counts per
+day, confidence histograms per disease and symptom co-occurrence counts.
+Dashboard queries read only these summaries, so their cost does not grow
+with history size. ``python analytics.py rebuild`` backfills them.
+
+The summaries record the last prediction id folded into them. Each batch,
+and each attach, folds in every prediction after that id, so rows written
+through a PatientDatabase without analytics attached are caught up too.
+"""
+
+import argparse
+
+# Confidence histogram bucket i covers [i / buckets, (i + 1) / buckets)
+DEFAULT_BUCKETS = 10
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS daily_disease_counts (
+        day TEXT NOT NULL,
+        disease TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, disease)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS confidence_histogram (
+        disease TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (disease, bucket)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS symptom_pair_counts (
+        symptom_a TEXT NOT NULL,
+        symptom_b TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (symptom_a, symptom_b)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS analytics_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''',
+    # Top-N pair queries walk this index instead of sorting the table
+    'CREATE INDEX IF NOT EXISTS idx_symptom_pair_counts_count '
+    'ON symptom_pair_counts (count DESC)',
+)
+
+_SUMMARY_TABLES = ('daily_disease_counts', 'confidence_histogram', 'symptom_pair_counts')
+
+class PredictionAnalytics:
+    def __init__(self, db, buckets=DEFAULT_BUCKETS):
+        self.db = db
+        self.buckets = buckets
+        needs_rebuild = self.create_tables()
+        # Hook first, then backfill: rebuild() and catch_up() hold the write lock
+        # while they run. Batches committed before that only fold once a
+        # high-water mark exists, and rows past the mark are caught up here
+        db.add_write_hook(self._apply)
+        if needs_rebuild:
+            self.rebuild()
+        else:
+            self.catch_up()
+    
+    def create_tables(self):
+        conn = self.db.conn
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        # First attach to an existing history, a different bucket count, or
+        # summaries from before the high-water mark was kept
+        meta = dict(conn.execute("SELECT key, value FROM analytics_meta"))
+        needs_rebuild = meta.get('buckets') != str(self.buckets) or 'last_id' not in meta
+        if needs_rebuild:
+            # Without a mark, batches leave the summaries to the coming rebuild
+            conn.execute("DELETE FROM analytics_meta WHERE key = 'last_id'")
+            conn.commit()
+        return needs_rebuild
+    
+    def _apply(self, conn, records):
+        # The batch is already in the base tables, along with anything written
+        # since the last fold, so one pass over ids past the mark covers both
+        self._fold(conn)
+    
+    def _fold(self, conn):
+        """Add every prediction after the high-water mark to the summaries."""
+        row = conn.execute("SELECT value FROM analytics_meta WHERE key = 'last_id'").fetchone()
+        if row is None:
+            # Not built yet; rebuild() counts these rows and sets the mark
+            return
+        last_id = int(row[0])
+        newest = conn.execute('SELECT max(id) FROM predictions').fetchone()[0]
+        if newest is None or newest <= last_id:
+            return
+        conn.execute('''
+            INSERT INTO daily_disease_counts (day, disease, count)
+            SELECT substr(timestamp, 1, 10), disease, count(*)
+            FROM predictions WHERE id > ? GROUP BY 1, 2
+            ON CONFLICT (day, disease) DO UPDATE SET count = count + excluded.count
+        ''', (last_id,))
+        conn.execute('''
+            INSERT INTO confidence_histogram (disease, bucket, count)
+            SELECT disease, min(max(CAST(confidence * ? AS INTEGER), 0), ?), count(*)
+            FROM predictions WHERE id > ? GROUP BY 1, 2
+            ON CONFLICT (disease, bucket) DO UPDATE SET count = count + excluded.count
+        ''', (self.buckets, self.buckets - 1, last_id))
+        conn.execute('''
+            INSERT INTO symptom_pair_counts (symptom_a, symptom_b, count)
+            SELECT sa.name, sb.name, count(*)
+            FROM prediction_symptoms a
+            JOIN prediction_symptoms b
+                ON b.prediction_id = a.prediction_id AND b.symptom_id != a.symptom_id
+            JOIN symptoms sa ON sa.id = a.symptom_id
+            JOIN symptoms sb ON sb.id = b.symptom_id
+            WHERE a.prediction_id > ? AND sa.name < sb.name
+            GROUP BY 1, 2
+            ON CONFLICT (symptom_a, symptom_b) DO UPDATE SET count = count + excluded.count
+        ''', (last_id,))
+        conn.execute("UPDATE analytics_meta SET value = ? WHERE key = 'last_id'", (str(newest),))
+    
+    def catch_up(self):
+        """Fold in predictions written while these summaries were not attached."""
+        self.db.flush()
+        conn = self.db.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._fold(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def rebuild(self):
+        """Recompute every summary from the base tables in one transaction."""
+        self.db.flush()
+        conn = self.db.conn
+        # IMMEDIATE takes the write lock up front, so the writer thread waits
+        # instead of committing rows this rebuild would miss
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for table in _SUMMARY_TABLES:
+                conn.execute(f'DELETE FROM {table}')
+            conn.execute('''
+                INSERT INTO daily_disease_counts (day, disease, count)
+                SELECT substr(timestamp, 1, 10), disease, count(*)
+                FROM predictions GROUP BY 1, 2
+            ''')
+            conn.execute('''
+                INSERT INTO confidence_histogram (disease, bucket, count)
+                SELECT disease, min(max(CAST(confidence * ? AS INTEGER), 0), ?), count(*)
+                FROM predictions GROUP BY 1, 2
+            ''', (self.buckets, self.buckets - 1))
+            conn.execute('''
+                INSERT INTO symptom_pair_counts (symptom_a, symptom_b, count)
+                SELECT sa.name, sb.name, count(*)
+                FROM prediction_symptoms a
+                JOIN prediction_symptoms b
+                    ON b.prediction_id = a.prediction_id AND b.symptom_id != a.symptom_id
+                JOIN symptoms sa ON sa.id = a.symptom_id
+                JOIN symptoms sb ON sb.id = b.symptom_id
+                WHERE sa.name < sb.name
+                GROUP BY 1, 2
+            ''')
+            conn.execute("INSERT OR REPLACE INTO analytics_meta (key, value) VALUES ('buckets', ?)",
+                         (str(self.buckets),))
+            conn.execute('''
+                INSERT OR REPLACE INTO analytics_meta (key, value)
+                SELECT 'last_id', coalesce(max(id), 0) FROM predictions
+            ''')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def disease_counts(self, start_day=None, end_day=None):
+        """(disease, count) between two 'YYYY-MM-DD' days inclusive, most frequent first."""
+        self.db.flush()
+        where, params = _day_range(start_day, end_day)
+        return self.db.conn.execute(f'''
+            SELECT disease, sum(count) FROM daily_disease_counts{where}
+            GROUP BY disease ORDER BY sum(count) DESC, disease
+        ''', params).fetchall()
+    
+    def daily_counts(self, start_day=None, end_day=None, disease=None):
+        """(day, disease, count) rows in day order."""
+        self.db.flush()
+        where, params = _day_range(start_day, end_day)
+        if disease is not None:
+            where += (' AND' if where else ' WHERE') + ' disease = ?'
+            params.append(disease)
+        return self.db.conn.execute(f'''
+            SELECT day, disease, count FROM daily_disease_counts{where}
+            ORDER BY day, disease
+        ''', params).fetchall()
+    
+    def confidence_histogram(self, disease=None):
+        """Prediction count per confidence bucket, as a list of length buckets."""
+        self.db.flush()
+        if disease is None:
+            rows = self.db.conn.execute('''
+                SELECT bucket, sum(count) FROM confidence_histogram GROUP BY bucket
+            ''').fetchall()
+        else:
+            rows = self.db.conn.execute('''
+                SELECT bucket, count FROM confidence_histogram WHERE disease = ?
+            ''', (disease,)).fetchall()
+        counts = [0] * self.buckets
+        for bucket, count in rows:
+            counts[bucket] = count
+        return counts
+    
+    def top_symptom_pairs(self, limit=10):
+        """((symptom_a, symptom_b), count) for the most frequent co-occurring pairs."""
+        self.db.flush()
+        rows = self.db.conn.execute('''
+            SELECT symptom_a, symptom_b, count FROM symptom_pair_counts
+            ORDER BY count DESC LIMIT ?
+        ''', (limit,)).fetchall()
+        return [((a, b), count) for a, b, count in rows]
+
+def _day_range(start_day, end_day):
+    conditions = []
+    params = []
+    if start_day is not None:
+        conditions.append('day >= ?')
+        params.append(str(start_day)[:10])
+    if end_day is not None:
+        conditions.append('day <= ?')
+        params.append(str(end_day)[:10])
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    return where, params
+
+if __name__ == "__main__":
+    from database import PatientDatabase
+    
+    parser = argparse.ArgumentParser(description="Prediction history analytics")
+    parser.add_argument('command', choices=['rebuild', 'summary'])
+    parser.add_argument('--db', default='patients.db')
+    parser.add_argument('--buckets', type=int, default=DEFAULT_BUCKETS)
+    args = parser.parse_args()
+    
+    db = PatientDatabase(args.db)
+    analytics = PredictionAnalytics(db, buckets=args.buckets)
+    if args.command == 'rebuild':
+        analytics.rebuild()
+        print("Analytics summaries rebuilt")
+    else:
+        print("Predictions per disease:")
+        for disease, count in analytics.disease_counts():
+            print(f"  {disease}: {count}")
+        print(f"Confidence histogram: {analytics.confidence_histogram()}")
+        print("Top symptom pairs:")
+        for (a, b), count in analytics.top_symptom_pairs():
+            print(f"  {a} + {b}: {count}")
+    db.close()
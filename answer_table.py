@@ -0,0 +1,162 @@
+"""
+Precomputed Answer Table
+------------------------
+Offline step run after train_model.py: scores every combination of up to
+``max_size`` symptoms in bulk and writes the top diseases and probabilities
+for each one to memory-mappable .npy files. DiseasePredictor answers those
+small requests with a single array lookup and falls back to the model for
+larger symptom sets.
+
+Each combination of sorted column indices c_0 < c_1 < ... < c_{s-1} is stored
+at row  offset[s] + sum_i C(c_i, i + 1)  (combinatorial number system), so no
+key needs to be stored alongside the answers.
+
+Like the model artifact, each build writes a new version subdirectory and
+then swaps the manifest, so tables that are already mapped stay intact.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from itertools import combinations, islice
+from math import comb
+
+import numpy as np
+
+from model_artifact import new_version_dir, publish
+
+TABLE_DIR = 'answer_table'
+MANIFEST = 'manifest.json'
+# 2: probabilities are float64, so table answers equal the model's
+SCHEMA_VERSION = 2
+
+def _offsets(n_symptoms, max_size):
+    # offsets[s] is the first row holding a combination of s symptoms
+    offsets = [0, 0]
+    for size in range(1, max_size + 1):
+        offsets.append(offsets[-1] + comb(n_symptoms, size))
+    return offsets
+
+def _binomials(n_symptoms, max_size):
+    return np.array([[comb(n, r) for r in range(max_size + 1)]
+                     for n in range(n_symptoms + 1)], dtype=np.int64)
+
+def build_answer_table(model_path='disease_model.pkl', output_dir=TABLE_DIR,
+                       max_size=4, top_n=5, batch_size=65536):
+    with open(model_path, 'rb') as f:
+        raw = f.read()
+    data = pickle.loads(raw)
+    model = data['model']
+    symptoms = data['symptoms']
+    class_names = data['label_encoder'].inverse_transform(model.classes_)
+    
+    n_symptoms = len(symptoms)
+    max_size = min(max_size, n_symptoms)
+    top_n = min(top_n, len(class_names))
+    offsets = _offsets(n_symptoms, max_size)
+    binomials = _binomials(n_symptoms, max_size)
+    total = offsets[max_size + 1]
+    
+    version_dir = new_version_dir(output_dir)
+    class_dtype = np.uint16 if len(class_names) <= np.iinfo(np.uint16).max else np.uint32
+    classes = np.lib.format.open_memmap(
+        os.path.join(version_dir, 'classes.npy'), mode='w+',
+        dtype=class_dtype, shape=(total, top_n))
+    probabilities = np.lib.format.open_memmap(
+        os.path.join(version_dir, 'probabilities.npy'), mode='w+',
+        dtype=np.float64, shape=(total, top_n))
+    
+    for size in range(1, max_size + 1):
+        combos = combinations(range(n_symptoms), size)
+        while True:
+            batch = np.array(list(islice(combos, batch_size)), dtype=np.intp)
+            if len(batch) == 0:
+                break
+            
+            X = np.zeros((len(batch), n_symptoms), dtype=np.uint8)
+            np.put_along_axis(X, batch, 1, axis=1)
+            proba = model.predict_proba(X)
+            
+            # Same ordering and tie-breaking as DiseasePredictor.predict_many
+            ranked = np.argsort(-proba, axis=1, kind='stable')[:, :top_n]
+            rows = offsets[size] + binomials[batch, np.arange(1, size + 1)].sum(axis=1)
+            classes[rows] = ranked
+            probabilities[rows] = np.take_along_axis(proba, ranked, axis=1)
+    
+    classes.flush()
+    probabilities.flush()
+    
+    manifest = {
+        'schema_version': SCHEMA_VERSION,
+        'version': os.path.basename(version_dir),
+        'model_sha256': hashlib.sha256(raw).hexdigest(),
+        'max_size': max_size,
+        'top_n': top_n,
+        'rows': total,
+        'symptoms': list(symptoms),
+        'classes': [str(name) for name in class_names]
+    }
+    publish(output_dir, manifest, MANIFEST)
+    
+    return total
+
+class AnswerTable:
+    def __init__(self, classes, probabilities, max_size, top_n, n_symptoms):
+        self.classes = classes
+        self.probabilities = probabilities
+        self.max_size = max_size
+        self.top_n = top_n
+        self._offsets = _offsets(n_symptoms, max_size)
+        self._binomials = [[comb(n, r) for r in range(max_size + 1)]
+                           for n in range(n_symptoms + 1)]
+    
+    @classmethod
+    def load(cls, directory=TABLE_DIR, model_sha256=None, symptoms=None):
+        """Open a table written for this model, or return None if absent or stale."""
+        try:
+            with open(os.path.join(directory, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        
+        if manifest.get('schema_version') != SCHEMA_VERSION:
+            return None
+        if model_sha256 is not None and manifest['model_sha256'] != model_sha256:
+            return None
+        if symptoms is not None and manifest['symptoms'] != list(symptoms):
+            return None
+        
+        version_dir = os.path.join(directory, manifest.get('version', ''))
+        classes = np.load(os.path.join(version_dir, 'classes.npy'), mmap_mode='r')
+        probabilities = np.load(os.path.join(version_dir, 'probabilities.npy'), mmap_mode='r')
+        if len(classes) != manifest['rows'] or len(probabilities) != manifest['rows']:
+            return None
+        
+        return cls(classes, probabilities, manifest['max_size'],
+                   manifest['top_n'], len(manifest['symptoms']))
+    
+    def lookup(self, columns):
+        """Return (class ids, probabilities) for a set of column indices, or None."""
+        size = len(columns)
+        if size == 0 or size > self.max_size:
+            return None
+        row = self._offsets[size]
+        for i, c in enumerate(sorted(columns)):
+            row += self._binomials[c][i + 1]
+        return self.classes[row], self.probabilities[row]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute answers for small symptom sets")
+    parser.add_argument('--model', default='disease_model.pkl')
+    parser.add_argument('--output', default=TABLE_DIR)
+    parser.add_argument('--max-size', type=int, default=4,
+                        help="largest number of symptoms to precompute")
+    parser.add_argument('--top-n', type=int, default=5,
+                        help="diseases stored per combination")
+    args = parser.parse_args()
+    
+    print("Building answer table...")
+    rows = build_answer_table(args.model, args.output, args.max_size, args.top_n)
+    print(f"Stored {rows} symptom combinations in '{args.output}'")
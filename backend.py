@@ -1,38 +1,294 @@
+import hashlib
+import os
 import pickle
+import signal
+import threading
+import time
+import weakref
+from collections import namedtuple
 import numpy as np
-import pandas as pd
+from analytics import PredictionAnalytics
+from answer_table import AnswerTable
 from database import PatientDatabase
+from forest_engine import CompiledForest
+from knowledge_base import EMPTY_INFO, load_knowledge_base
+from metrics import REGISTRY
+from model_artifact import ARTIFACT_DIR, MANIFEST, ArtifactError, load_artifact
+from prediction_cache import PredictionCache
+from vocabulary import SymptomVocabulary, UnknownSymptomError
 from datetime import datetime
 
+# Inference engines selectable through DiseasePredictor(backend=...).
+# 'compiled' starts from the memory-mapped artifact when one has been exported.
+BACKENDS = ('sklearn', 'compiled')
+
+MODEL_PATH = 'disease_model.pkl'
+
+# Everything derived from one model file. Requests read the predictor's
+# current state once and use only that, so a reload swaps all of it at once.
+ModelState = namedtuple('ModelState', [
+    'model', 'engine', 'label_encoder', 'symptoms', 'vocabulary', 'class_names',
+    'model_sha256', 'version', 'answer_table', 'cache'
+])
+
+# Placeholder until the first successful load; its cache never stores anything
+_NO_MODEL = ModelState(*([None] * (len(ModelState._fields) - 1)), PredictionCache(maxsize=0))
+
+_STAGE_HELP = 'Seconds spent in each DiseasePredictor stage'
+_FEATURIZE = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='featurize')
+_ANSWER_TABLE = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='answer_table')
+_CACHE_LOOKUP = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='cache')
+_INFERENCE = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='inference')
+_RANK = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='rank')
+_MATRIX = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='predict_matrix')
+_DISEASE_INFO = REGISTRY.histogram('predictor_stage_seconds', _STAGE_HELP, stage='disease_info')
+_ROWS_HELP = 'Symptom sets answered, by where the answer came from'
+_FROM_TABLE = REGISTRY.counter('predictor_rows_total', _ROWS_HELP, source='answer_table')
+_FROM_CACHE = REGISTRY.counter('predictor_rows_total', _ROWS_HELP, source='cache')
+_FROM_MODEL = REGISTRY.counter('predictor_rows_total', _ROWS_HELP, source='model')
+_FROM_MATRIX = REGISTRY.counter('predictor_rows_total', _ROWS_HELP, source='predict_matrix')
+_RELOADS = REGISTRY.counter('predictor_reloads_total', 'Models swapped in by a reload')
+
+def _count_error(stage):
+    REGISTRY.counter('predictor_errors_total', 'DiseasePredictor failures by stage',
+                     stage=stage).inc()
+
+def _cache_stat(predictor_ref, name):
+    # Gauges hold a weak reference, so they never keep a predictor alive
+    predictor = predictor_ref()
+    return None if predictor is None else predictor.cache.stats()[name]
+
+def _model_signature():
+    # Changes whenever either model file is rewritten
+    signature = []
+    for path in (MODEL_PATH, os.path.join(ARTIFACT_DIR, MANIFEST)):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
 class DiseasePredictor:
-    def __init__(self):
-        self.db = PatientDatabase()
-        self.model = None
-        self.label_encoder = None
-        self.symptoms = None
-        self.descriptions = None
-        self.precautions = None
+    def __init__(self, backend='compiled', cache_size=1024, cache_ttl=300.0,
+                 db_path='patients.db', lazy_db=False):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        # Seconds spent in each startup phase, reported by gui.py --startup-profile
+        self.load_timings = {}
+        # lazy_db defers opening the database (and its writer thread) to first
+        # use, so a pre-fork parent can load the model without either
+        self.db_path = db_path
+        self._db = None
+        self._analytics = None
+        self._db_lock = threading.Lock()
+        if not lazy_db:
+            self._open_database()
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._state = _NO_MODEL
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self._watch_stop = threading.Event()
+        self.load_error = None
+        self.knowledge_base = None
+        predictor_ref = weakref.ref(self)
+        for name in ('hits', 'misses', 'size', 'hit_rate'):
+            REGISTRY.gauge(f'predictor_cache_{name}', f'Prediction cache {name} for the current model',
+                           lambda name=name: _cache_stat(predictor_ref, name))
+        started = time.perf_counter()
         self.load_model()
+        self.load_timings['model'] = time.perf_counter() - started
+        started = time.perf_counter()
         self.load_descriptions()
+        self.load_timings['descriptions'] = time.perf_counter() - started
+    
+    def _open_database(self):
+        with self._db_lock:
+            if self._db is not None:
+                return
+            started = time.perf_counter()
+            db = PatientDatabase(self.db_path)
+            self._analytics = PredictionAnalytics(db)
+            self._db = db
+            self.load_timings['database'] = time.perf_counter() - started
+    
+    @property
+    def db(self):
+        if self._db is None:
+            self._open_database()
+        return self._db
+    
+    @property
+    def analytics(self):
+        if self._db is None:
+            self._open_database()
+        return self._analytics
+    
+    def close(self):
+        self._watch_stop.set()
+        if self._db is not None:
+            self._db.close()
+    
+    # Read-only views of the current model state
+    model = property(lambda self: self._state.model)
+    engine = property(lambda self: self._state.engine)
+    label_encoder = property(lambda self: self._state.label_encoder)
+    symptoms = property(lambda self: self._state.symptoms)
+    vocabulary = property(lambda self: self._state.vocabulary)
+    class_names = property(lambda self: self._state.class_names)
+    model_sha256 = property(lambda self: self._state.model_sha256)
+    model_version = property(lambda self: self._state.version)
+    answer_table = property(lambda self: self._state.answer_table)
+    cache = property(lambda self: self._state.cache)
     
     def load_model(self):
+        """Load, validate and install the model synchronously."""
         try:
-            with open('disease_model.pkl', 'rb') as f:
-                data = pickle.load(f)
-                self.model = data['model']
-                self.label_encoder = data['label_encoder']
-                self.symptoms = data['symptoms']
+            self._install(self._build_state())
             return True
         except Exception as e:
+            self.load_error = str(e)
+            _count_error('load')
             print(f"Error loading model: {str(e)}")
             return False
     
+    def reload_model(self, wait=False):
+        """Load the model files again on a background thread and swap them in.
+        
+        Requests keep using the current model until the new one has loaded,
+        passed validation and been warmed up; if any step fails the current
+        model stays in place. A reload requested while one is running joins it.
+        """
+        with self._reload_lock:
+            thread = self._reload_thread
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=self._reload, name='model-reload', daemon=True)
+                self._reload_thread = thread
+                thread.start()
+        if wait:
+            thread.join()
+        return thread
+    
+    def _reload(self):
+        # Only re-read when the CSVs have changed since they were last loaded
+        self.load_descriptions()
+        try:
+            state = self._build_state()
+        except Exception as e:
+            _count_error('reload')
+            print(f"Error reloading model, keeping version {self.model_version}: {str(e)}")
+            return
+        if state.model_sha256 == self.model_sha256:
+            return
+        previous = self.model_version
+        self._install(state)
+        _RELOADS.inc()
+        print(f"Model reloaded: {previous} -> {state.version}")
+    
+    def _install(self, state):
+        # A single attribute store, so each request sees either the old state or the new one
+        self._state = state
+        self.load_error = None
+    
+    def watch_model(self, interval=2.0):
+        """Reload whenever the pickle or the artifact manifest changes on disk."""
+        self._watch_stop.clear()
+        
+        def watch():
+            seen = _model_signature()
+            while not self._watch_stop.wait(interval):
+                current = _model_signature()
+                if current != seen:
+                    seen = current
+                    self.reload_model()
+        
+        thread = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        thread.start()
+        return thread
+    
+    def install_reload_signal(self, signum=getattr(signal, 'SIGHUP', None)):
+        """Reload on a signal (SIGHUP by default); call from the main thread."""
+        if signum is not None:
+            signal.signal(signum, lambda signum, frame: self.reload_model())
+    
+    def _build_state(self):
+        data = (self._load_artifact() if self.backend == 'compiled' else None) or self._load_pickle()
+        symptoms = data['symptoms']
+        state = ModelState(
+            model=data['model'],
+            engine=data['engine'],
+            label_encoder=data['label_encoder'],
+            symptoms=symptoms,
+            vocabulary=SymptomVocabulary(symptoms),
+            class_names=data['class_names'],
+            model_sha256=data['model_sha256'],
+            version=data['model_sha256'][:12],
+            # Only use an answer table precomputed from this exact model
+            answer_table=AnswerTable.load(model_sha256=data['model_sha256'], symptoms=symptoms),
+            # Each model gets a fresh cache, so no request sees the old model's answers
+            cache=PredictionCache(maxsize=self.cache_size, ttl=self.cache_ttl)
+        )
+        self._warm_up(state)
+        return state
+    
+    def _warm_up(self, state, max_rows=256):
+        # One row per symptom: touches every tree and checks the output is sane
+        n_features = getattr(state.engine, 'n_features_in_', len(state.symptoms))
+        if n_features != len(state.symptoms):
+            raise ValueError(f"Model expects {n_features} features but lists "
+                             f"{len(state.symptoms)} symptoms")
+        X = np.eye(min(len(state.symptoms), max_rows), len(state.symptoms), dtype=np.uint8)
+        proba = state.engine.predict_proba(X)
+        if proba.shape != (len(X), len(state.class_names)):
+            raise ValueError(f"Model returned shape {proba.shape}, expected "
+                             f"{(len(X), len(state.class_names))}")
+        if not np.isfinite(proba).all() or not np.allclose(proba.sum(axis=1), 1.0, atol=1e-6):
+            raise ValueError("Model returned invalid probabilities")
+    
+    def _load_artifact(self):
+        try:
+            # Rejected once disease_model.pkl no longer matches it, so the pickle wins
+            data = load_artifact(source_path=MODEL_PATH)
+        except FileNotFoundError:
+            return None
+        except (ArtifactError, KeyError, ValueError) as e:
+            print(f"Ignoring model artifact, falling back to pickle: {str(e)}")
+            return None
+        
+        forest = data['forest']
+        return {
+            'model': forest,
+            'engine': forest,
+            'label_encoder': None,
+            'symptoms': data['symptoms'],
+            'class_names': data['classes'][forest.classes_].tolist(),
+            'model_sha256': data['manifest']['source_sha256']
+        }
+    
+    def _load_pickle(self):
+        with open(MODEL_PATH, 'rb') as f:
+            raw = f.read()
+        data = pickle.loads(raw)
+        model = data['model']
+        label_encoder = data['label_encoder']
+        return {
+            'model': model,
+            'engine': CompiledForest.from_sklearn(model) if self.backend == 'compiled' else model,
+            'label_encoder': label_encoder,
+            'symptoms': data['symptoms'],
+            # Disease name for every predict_proba column
+            'class_names': label_encoder.inverse_transform(model.classes_).tolist(),
+            'model_sha256': hashlib.sha256(raw).hexdigest()
+        }
+    
     def load_descriptions(self):
         try:
-            self.descriptions = pd.read_csv('symptom_Description.csv')
-            self.precautions = pd.read_csv('symptom_precaution.csv')
+            self.knowledge_base = load_knowledge_base()
             return True
         except Exception as e:
+            _count_error('descriptions')
             print(f"Error loading descriptions: {str(e)}")
             return False
     
@@ -40,38 +296,173 @@ class DiseasePredictor:
         if not selected_symptoms:
             return None, None
         
-        X = np.zeros(len(self.symptoms))
-        for symptom in selected_symptoms:
-            idx = self.symptoms.index(symptom)
-            X[idx] = 1
-        
-        try:
-            prediction = self.model.predict([X])
-            probability = self.model.predict_proba([X]).max()
-            disease = self.label_encoder.inverse_transform(prediction)[0]
-            return disease, probability
-        except Exception as e:
-            print(f"Prediction error: {str(e)}")
+        result = self.predict_many([selected_symptoms], top_k=1)[0]
+        if result is None:
             return None, None
+        return result['disease'], result['confidence']
     
-    def get_disease_info(self, disease):
-        description = ""
-        precautions = []
+    def predict_many(self, symptom_sets, top_k=3, return_errors=False):
+        """Score a batch of symptom sets with a single predict_proba call.
+        
+        Returns one entry per input: None for an empty symptom set, otherwise
+        a dict with the top 'disease', its 'confidence' and 'top_k', a list of
+        (disease, probability) pairs in descending order, plus the
+        'model_version' that produced it. A set with a symptom the model does
+        not know raises UnknownSymptomError, or with ``return_errors=True``
+        gets the error as its entry while the rest of the batch is scored.
+        """
+        # Every lookup below uses this one snapshot, even if a reload lands meanwhile
+        state = self._state
+        results = [None] * len(symptom_sets)
+        rows = [i for i, selected in enumerate(symptom_sets) if selected]
+        if not rows:
+            return results
         
-        if self.descriptions is not None:
-            desc = self.descriptions[self.descriptions['Disease'] == disease]['Description'].values
-            if len(desc) > 0:
-                description = desc[0]
+        # Canonical cache key: integer bitmask over the model's symptoms
+        started = REGISTRY.clock()
+        columns = {}
+        keys = {}
+        for i in rows:
+            try:
+                columns[i] = state.vocabulary.indices(symptom_sets[i])
+            except UnknownSymptomError as e:
+                _count_error('featurize')
+                if not return_errors:
+                    raise
+                results[i] = e
+                continue
+            keys[i] = sum(1 << idx for idx in columns[i])
+        _FEATURIZE.observe_since(started)
+        rows = [i for i in rows if i in keys]
+        if not rows:
+            return results
         
-        if self.precautions is not None:
-            prec_row = self.precautions[self.precautions['Disease'] == disease]
-            if not prec_row.empty:
-                precautions = [
-                    prec_row[f'Precaution_{i+1}'].values[0]
-                    for i in range(4)
-                ]
+        k = max(1, min(top_k, len(state.class_names)))
         
-        return description, precautions
+        # Small symptom sets are answered straight from the precomputed table
+        table = state.answer_table
+        if table is not None and k <= table.top_n:
+            started = REGISTRY.clock()
+            remaining = []
+            for i in rows:
+                answer = table.lookup(columns[i])
+                if answer is None:
+                    remaining.append(i)
+                    continue
+                class_ids, probabilities = answer
+                results[i] = self._ranked_result(state,
+                    [(state.class_names[c], float(p))
+                     for c, p in zip(class_ids[:k], probabilities[:k])])
+            _FROM_TABLE.inc(len(rows) - len(remaining))
+            _ANSWER_TABLE.observe_since(started)
+            rows = remaining
+            if not rows:
+                return results
+        
+        started = REGISTRY.clock()
+        vectors = {}
+        pending = {}
+        for i in rows:
+            key = keys[i]
+            if key in vectors or key in pending:
+                continue
+            cached = state.cache.get(key)
+            if cached is None:
+                pending[key] = columns[i]
+            else:
+                vectors[key] = cached
+        _CACHE_LOOKUP.observe_since(started)
+        
+        if pending:
+            started = REGISTRY.clock()
+            X = np.zeros((len(pending), len(state.symptoms)), dtype=np.uint8)
+            for r, idx in enumerate(pending.values()):
+                X[r, list(idx)] = 1
+            
+            try:
+                scored = state.engine.predict_proba(X)
+            except Exception as e:
+                _count_error('inference')
+                print(f"Prediction error: {str(e)}")
+                return results
+            
+            for key, vector in zip(pending, scored):
+                vector = vector.copy()
+                vector.flags.writeable = False
+                vectors[key] = vector
+                state.cache.put(key, vector)
+            _INFERENCE.observe_since(started)
+        # Rows sharing a symptom set with an earlier one in the batch count as cached
+        _FROM_MODEL.inc(len(pending))
+        _FROM_CACHE.inc(len(rows) - len(pending))
+        
+        started = REGISTRY.clock()
+        proba = np.vstack([vectors[keys[i]] for i in rows])
+        
+        # Stable sort keeps predict()'s argmax tie-breaking for the top entry
+        ranked = np.argsort(-proba, axis=1, kind='stable')[:, :k]
+        for r, i in enumerate(rows):
+            results[i] = self._ranked_result(state,
+                [(state.class_names[c], float(proba[r, c])) for c in ranked[r]])
+        _RANK.observe_since(started)
+        return results
+    
+    def predict_matrix(self, X, top_k=3, packed=False):
+        """Top-k diseases for every row of a symptom matrix, without the cache.
+        
+        X is a 0/1 matrix over self.symptoms (dense or sparse), or with
+        ``packed=True`` the bit-packed form returned by
+        SymptomVocabulary.featurize(packed=True). Returns (diseases,
+        probabilities), two (rows, k) arrays; rows without any symptom get
+        None and NaN, matching predict_many's None.
+        """
+        state = self._state
+        expected = (len(state.symptoms) + 7) // 8 if packed else len(state.symptoms)
+        if X.shape[1] != expected:
+            _count_error('predict_matrix')
+            raise ValueError("X was built for a different symptom vocabulary than the current model")
+        started = REGISTRY.clock()
+        k = max(1, min(top_k, len(state.class_names)))
+        if packed:
+            X = np.asarray(X, dtype=np.uint8)
+            empty = ~X.any(axis=1)
+            if hasattr(state.engine, 'predict_proba_packed'):
+                proba = state.engine.predict_proba_packed(X)
+            else:
+                proba = state.engine.predict_proba(
+                    np.unpackbits(X, axis=1, count=len(state.symptoms)))
+        else:
+            empty = np.asarray(X.sum(axis=1)).ravel() == 0
+            proba = state.engine.predict_proba(X)
+        
+        ranked = np.argsort(-proba, axis=1, kind='stable')[:, :k]
+        probabilities = np.take_along_axis(proba, ranked, axis=1)
+        diseases = np.asarray(state.class_names, dtype=object)[ranked]
+        diseases[empty] = None
+        probabilities[empty] = np.nan
+        _FROM_MATRIX.inc(len(diseases))
+        _MATRIX.observe_since(started)
+        return diseases, probabilities
+    
+    def _ranked_result(self, state, top):
+        return {
+            'disease': top[0][0],
+            'confidence': top[0][1],
+            'top_k': top,
+            'model_version': state.version
+        }
+    
+    def get_disease_info(self, disease):
+        started = REGISTRY.clock()
+        info = self.knowledge_base.get(disease) if self.knowledge_base is not None else EMPTY_INFO
+        _DISEASE_INFO.observe_since(started)
+        return info.description, list(info.precautions)
+    
+    def get_disease_info_many(self, diseases):
+        if self.knowledge_base is None:
+            return [(EMPTY_INFO.description, []) for _ in diseases]
+        return [(info.description, list(info.precautions))
+                for info in self.knowledge_base.get_many(diseases)]
     
     def save_prediction(self, disease, probability, symptoms, patient_info):
         return self.db.add_prediction(disease, probability, symptoms, patient_info)
@@ -79,5 +470,8 @@ class DiseasePredictor:
     def get_prediction_history(self):
         return self.db.get_all_predictions()
     
+    def get_prediction_page(self, limit=50, cursor=None, **filters):
+        return self.db.get_predictions(limit=limit, cursor=cursor, **filters)
+    
     def get_all_symptoms(self):
         return self.symptoms
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+Benchmarks
+----------
+Times the hot paths on synthetic data: model training, DiseasePredictor
+start-up, single-request latency, batch throughput, bulk file scoring with
+each backend, history inserts and history queries at several table sizes.
+Every benchmark runs for each combination of vocabulary size, disease count
+and training rows inside a scratch directory, so the project's model and
+patients.db are untouched.
+
+Results are written as JSON. --compare checks them against a saved
+baseline and exits non-zero when a metric regressed past both the relative
+threshold and a small absolute floor. Tail latencies (p99) are too noisy to
+gate on and are only reported. --repeat runs the suite several times and
+keeps each metric's best value, which filters out load from other processes.
+    
+    python benchmark.py --output baseline.json
+    python benchmark.py --output current.json --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import product
+
+import numpy as np
+
+# Metric name suffixes that say which direction is better
+_HIGHER_IS_BETTER = ('_per_s',)
+_LOWER_IS_BETTER = ('_s', '_ms', '_bytes')
+# Smallest absolute change that can count as a regression, so that timer noise
+# on sub-millisecond metrics is not reported as a large relative slowdown
+_MIN_CHANGE = {'_ms': 0.05, '_s': 0.01, '_bytes': 1 << 20}
+# Reported when they move past the threshold, but never fail the comparison
+_INFORMATIONAL = ('p99_ms',)
+
+# Run in a fresh interpreter, so the peak covers native allocations as well
+_TRAINING_CHILD = """
+import json, sys, time
+from train_model import train_model
+started = time.perf_counter()
+train_model(raise_errors=True)
+metrics = {'wall_s': time.perf_counter() - started}
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+if resource is not None:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    metrics['peak_memory_bytes'] = peak if sys.platform == 'darwin' else peak * 1024
+print(json.dumps(metrics))
+"""
+
+def _percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'mean_ms': float(samples.mean())
+    }
+
+@contextmanager
+def _workspace():
+    # The project reads its model and CSVs from the working directory
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='disease-bench-') as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(previous)
+
+def write_synthetic_project(n_symptoms, n_diseases, n_rows, seed=0):
+    """Write dataset and knowledge-base CSVs shaped like the real ones."""
+    from generate_dataset import generate_dataset
+    
+    return generate_dataset(n_diseases, n_symptoms, n_rows, seed=seed)
+
+def bench_training():
+    project = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [project, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-c', _TRAINING_CHILD], env=env,
+                            capture_output=True, text=True, check=True)
+    # train_model reports its phases first; the measurements are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def bench_predictor(symptoms, requests, batch_size, seed=0):
+    from backend import DiseasePredictor
+    from knowledge_base import clear_cache
+    
+    # Start cold, so load time includes reading the knowledge base
+    clear_cache()
+    started = time.perf_counter()
+    # No cache, so every request measures the model rather than a dictionary hit
+    predictor = DiseasePredictor(cache_size=0)
+    load_s = time.perf_counter() - started
+    if predictor.load_error is not None:
+        raise RuntimeError(predictor.load_error)
+    
+    rng = random.Random(seed)
+    sets = [rng.sample(symptoms, rng.randint(1, min(6, len(symptoms)))) for _ in range(requests)]
+    
+    predictor.predict_disease(sets[0])
+    latencies = []
+    diseases = []
+    for selected in sets:
+        started = time.perf_counter()
+        disease, _ = predictor.predict_disease(selected)
+        latencies.append(time.perf_counter() - started)
+        diseases.append(disease)
+    
+    info_latencies = []
+    for disease in diseases:
+        started = time.perf_counter()
+        predictor.get_disease_info(disease)
+        info_latencies.append(time.perf_counter() - started)
+    
+    batch = [rng.sample(symptoms, rng.randint(1, min(6, len(symptoms)))) for _ in range(batch_size)]
+    started = time.perf_counter()
+    predictor.predict_many(batch, top_k=3)
+    many_s = time.perf_counter() - started
+    
+    column = [','.join(selected) for selected in batch]
+    started = time.perf_counter()
+    X = predictor.vocabulary.featurize(column, packed=True)
+    predictor.predict_matrix(X, top_k=3, packed=True)
+    matrix_s = time.perf_counter() - started
+    
+    predictor.close()
+    return {
+        'load_s': load_s,
+        'predict_disease': _percentiles(latencies),
+        'get_disease_info': _percentiles(info_latencies),
+        'predict_many_rows_per_s': batch_size / many_s,
+        'predict_matrix_rows_per_s': batch_size / matrix_s
+    }
+
+def bench_bulk(symptoms, rows, seed=0):
+    import pandas as pd
+    from backend import BACKENDS
+    from bulk_score import bulk_score
+    
+    rng = random.Random(seed)
+    column = [','.join(rng.sample(symptoms, rng.randint(1, min(6, len(symptoms)))))
+              for _ in range(rows)]
+    pd.DataFrame({'Symptoms': column}).to_csv('bulk.csv', index=False)
+    
+    # The whole file through each backend, so bulk_score's default can be checked against the other
+    results = {}
+    for backend in BACKENDS:
+        started = time.perf_counter()
+        bulk_score('bulk.csv', 'bulk_scored.csv', workers=1, chunk_size=max(1, rows // 4),
+                   backend=backend)
+        results[f'{backend}_rows_per_s'] = rows / (time.perf_counter() - started)
+    return results
+
+def bench_database(symptoms, diseases, table_sizes, queries=200, seed=0):
+    from database import PatientDatabase
+    
+    rng = random.Random(seed)
+    db = PatientDatabase('bench.db')
+    results = {}
+    inserted = 0
+    base = datetime(2024, 1, 1)
+    for size in sorted(table_sizes):
+        rows = size - inserted
+        started = time.perf_counter()
+        for _ in range(rows):
+            db.add_prediction(rng.choice(diseases), rng.random(),
+                              rng.sample(symptoms, min(3, len(symptoms))),
+                              {'name': f'patient {rng.randrange(size // 10 + 1)}',
+                               'age': str(rng.randint(1, 90)), 'gender': 'Female'})
+        db.flush()
+        elapsed = time.perf_counter() - started
+        inserted = size
+        
+        # Spread timestamps out so range filters select realistic slices
+        timestamps = [(base + timedelta(minutes=i)).isoformat(' ') for i in range(size)]
+        db.conn.executemany('UPDATE predictions SET timestamp = ? WHERE id = ?',
+                            [(ts, i + 1) for i, ts in enumerate(timestamps)])
+        db.conn.commit()
+        
+        first_page, deep_page, by_disease, by_symptom = [], [], [], []
+        for _ in range(queries):
+            started = time.perf_counter()
+            db.get_predictions(limit=50)
+            first_page.append(time.perf_counter() - started)
+            
+            middle = timestamps[size // 2]
+            started = time.perf_counter()
+            db.get_predictions(limit=50, cursor=(middle, size // 2))
+            deep_page.append(time.perf_counter() - started)
+            
+            started = time.perf_counter()
+            db.get_predictions(limit=50, disease=rng.choice(diseases))
+            by_disease.append(time.perf_counter() - started)
+            
+            started = time.perf_counter()
+            db.get_predictions(limit=50, symptom=rng.choice(symptoms))
+            by_symptom.append(time.perf_counter() - started)
+        
+        results[str(size)] = {
+            'insert_rows_per_s': rows / elapsed if elapsed else 0.0,
+            'first_page': _percentiles(first_page),
+            'deep_page': _percentiles(deep_page),
+            'by_disease': _percentiles(by_disease),
+            'by_symptom': _percentiles(by_symptom)
+        }
+    db.close()
+    return results
+
+def run_benchmarks(vocabulary_sizes, disease_counts, row_counts, table_sizes,
+                   requests=2000, batch_size=10000):
+    results = []
+    for n_symptoms, n_diseases, n_rows in product(vocabulary_sizes, disease_counts, row_counts):
+        params = {'symptoms': n_symptoms, 'diseases': n_diseases, 'rows': n_rows}
+        print(f"Benchmarking {params}")
+        with _workspace():
+            symptoms, diseases = write_synthetic_project(n_symptoms, n_diseases, n_rows)
+            results.append({'benchmark': 'training', 'params': params,
+                            'metrics': bench_training()})
+            results.append({'benchmark': 'predictor', 'params': params,
+                            'metrics': bench_predictor(symptoms, requests, batch_size)})
+            results.append({'benchmark': 'bulk', 'params': params,
+                            'metrics': bench_bulk(symptoms, batch_size)})
+            # History cost depends on table size and vocabulary, not on training rows
+            if n_rows == row_counts[0]:
+                results.append({'benchmark': 'database',
+                                'params': {'symptoms': n_symptoms, 'diseases': n_diseases},
+                                'metrics': bench_database(symptoms, diseases, table_sizes)})
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+
+def _best(values, metric=''):
+    if isinstance(values[0], dict):
+        return {key: _best([value[key] for value in values], key) for key in values[0]}
+    return max(values) if metric.endswith(_HIGHER_IS_BETTER) else min(values)
+
+def best_of(reports):
+    """One report holding each metric's best value across repeated runs."""
+    best = dict(reports[-1])
+    best['results'] = [dict(entries[0], metrics=_best([entry['metrics'] for entry in entries]))
+                       for entries in zip(*(report['results'] for report in reports))]
+    best['repeat'] = len(reports)
+    return best
+
+def _flatten(metrics, prefix=''):
+    flat = {}
+    for key, value in metrics.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        else:
+            flat[name] = value
+    return flat
+
+def _keyed(report):
+    keyed = {}
+    for entry in report['results']:
+        params = ','.join(f'{k}={v}' for k, v in sorted(entry['params'].items()))
+        for metric, value in _flatten(entry['metrics']).items():
+            keyed[(entry['benchmark'], params, metric)] = value
+    return keyed
+
+def compare(current, baseline, threshold=0.20):
+    """Metrics worse than ``threshold`` (a fraction) as (key, baseline, current, change, gating).
+    
+    Lower-is-better metrics must also have moved by more than their absolute
+    floor; ``gating`` is False for the informational tail latencies.
+    """
+    previous = _keyed(baseline)
+    regressions = []
+    for key, value in _keyed(current).items():
+        old = previous.get(key)
+        if not old:
+            continue
+        metric = key[2]
+        change = (value - old) / old
+        if metric.endswith(_HIGHER_IS_BETTER):
+            worse = change < -threshold
+        elif metric.endswith(_LOWER_IS_BETTER):
+            floor = next(v for suffix, v in _MIN_CHANGE.items() if metric.endswith(suffix))
+            worse = change > threshold and value - old > floor
+        else:
+            continue
+        if worse:
+            regressions.append((key, old, value, change, not metric.endswith(_INFORMATIONAL)))
+    return regressions
+
+def _int_list(text):
+    return [int(part) for part in text.split(',') if part]
+
+if __name__ == "__main__":
+    # Make the project importable from the scratch directories
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    
+    parser = argparse.ArgumentParser(description="Benchmark prediction, storage and training")
+    parser.add_argument('--symptoms', type=_int_list, default=[44],
+                        help='comma-separated vocabulary sizes')
+    parser.add_argument('--diseases', type=_int_list, default=[8],
+                        help='comma-separated disease counts')
+    parser.add_argument('--rows', type=_int_list, default=[2000],
+                        help='comma-separated training row counts')
+    parser.add_argument('--db-sizes', type=_int_list, default=[1000, 10000],
+                        help='comma-separated history table sizes')
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='single requests timed per configuration')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs of the whole suite; each metric keeps its best value')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='baseline JSON to check this run against')
+    parser.add_argument('--threshold', type=float, default=0.20,
+                        help='relative slowdown that counts as a regression')
+    args = parser.parse_args()
+    
+    report = best_of([run_benchmarks(args.symptoms, args.diseases, args.rows, args.db_sizes,
+                                     requests=args.requests, batch_size=args.batch_size)
+                      for _ in range(max(1, args.repeat))])
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to '{args.output}'")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for (benchmark, params, metric), old, new, change, gating in regressions:
+            label = 'REGRESSION' if gating else 'note'
+            print(f"{label} {benchmark}[{params}] {metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+        if any(gating for *_, gating in regressions):
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against '{args.compare}'")
@@ -0,0 +1,224 @@
+"""
+Bulk Scoring
+------------
+Rescores large CSV or JSONL files of patient records (``Disease,Symptoms``
+style, one comma-separated symptom string per row) with the current model.
+Input is read in fixed-size chunks, every chunk is featurized in one
+vectorized pass and scored on a process pool, and results are appended to
+the output in input order. At most a few chunks are in flight at a time, so
+memory stays flat whatever the file size. Scoring defaults to the sklearn
+backend, which walks large batches faster than the compiled engine.
+
+A checkpoint next to the output records how many rows have been written;
+rerunning with --resume continues from there as long as the input file
+(path, size and modification time), model and top-k are unchanged.
+    
+    python bulk_score.py cohort.csv scored.csv --top-k 3 --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from backend import DiseasePredictor
+
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson', '.json')
+
+# Set in each pool process by _init_worker
+_predictor = None
+
+def _init_worker(backend):
+    global _predictor
+    _predictor = DiseasePredictor(backend=backend, cache_size=0, lazy_db=True)
+    if _predictor.load_error is not None:
+        raise RuntimeError(f"Could not load model: {_predictor.load_error}")
+    # The pool is the parallelism; tree threads in every worker would oversubscribe the cores
+    if hasattr(_predictor.engine, 'n_jobs'):
+        _predictor.engine.n_jobs = 1
+
+def _score_chunk(symptoms, top_k):
+    X = _predictor.vocabulary.featurize(symptoms, unknown='ignore', packed=True)
+    return _predictor.predict_matrix(X, top_k=top_k, packed=True)
+
+def _detect_format(path, fmt):
+    if fmt is not None:
+        return fmt
+    return 'jsonl' if os.path.splitext(path)[1].lower() in JSONL_EXTENSIONS else 'csv'
+
+def _read_chunks(path, fmt, chunk_size, skip_records):
+    """DataFrames of up to chunk_size records, after the first skip_records.
+    
+    Records are skipped as they are parsed, not as lines: blank JSONL lines
+    are not records and a quoted CSV field can span lines.
+    """
+    if fmt == 'csv':
+        # Strings throughout, so passthrough columns are written back untouched
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            if skip_records >= len(chunk):
+                skip_records -= len(chunk)
+                continue
+            yield chunk.iloc[skip_records:]
+            skip_records = 0
+        return
+    
+    with open(path, encoding='utf-8') as f:
+        records = (line for line in f if line.strip())
+        for _ in islice(records, skip_records):
+            pass
+        while True:
+            lines = list(islice(records, chunk_size))
+            if not lines:
+                return
+            yield pd.DataFrame.from_records([json.loads(line) for line in lines])
+
+def _symptom_strings(column):
+    # JSONL records may carry symptoms as a list instead of a string
+    return column.map(lambda v: ','.join(map(str, v)) if isinstance(v, list) else v)
+
+def _output_frame(chunk, diseases, probabilities):
+    out = chunk.copy()
+    out['predicted_disease'] = diseases[:, 0]
+    out['confidence'] = probabilities[:, 0]
+    for i in range(1, diseases.shape[1]):
+        out[f'disease_{i + 1}'] = diseases[:, i]
+        out[f'probability_{i + 1}'] = probabilities[:, i]
+    return out
+
+def _write_frame(f, frame, fmt, header):
+    if fmt == 'csv':
+        frame.to_csv(f, index=False, header=header, lineterminator='\n')
+    else:
+        text = frame.to_json(orient='records', lines=True)
+        f.write(text if text.endswith('\n') else text + '\n')
+
+def _load_checkpoint(path, expected):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    if any(checkpoint.get(key) != value for key, value in expected.items()):
+        print("Checkpoint does not match this input, model or top-k; starting over")
+        return None
+    return checkpoint
+
+def _save_checkpoint(path, checkpoint):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def bulk_score(input_path, output_path, top_k=3, chunk_size=50000, workers=None,
+               symptom_column='Symptoms', input_format=None, output_format=None,
+               backend='sklearn', resume=False, progress_interval=5.0):
+    """Score every row of input_path into output_path; returns the rows written."""
+    input_format = _detect_format(input_path, input_format)
+    output_format = _detect_format(output_path, output_format)
+    workers = workers or os.cpu_count() or 1
+    
+    predictor = DiseasePredictor(backend=backend, cache_size=0, lazy_db=True)
+    if predictor.load_error is not None:
+        raise RuntimeError(f"Could not load model: {predictor.load_error}")
+    
+    checkpoint_path = output_path + '.checkpoint.json'
+    stat = os.stat(input_path)
+    expected = {
+        'input': os.path.abspath(input_path),
+        # A file rewritten in place keeps its path, so its row offsets would no longer line up
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'model_sha256': predictor.model_sha256,
+        'top_k': top_k,
+        'symptom_column': symptom_column
+    }
+    checkpoint = _load_checkpoint(checkpoint_path, expected) if resume else None
+    rows_done = checkpoint['rows'] if checkpoint else 0
+    
+    mode = 'r+' if checkpoint else 'w'
+    if checkpoint and not os.path.exists(output_path):
+        raise FileNotFoundError(f"Checkpoint found but output '{output_path}' is missing")
+    
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(backend,))
+    else:
+        global _predictor
+        _predictor = predictor
+    
+    started = time.perf_counter()
+    last_report = started
+    scored = 0
+    with open(output_path, mode, encoding='utf-8', newline='') as out:
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            out.seek(checkpoint['output_bytes'])
+            out.truncate()
+        
+        pending = []
+        
+        def write_oldest():
+            nonlocal rows_done, scored, last_report
+            chunk, result = pending.pop(0)
+            diseases, probabilities = result.result() if pool else result
+            _write_frame(out, _output_frame(chunk, diseases, probabilities),
+                         output_format, header=rows_done == 0)
+            out.flush()
+            rows_done += len(chunk)
+            scored += len(chunk)
+            _save_checkpoint(checkpoint_path, dict(expected, rows=rows_done,
+                                                   output_bytes=out.tell()))
+            now = time.perf_counter()
+            if now - last_report >= progress_interval:
+                print(f"{rows_done} rows scored ({scored / (now - started):.0f} rows/s)")
+                last_report = now
+        
+        try:
+            for chunk in _read_chunks(input_path, input_format, chunk_size, rows_done):
+                if symptom_column not in chunk.columns:
+                    raise KeyError(f"Input has no '{symptom_column}' column")
+                symptoms = _symptom_strings(chunk[symptom_column]).tolist()
+                if pool:
+                    pending.append((chunk, pool.submit(_score_chunk, symptoms, top_k)))
+                else:
+                    pending.append((chunk, _score_chunk(symptoms, top_k)))
+                # Bounded read-ahead keeps every worker busy without buffering the file
+                while len(pending) > 2 * workers:
+                    write_oldest()
+            while pending:
+                write_oldest()
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+    
+    os.remove(checkpoint_path)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {scored} rows in {elapsed:.1f}s "
+          f"({scored / elapsed if elapsed else 0:.0f} rows/s), {rows_done} rows in '{output_path}'")
+    return rows_done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV or JSONL file of symptom records")
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='scoring processes (default: one per CPU)')
+    parser.add_argument('--symptom-column', default='Symptoms')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--backend', default='sklearn')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue from the checkpoint left by an interrupted run')
+    args = parser.parse_args()
+    
+    bulk_score(args.input, args.output, top_k=args.top_k, chunk_size=args.chunk_size,
+               workers=args.workers, symptom_column=args.symptom_column,
+               input_format=args.input_format, output_format=args.output_format,
+               backend=args.backend, resume=args.resume)
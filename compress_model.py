@@ -0,0 +1,299 @@
+"""
+Forest Compression
+------------------
+Builds smaller models from a trained disease_model.pkl and measures what
+each one costs against the original (the teacher):
+
+* greedy tree subsets - trees are added one at a time, each time taking the
+  tree that brings the subset's predictions closest to the teacher's on the
+  training rows
+* unused features - symptoms no tree of a candidate splits on are removed
+  from its input while it is measured (--drop-unused); a saved model keeps
+  the full symptom list, so those symptoms are accepted and read as unused
+  columns
+* distillation - shallow forests and single trees fitted to the teacher's
+  class probabilities rather than the original labels
+
+Every candidate is scored on agreement with the teacher on rows none of the
+selection or distillation saw, held-out accuracy,
+p50/p99 single-row latency of the compiled forest and exported artifact
+size. The smallest, then fastest, candidate within --min-agreement and
+--max-accuracy-loss is marked and, with --save, written as
+compressed_model.pkl and compressed_model/ for review before it replaces
+the production model.
+    
+    python compress_model.py --subset-sizes 10,25,50 --distill-depths 6,8 --save
+"""
+
+import argparse
+import copy
+import json
+import pickle
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.tree._tree import Tree
+
+from model_search import artifact_size, single_row_latencies
+from train_model import load_training_data, save_model
+from vocabulary import SymptomVocabulary
+
+def load_labelled(path, vocabulary, label_encoder):
+    """(X, y) for a Disease,Symptoms file, keeping rows whose disease the model knows."""
+    X, y, le = load_training_data(vocabulary, path)
+    known = np.isin(le.classes_, label_encoder.classes_)
+    codes = np.full(len(le.classes_), -1, dtype=np.int64)
+    codes[known] = label_encoder.transform(le.classes_[known])
+    y = codes[y]
+    if (y < 0).any():
+        print(f"Skipping {int((y < 0).sum())} row(s) of '{path}' with diseases the model lacks")
+    return X[y >= 0], y[y >= 0]
+
+def random_symptom_sets(n_features, count, seed=0, max_symptoms=6):
+    """CSR rows of 1 to ``max_symptoms`` distinct random symptoms, as users enter them."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, min(max_symptoms, n_features) + 1, count)
+    cols = np.concatenate([rng.choice(n_features, size, replace=False) for size in sizes]) \
+        if count else np.empty(0, dtype=np.int64)
+    indptr = np.concatenate(([0], np.cumsum(sizes)))
+    return sparse.csr_matrix((np.ones(len(cols), dtype=np.uint8), cols, indptr),
+                             shape=(count, n_features))
+
+def tree_probabilities(model, X):
+    """Class probabilities of every tree, shape (trees, rows, classes)."""
+    return np.stack([estimator.predict_proba(X).astype(np.float32)
+                     for estimator in model.estimators_])
+
+def greedy_subset(per_tree, size):
+    """Indices of ``size`` trees, in the order greedy selection picked them.
+    
+    Each step adds the tree whose inclusion agrees with the full forest's
+    prediction on the most rows, breaking ties on squared distance to the
+    full forest's probabilities.
+    """
+    target = per_tree.mean(axis=0)
+    labels = target.argmax(axis=1)
+    remaining = list(range(len(per_tree)))
+    chosen = []
+    total = np.zeros_like(target)
+    for step in range(min(size, len(per_tree))):
+        trial = (total[None] + per_tree[remaining]) / (step + 1)
+        agree = (trial.argmax(axis=2) == labels).sum(axis=1)
+        error = ((trial - target) ** 2).sum(axis=(1, 2))
+        best = min(range(len(remaining)), key=lambda i: (-agree[i], error[i]))
+        chosen.append(remaining.pop(best))
+        total += per_tree[chosen[-1]]
+    return chosen
+
+def subset_forest(model, trees):
+    forest = copy.copy(model)
+    forest.estimators_ = [model.estimators_[i] for i in trees]
+    forest.n_estimators = len(trees)
+    return forest
+
+def used_features(model):
+    """Sorted indices of the features any tree splits on."""
+    features = [estimator.tree_.feature for estimator in model.estimators_]
+    return np.unique(np.concatenate([f[f >= 0] for f in features]))
+
+def drop_unused_features(model):
+    """(copy of model over only its used features, their original indices)."""
+    used = used_features(model)
+    remap = np.full(model.n_features_in_, -1, dtype=np.intp)
+    remap[used] = np.arange(len(used))
+    
+    estimators = []
+    for estimator in model.estimators_:
+        # Rebuild the tree with its split features renumbered into the compact order
+        state = estimator.tree_.__getstate__()
+        nodes = state['nodes'].copy()
+        split = nodes['feature'] >= 0
+        nodes['feature'][split] = remap[nodes['feature'][split]]
+        state['nodes'] = nodes
+        tree = Tree(len(used), np.asarray(estimator.tree_.n_classes, dtype=np.intp),
+                    estimator.tree_.n_outputs)
+        tree.__setstate__(state)
+        
+        compact = copy.copy(estimator)
+        compact.tree_ = tree
+        compact.n_features_in_ = len(used)
+        estimators.append(compact)
+    
+    compact = copy.copy(model)
+    compact.estimators_ = estimators
+    compact.n_features_in_ = len(used)
+    return compact, used
+
+def distill(teacher, X, n_estimators=1, max_depth=6, seed=42):
+    """Forest fitted to the teacher's probabilities on X.
+    
+    Each row is repeated once per class the teacher gives any probability,
+    weighted by that probability, so the student learns the soft targets.
+    """
+    proba = teacher.predict_proba(X)
+    rows, classes = np.nonzero(proba > 0)
+    weights = proba[rows, classes]
+    # Classes the teacher never predicts still need a column in the student
+    missing = np.setdiff1d(np.arange(proba.shape[1]), classes)
+    rows = np.concatenate([rows, np.zeros(len(missing), dtype=rows.dtype)])
+    classes = np.concatenate([classes, missing])
+    weights = np.concatenate([weights, np.zeros(len(missing))])
+    
+    student = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        criterion='entropy',
+        # A single tree sees every row and feature; a forest needs the variety
+        bootstrap=n_estimators > 1,
+        max_features=None if n_estimators == 1 else 'sqrt',
+        random_state=seed,
+        n_jobs=-1
+    )
+    student.fit(X[rows], teacher.classes_[classes], sample_weight=weights)
+    return student
+
+def _score(name, model, columns, X_agree, teacher_labels, X_test, y_test, latency_rows):
+    if columns is not None:
+        X_agree, X_test = X_agree[:, columns], X_test[:, columns]
+    timings = single_row_latencies(model, X_agree, latency_rows) * 1000
+    return {
+        'name': name,
+        'trees': len(model.estimators_),
+        'max_depth': max(int(e.tree_.max_depth) for e in model.estimators_),
+        'nodes': sum(int(e.tree_.node_count) for e in model.estimators_),
+        'features': int(model.n_features_in_),
+        'agreement': float((model.predict(X_agree) == teacher_labels).mean()),
+        'accuracy': float((model.predict(X_test) == y_test).mean()) if len(y_test) else 0.0,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'size_bytes': artifact_size(model)
+    }
+
+def choose(results, min_agreement, max_accuracy_loss):
+    """Smallest, then fastest, candidate within both bounds (the teacher always is)."""
+    teacher = results[0]
+    eligible = [r for r in results
+                if r['agreement'] >= min_agreement
+                and teacher['accuracy'] - r['accuracy'] <= max_accuracy_loss]
+    return min(eligible, key=lambda r: (r['size_bytes'], r['p50_ms']))
+
+def compress_model(model_path='disease_model.pkl', dataset_path='dataset.csv', test_path=None,
+                   subset_sizes=(10, 25, 50), distill_trees=(1, 10), distill_depths=(6, 8),
+                   drop_unused=False, random_rows=5000, latency_rows=500, min_agreement=0.99,
+                   max_accuracy_loss=0.01, test_size=0.2, seed=42, save=False,
+                   output_path='compressed_model.pkl', output_dir='compressed_model',
+                   report_path='compression_report.json'):
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    teacher = model_data['model']
+    le = model_data['label_encoder']
+    symptoms = list(model_data['symptoms'])
+    vocabulary = SymptomVocabulary(symptoms)
+    
+    X, y = load_labelled(dataset_path, vocabulary, le)
+    if test_path:
+        X_train, y_train = X, y
+        X_test, y_test = load_labelled(test_path, vocabulary, le)
+    else:
+        stratify = y if len(y) and np.bincount(y).min() >= 2 else None
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, stratify=stratify, random_state=seed)
+        print("No --test-data given: accuracy is on a split of the training file, which "
+              "the teacher has most likely seen")
+    
+    # Agreement is judged on held-out rows plus random symptom sets, so candidates
+    # must also match the teacher on inputs unlike the training rows. Tree
+    # selection and distillation only see the training rows and their own random
+    # sets, so the reported agreement is out of sample.
+    X_agree = sparse.vstack([X_test, random_symptom_sets(len(symptoms), random_rows, seed)],
+                            format='csr')
+    X_fit = sparse.vstack([X_train, random_symptom_sets(len(symptoms), random_rows, seed + 1)],
+                          format='csr')
+    teacher_labels = teacher.predict(X_agree)
+    
+    started = time.perf_counter()
+    candidates = [('teacher', teacher)]
+    if subset_sizes:
+        sizes = sorted(s for s in subset_sizes if s < len(teacher.estimators_))
+        order = greedy_subset(tree_probabilities(teacher, X_fit), max(sizes, default=0))
+        candidates += [(f'subset-{s}', subset_forest(teacher, order[:s])) for s in sizes]
+    for n_estimators in distill_trees:
+        for max_depth in distill_depths:
+            name = f'distill-tree-d{max_depth}' if n_estimators == 1 else \
+                f'distill-{n_estimators}x-d{max_depth}'
+            candidates.append((name, distill(teacher, X_fit, n_estimators, max_depth, seed)))
+    print(f"Built {len(candidates) - 1} candidates in {time.perf_counter() - started:.1f}s")
+    
+    results = []
+    for name, model in candidates:
+        columns = None
+        if drop_unused and name != 'teacher':
+            model, columns = drop_unused_features(model)
+        results.append(_score(name, model, columns, X_agree, teacher_labels,
+                              X_test, y_test, latency_rows))
+    models = dict(candidates)
+    best = choose(results, min_agreement, max_accuracy_loss)
+    
+    base = results[0]
+    print(f"{'candidate':<22} {'trees':>5} {'feat':>5} {'agree':>7} {'accuracy':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'size KB':>8} {'smaller':>8}")
+    for r in results:
+        marker = ' *' if r is best else ''
+        print(f"{r['name']:<22} {r['trees']:>5} {r['features']:>5} {r['agreement']:>7.4f} "
+              f"{r['accuracy']:>8.4f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['size_bytes'] / 1024:>8.0f} {base['size_bytes'] / r['size_bytes']:>7.1f}x{marker}")
+    print(f"(* smallest within agreement >= {min_agreement} and accuracy loss <= "
+          f"{max_accuracy_loss}; {len(y_test)} held-out rows, {X_agree.shape[0]} agreement rows)")
+    
+    with open(report_path, 'w') as f:
+        json.dump({'model': model_path, 'test_rows': int(len(y_test)),
+                   'agreement_rows': int(X_agree.shape[0]), 'min_agreement': min_agreement,
+                   'max_accuracy_loss': max_accuracy_loss, 'results': results,
+                   'chosen': best['name']}, f, indent=2)
+    
+    if save:
+        # Saved over the full vocabulary: symptoms it never splits on stay valid input
+        save_model({'model': models[best['name']], 'label_encoder': le, 'symptoms': symptoms},
+                   output_path, output_dir)
+        print(f"Saved '{best['name']}' as '{output_path}' and '{output_dir}/'")
+    return best
+
+def _int_list(text):
+    return [int(part) for part in text.split(',') if part]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress a trained forest and report the cost")
+    parser.add_argument('--model', default='disease_model.pkl')
+    parser.add_argument('--dataset', default='dataset.csv',
+                        help='Disease,Symptoms rows for distillation and the hold-out split')
+    parser.add_argument('--test-data',
+                        help='separate Disease,Symptoms hold-out file (default: split --dataset)')
+    parser.add_argument('--subset-sizes', type=_int_list, default=[10, 25, 50],
+                        help='comma-separated tree counts for greedy subsets')
+    parser.add_argument('--distill-trees', type=_int_list, default=[1, 10],
+                        help='comma-separated student forest sizes (1 for a single tree)')
+    parser.add_argument('--distill-depths', type=_int_list, default=[6, 8],
+                        help='comma-separated student depths')
+    parser.add_argument('--drop-unused', action='store_true',
+                        help='measure candidates on only the symptoms they split on')
+    parser.add_argument('--random-rows', type=int, default=5000,
+                        help='random symptom sets added for agreement and distillation')
+    parser.add_argument('--latency-rows', type=int, default=500)
+    parser.add_argument('--min-agreement', type=float, default=0.99)
+    parser.add_argument('--max-accuracy-loss', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--report', default='compression_report.json')
+    parser.add_argument('--save', action='store_true',
+                        help='write the marked candidate to --output and --output-dir')
+    parser.add_argument('--output', default='compressed_model.pkl')
+    parser.add_argument('--output-dir', default='compressed_model')
+    args = parser.parse_args()
+    
+    compress_model(args.model, args.dataset, args.test_data, args.subset_sizes,
+                   args.distill_trees, args.distill_depths, args.drop_unused, args.random_rows,
+                   args.latency_rows, args.min_agreement, args.max_accuracy_loss,
+                   seed=args.seed, save=args.save, output_path=args.output,
+                   output_dir=args.output_dir, report_path=args.report)
@@ -1,43 +1,447 @@
+import ast
+import atexit
+import logging
+import queue
 import sqlite3
+import threading
+import time
+import weakref
 from datetime import datetime
-import os
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that tells the writer thread to commit what it has and exit
+_STOP = object()
+
+_STAGE_HELP = 'Seconds spent in each PatientDatabase write stage'
+_ENQUEUE = REGISTRY.histogram('database_stage_seconds', _STAGE_HELP, stage='enqueue')
+_WRITE_BATCH = REGISTRY.histogram('database_stage_seconds', _STAGE_HELP, stage='write_batch')
+_ROWS_WRITTEN = REGISTRY.counter('database_rows_written_total', 'Predictions committed')
+_WRITE_ERRORS = REGISTRY.counter('database_write_errors_total',
+                                 'Prediction batches rolled back after an error')
+_ROWS_DROPPED = REGISTRY.counter('database_rows_dropped_total',
+                                 'Predictions that could not be written on their own either')
+
+def _queue_depth(db_ref):
+    db = db_ref()
+    return None if db is None else db._pending.qsize()
+
+# Column order of every prediction row returned by the query methods
+PREDICTION_COLUMNS = ('id', 'timestamp', 'disease', 'confidence', 'symptoms',
+                      'patient_name', 'patient_age', 'patient_gender')
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS patients (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        age TEXT NOT NULL DEFAULT '',
+        gender TEXT NOT NULL DEFAULT '',
+        UNIQUE (name, age, gender)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS symptoms (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )''',
+    '''CREATE TABLE IF NOT EXISTS predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        patient_id INTEGER NOT NULL REFERENCES patients (id),
+        disease TEXT NOT NULL,
+        confidence REAL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS prediction_symptoms (
+        prediction_id INTEGER NOT NULL REFERENCES predictions (id),
+        symptom_id INTEGER NOT NULL REFERENCES symptoms (id),
+        position INTEGER NOT NULL,
+        PRIMARY KEY (prediction_id, symptom_id)
+    ) WITHOUT ROWID''',
+    # (column, timestamp, id) indexes serve both the filters and keyset ordering
+    'CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp, id)',
+    'CREATE INDEX IF NOT EXISTS idx_predictions_disease ON predictions (disease, timestamp, id)',
+    'CREATE INDEX IF NOT EXISTS idx_predictions_patient ON predictions (patient_id, timestamp, id)',
+    'CREATE INDEX IF NOT EXISTS idx_patients_name ON patients (name)',
+    'CREATE INDEX IF NOT EXISTS idx_prediction_symptoms_symptom '
+    'ON prediction_symptoms (symptom_id, prediction_id)',
+)
+
+_PREDICTION_SELECT = '''
+    SELECT p.id, p.timestamp, p.disease, p.confidence,
+           (SELECT group_concat(name, ',') FROM (
+                SELECT s.name AS name FROM prediction_symptoms ps
+                JOIN symptoms s ON s.id = ps.symptom_id
+                WHERE ps.prediction_id = p.id
+                ORDER BY ps.position)),
+           pt.name, pt.age, pt.gender
+    FROM predictions p
+    JOIN patients pt ON pt.id = p.patient_id
+'''
 
 class PatientDatabase:
-    def __init__(self):
-        # Delete existing database if exists
-        if os.path.exists('patients.db'):
-            os.remove('patients.db')
+    def __init__(self, path='patients.db', batch_size=256, flush_interval=0.05, max_pending=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        # sqlite3 connections are not thread-safe, so every thread gets its own
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        # Orders add_prediction's closed check and put against close()'s stop marker,
+        # and hands out queue sequence numbers in queue order
+        self._enqueue_lock = threading.Lock()
+        self._enqueued = 0
+        # Sequence number of the last row the writer has finished with, so
+        # flush() waits for earlier rows only, not for the queue to drain
+        self._written = 0
+        self._written_changed = threading.Condition()
+        db_ref = weakref.ref(self)
+        REGISTRY.gauge('database_queue_depth', 'Predictions waiting for the writer thread',
+                       lambda: _queue_depth(db_ref))
+        
+        # Ids the writer has already looked up, so repeat patients and symptoms skip a query
+        self._patient_ids = {}
+        self._symptom_ids = {}
+        
+        # Called as hook(conn, records) inside each write transaction
+        self._write_hooks = []
         
-        self.conn = sqlite3.connect('patients.db')
         self.create_tables()
+        self._writer = threading.Thread(target=self._write_loop,
+                                        name='PatientDatabase-writer',
+                                        daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+    
+    def _connect(self):
+        # Each connection stays on its own thread; the flag only lets close() shut them all
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # WAL lets readers run while the writer commits; NORMAL only syncs at checkpoints
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
     
     def create_tables(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS predictions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME,
-                disease TEXT,
-                confidence FLOAT,
-                symptoms TEXT,
-                patient_info TEXT
-            )
-        ''')
-        self.conn.commit()
+        conn = self.conn
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(predictions)')]
+        if 'symptoms' in columns:
+            self.migrate_legacy_predictions()
+            return
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+    
+    def migrate_legacy_predictions(self, chunk_size=1000):
+        # Moves the old flat table (comma-joined symptoms, str(dict) patient_info)
+        # into the normalized schema in one transaction, reading it in id-ordered
+        # chunks so memory stays bounded whatever the history size.
+        conn = self.conn
+        legacy_columns = [row[1] for row in conn.execute('PRAGMA table_info(predictions)')]
+        name_column = 'patient_name' if 'patient_name' in legacy_columns else 'NULL'
+        
+        conn.execute('BEGIN')
+        try:
+            # Index names belong to the old table and would clash with the new ones
+            for index in ('idx_predictions_timestamp', 'idx_predictions_disease',
+                          'idx_predictions_patient'):
+                conn.execute(f'DROP INDEX IF EXISTS {index}')
+            conn.execute('ALTER TABLE predictions RENAME TO predictions_legacy')
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            
+            last_id = 0
+            while True:
+                rows = conn.execute(f'''
+                    SELECT id, timestamp, disease, confidence, symptoms, patient_info, {name_column}
+                    FROM predictions_legacy WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, chunk_size)).fetchall()
+                if not rows:
+                    break
+                for row_id, timestamp, disease, confidence, symptoms, info, name in rows:
+                    info = parse_patient_info(info)
+                    patient = _patient_key(name or info.get('name'), info.get('age'),
+                                           info.get('gender'))
+                    self._insert_prediction(conn, row_id, str(timestamp), disease, confidence,
+                                            (symptoms or '').split(','), patient)
+                last_id = rows[-1][0]
+            
+            conn.execute('DROP TABLE predictions_legacy')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self._patient_ids.clear()
+            self._symptom_ids.clear()
+            raise
     
     def add_prediction(self, disease, confidence, symptoms, patient_info):
-        cursor = self.conn.cursor()
-        timestamp = datetime.now()
-        symptoms_str = ','.join(symptoms)
-        patient_info_str = str(patient_info)
+        # Queued for the writer thread; blocks only when max_pending rows are waiting
+        timestamp = datetime.now().isoformat(' ')
+        patient_info = patient_info or {}
+        patient = _patient_key(patient_info.get('name'), patient_info.get('age'),
+                               patient_info.get('gender'))
+        started = REGISTRY.clock()
+        with self._enqueue_lock:
+            # Checked under the lock, so nothing is queued behind close()'s stop marker
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            self._enqueued += 1
+            self._pending.put((self._enqueued,
+                               (timestamp, disease, float(confidence), tuple(symptoms), patient)))
+        _ENQUEUE.observe_since(started)
+    
+    def _insert_prediction(self, conn, row_id, timestamp, disease, confidence, symptoms, patient):
+        patient_id = self._patient_ids.get(patient)
+        if patient_id is None:
+            conn.execute('INSERT OR IGNORE INTO patients (name, age, gender) VALUES (?, ?, ?)',
+                         patient)
+            patient_id = conn.execute(
+                'SELECT id FROM patients WHERE name = ? AND age = ? AND gender = ?',
+                patient).fetchone()[0]
+            self._patient_ids[patient] = patient_id
         
-        cursor.execute('''
-            INSERT INTO predictions (timestamp, disease, confidence, symptoms, patient_info)
+        cursor = conn.execute('''
+            INSERT INTO predictions (id, timestamp, patient_id, disease, confidence)
             VALUES (?, ?, ?, ?, ?)
-        ''', (timestamp, disease, confidence, symptoms_str, patient_info_str))
-        self.conn.commit()
+        ''', (row_id, timestamp, patient_id, disease, confidence))
+        prediction_id = cursor.lastrowid
+        
+        # Symptom id -> position in the submitted list, first occurrence wins
+        links = {}
+        names = []
+        for symptom in symptoms:
+            symptom = symptom.strip()
+            if not symptom:
+                continue
+            symptom_id = self._symptom_ids.get(symptom)
+            if symptom_id is None:
+                conn.execute('INSERT OR IGNORE INTO symptoms (name) VALUES (?)', (symptom,))
+                symptom_id = conn.execute('SELECT id FROM symptoms WHERE name = ?',
+                                          (symptom,)).fetchone()[0]
+                self._symptom_ids[symptom] = symptom_id
+            if symptom_id not in links:
+                links[symptom_id] = len(links)
+                names.append(symptom)
+        conn.executemany('''
+            INSERT INTO prediction_symptoms (prediction_id, symptom_id, position)
+            VALUES (?, ?, ?)
+        ''', [(prediction_id, symptom_id, position) for symptom_id, position in links.items()])
+        return prediction_id, names
+    
+    def add_write_hook(self, hook):
+        """Run hook(conn, records) in the same transaction as every batch of new
+        predictions. records holds (prediction_id, timestamp, disease,
+        confidence, symptoms) tuples; a hook that raises rolls the batch back."""
+        self.flush()
+        self._write_hooks.append(hook)
+    
+    def _write_loop(self):
+        conn = self.conn
+        stopping = False
+        while not stopping:
+            item = self._pending.get()
+            batch = []
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+                # Gather more rows until the batch is full or the flush interval passes
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._pending.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+            
+            if batch:
+                rows = [row for _, row in batch]
+                started = REGISTRY.clock()
+                try:
+                    self._write_batch(conn, rows)
+                    _WRITE_BATCH.observe_since(started)
+                except Exception:
+                    _WRITE_ERRORS.inc()
+                    logger.exception("Error writing %d predictions, retrying them one by one",
+                                     len(rows))
+                    # One bad row should not cost the rest of the batch
+                    for row in rows:
+                        try:
+                            self._write_batch(conn, [row])
+                        except Exception:
+                            _ROWS_DROPPED.inc()
+                            logger.exception("Dropping prediction for %r at %s", row[1], row[0])
+                with self._written_changed:
+                    self._written = batch[-1][0]
+                    self._written_changed.notify_all()
+    
+    def _write_batch(self, conn, batch):
+        # One transaction for the rows and every write hook; rolled back whole on error
+        try:
+            records = []
+            for timestamp, disease, confidence, symptoms, patient in batch:
+                prediction_id, names = self._insert_prediction(
+                    conn, None, timestamp, disease, confidence, symptoms, patient)
+                records.append((prediction_id, timestamp, disease, confidence, names))
+            for hook in self._write_hooks:
+                hook(conn, records)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # Ids handed out inside the rolled-back transaction no longer exist
+            self._patient_ids.clear()
+            self._symptom_ids.clear()
+            raise
+        _ROWS_WRITTEN.inc(len(batch))
+    
+    def flush(self):
+        # Wait until every prediction queued before this call has been committed;
+        # rows added meanwhile by other threads do not hold it up
+        with self._enqueue_lock:
+            target = self._enqueued
+        with self._written_changed:
+            self._written_changed.wait_for(lambda: self._written >= target)
+    
+    def close(self):
+        with self._enqueue_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.put(_STOP)
+        self._writer.join()
+        
+        # Durable shutdown: checkpoint the WAL into the main database file
+        conn = self.conn
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
     
     def get_all_predictions(self):
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM predictions ORDER BY timestamp DESC')
-        return cursor.fetchall()
\ No newline at end of file
+        self.flush()
+        return self.conn.execute(
+            _PREDICTION_SELECT + ' ORDER BY p.timestamp DESC, p.id DESC').fetchall()
+    
+    def get_predictions(self, limit=50, cursor=None, start=None, end=None,
+                        disease=None, patient_name=None, symptom=None):
+        """Newest-first page of predictions using keyset pagination.
+        
+        Pass the returned next_cursor back as ``cursor`` to fetch the following
+        page; it is None once there are no more rows. ``start`` and ``end``
+        bound the timestamp (datetime or ISO string, end exclusive).
+        """
+        self.flush()
+        where, params = _filters(start, end, disease, patient_name, symptom)
+        if cursor is not None:
+            where.append('(p.timestamp, p.id) < (?, ?)')
+            params.extend(cursor)
+        
+        rows = self.conn.execute(
+            _PREDICTION_SELECT + _where(where) +
+            ' ORDER BY p.timestamp DESC, p.id DESC LIMIT ?',
+            params + [limit + 1]).fetchall()
+        
+        # One extra row tells us whether another page exists
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][1], rows[-1][0])
+        return rows, next_cursor
+    
+    def count_predictions(self, start=None, end=None, disease=None, patient_name=None,
+                          symptom=None):
+        # e.g. count_predictions(symptom='fever', start=last_monday)
+        self.flush()
+        where, params = _filters(start, end, disease, patient_name, symptom)
+        return self.conn.execute(
+            'SELECT count(*) FROM predictions p' + _where(where), params).fetchone()[0]
+    
+    def disease_summary(self, start=None, end=None, symptom=None):
+        # (disease, count, mean confidence), most frequent first
+        self.flush()
+        where, params = _filters(start, end, symptom=symptom)
+        return self.conn.execute(f'''
+            SELECT p.disease, count(*), avg(p.confidence)
+            FROM predictions p{_where(where)}
+            GROUP BY p.disease
+            ORDER BY count(*) DESC, p.disease
+        ''', params).fetchall()
+    
+    def symptom_counts(self, start=None, end=None, disease=None, limit=None):
+        # (symptom, count) over the matching predictions, most frequent first
+        self.flush()
+        where, params = _filters(start, end, disease)
+        return self.conn.execute(f'''
+            SELECT s.name, count(*)
+            FROM prediction_symptoms ps
+            JOIN symptoms s ON s.id = ps.symptom_id
+            JOIN predictions p ON p.id = ps.prediction_id{_where(where)}
+            GROUP BY s.id
+            ORDER BY count(*) DESC, s.name
+            LIMIT ?
+        ''', params + [-1 if limit is None else limit]).fetchall()
+
+def _patient_key(name, age, gender):
+    # NULLs never collide in a UNIQUE constraint, so missing fields are stored as ''
+    return (str(name or ''), str(age or ''), str(gender or ''))
+
+def _filters(start=None, end=None, disease=None, patient_name=None, symptom=None):
+    where = []
+    params = []
+    if disease is not None:
+        where.append('p.disease = ?')
+        params.append(disease)
+    if patient_name is not None:
+        where.append('p.patient_id IN (SELECT id FROM patients WHERE name = ?)')
+        params.append(patient_name)
+    if symptom is not None:
+        where.append('''p.id IN (SELECT ps.prediction_id FROM prediction_symptoms ps
+                                 JOIN symptoms s ON s.id = ps.symptom_id
+                                 WHERE s.name = ?)''')
+        params.append(symptom)
+    if start is not None:
+        where.append('p.timestamp >= ?')
+        params.append(_timestamp(start))
+    if end is not None:
+        where.append('p.timestamp < ?')
+        params.append(_timestamp(end))
+    return where, params
+
+def _where(conditions):
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+def _timestamp(value):
+    return value.isoformat(' ') if isinstance(value, datetime) else str(value)
+
+def parse_patient_info(patient_info):
+    # Legacy rows store patient_info as str(dict); literal_eval never executes code
+    if not patient_info:
+        return {}
+    try:
+        info = ast.literal_eval(patient_info)
+    except (ValueError, SyntaxError):
+        return {}
+    return info if isinstance(info, dict) else {}
@@ -1,56 +1,202 @@
+"""
+Model Evaluation
+----------------
+Streams a hold-out file through the model in chunks and accumulates the
+metrics incrementally, so memory is bounded by the chunk size and not the
+file size. Two layouts are accepted:
+
+* ``Disease,Symptoms`` rows, as in dataset.csv
+* wide rows with one 0/1 column per symptom and a ``prognosis`` label
+
+Results are a JSON summary (accuracy, macro/weighted precision, recall and
+F1 over every label that was either actual or predicted, as sklearn
+averages them), a per-class CSV and the non-zero cells of the confusion matrix as an
+(actual, predicted, count) CSV. Plots are optional and only import
+matplotlib when requested. Scoring defaults to the sklearn backend, which is
+faster than the compiled engine on chunks this large.
+"""
+
+import argparse
+import json
+import os
 import pickle
+import time
+from collections import Counter
+
 import numpy as np
 import pandas as pd
-from sklearn.metrics import classification_report, confusion_matrix
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-def evaluate_model(test_data_path='Testing.csv'):
-    # Load the trained model
-    with open('disease_model.pkl', 'rb') as f:
-        data = pickle.load(f)
-        model = data['model']
-        label_encoder = data['label_encoder']
-        symptoms = data['symptoms']
-    
-    # Load test data
-    test_df = pd.read_csv(test_data_path)
-    
-    # Prepare features and target
-    X_test = test_df[symptoms]
-    y_test = label_encoder.transform(test_df['prognosis'])
-    
-    # Make predictions
-    y_pred = model.predict(X_test)
-    
-    # Generate classification report
-    print("\nClassification Report:")
-    print(classification_report(
-        y_test, 
-        y_pred, 
-        target_names=label_encoder.classes_
-    ))
-    
-    # Create confusion matrix visualization
+from backend import MODEL_PATH, DiseasePredictor
+
+NO_PREDICTION = '(none)'
+
+class StreamingMetrics:
+    """Sparse confusion counts updated one batch at a time."""
+    
+    def __init__(self):
+        self.labels = {}
+        self.confusion = Counter()
+        self.rows = 0
+    
+    def _encode(self, names):
+        for name in pd.unique(names):
+            self.labels.setdefault(name, len(self.labels))
+        return pd.Series(names).map(self.labels).to_numpy(dtype=np.int64)
+    
+    def update(self, actual, predicted):
+        actual = self._encode(np.asarray(actual, dtype=object))
+        predicted = self._encode(np.asarray(predicted, dtype=object))
+        # Pack each (actual, predicted) pair into one integer and count them at once
+        pairs, counts = np.unique(actual << 32 | predicted, return_counts=True)
+        for pair, count in zip(pairs.tolist(), counts.tolist()):
+            self.confusion[(pair >> 32, pair & 0xFFFFFFFF)] += count
+        self.rows += len(actual)
+    
+    def per_class(self):
+        names = list(self.labels)
+        support = Counter()
+        predicted = Counter()
+        correct = Counter()
+        for (a, p), count in self.confusion.items():
+            support[a] += count
+            predicted[p] += count
+            if a == p:
+                correct[a] += count
+        
+        # Every label seen as actual or predicted, like sklearn's default labels
+        rows = []
+        for i, name in enumerate(names):
+            precision = correct[i] / predicted[i] if predicted[i] else 0.0
+            recall = correct[i] / support[i] if support[i] else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            rows.append({'disease': name, 'precision': precision, 'recall': recall,
+                         'f1': f1, 'support': support[i], 'predicted': predicted[i]})
+        return rows
+    
+    def summary(self):
+        rows = self.per_class()
+        total = sum(r['support'] for r in rows)
+        correct = sum(count for (a, p), count in self.confusion.items() if a == p)
+        summary = {'rows': self.rows, 'accuracy': correct / self.rows if self.rows else 0.0}
+        for metric in ('precision', 'recall', 'f1'):
+            values = [r[metric] for r in rows]
+            summary[f'macro_{metric}'] = float(np.mean(values)) if values else 0.0
+            summary[f'weighted_{metric}'] = \
+                sum(r[metric] * r['support'] for r in rows) / total if total else 0.0
+        return summary
+    
+    def confusion_rows(self):
+        names = list(self.labels)
+        return [(names[a], names[p], count)
+                for (a, p), count in sorted(self.confusion.items(), key=lambda item: -item[1])]
+
+def _read_chunks(path, chunk_size, label_column):
+    """Yield (labels, symptom strings or None, wide frame or None) per chunk."""
+    columns = pd.read_csv(path, nrows=0).columns
+    if 'Symptoms' in columns:
+        label = label_column or 'Disease'
+        for chunk in pd.read_csv(path, usecols=[label, 'Symptoms'], dtype=str,
+                                 keep_default_na=False, chunksize=chunk_size):
+            yield chunk[label].to_numpy(dtype=object), chunk['Symptoms'], None
+    else:
+        label = label_column or 'prognosis'
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield chunk.pop(label).astype(str).to_numpy(dtype=object), None, chunk
+
+def _wide_matrix(predictor, frame, column_map):
+    # Scatter the known symptom columns into the model's column order
+    X = np.zeros((len(frame), len(predictor.symptoms)), dtype=np.uint8)
+    if column_map:
+        source, target = zip(*column_map.items())
+        X[:, list(target)] = frame[list(source)].fillna(0).to_numpy() != 0
+    return X
+
+def evaluate_model(test_data_path='Testing.csv', output_dir='evaluation', chunk_size=100000,
+                   label_column=None, backend='sklearn', plot=False, top_classes=30):
+    predictor = DiseasePredictor(backend=backend, cache_size=0, lazy_db=True)
+    if predictor.load_error is not None:
+        raise RuntimeError(f"Could not load model: {predictor.load_error}")
+    
+    metrics = StreamingMetrics()
+    column_map = None
+    started = time.perf_counter()
+    for labels, symptoms, wide in _read_chunks(test_data_path, chunk_size, label_column):
+        if wide is None:
+            X = predictor.vocabulary.featurize(symptoms, packed=True)
+            diseases, _ = predictor.predict_matrix(X, top_k=1, packed=True)
+        else:
+            if column_map is None:
+                column_map = {c: predictor.vocabulary.get(c) for c in wide.columns}
+                unknown = [c for c, idx in column_map.items() if idx is None]
+                if unknown:
+                    print(f"Ignoring {len(unknown)} column(s) not in the model: {unknown[:5]}")
+                column_map = {c: idx for c, idx in column_map.items() if idx is not None}
+            diseases, _ = predictor.predict_matrix(_wide_matrix(predictor, wide, column_map),
+                                                   top_k=1)
+        predicted = diseases[:, 0]
+        predicted[pd.isna(predicted)] = NO_PREDICTION
+        metrics.update(labels, predicted)
+    elapsed = time.perf_counter() - started
+    
+    summary = metrics.summary()
+    summary['seconds'] = elapsed
+    summary['rows_per_s'] = metrics.rows / elapsed if elapsed else 0.0
+    summary['model_sha256'] = predictor.model_sha256
+    
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'metrics.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    per_class = pd.DataFrame(metrics.per_class())
+    per_class.to_csv(os.path.join(output_dir, 'per_class.csv'), index=False)
+    pd.DataFrame(metrics.confusion_rows(), columns=['actual', 'predicted', 'count']) \
+        .to_csv(os.path.join(output_dir, 'confusion.csv'), index=False)
+    
+    print(f"Evaluated {metrics.rows} rows in {elapsed:.2f}s ({summary['rows_per_s']:.0f} rows/s)")
+    print(f"Accuracy {summary['accuracy']:.4f}, macro F1 {summary['macro_f1']:.4f}, "
+          f"weighted F1 {summary['weighted_f1']:.4f}; results in '{output_dir}/'")
+    
+    if plot:
+        plot_results(metrics, predictor, output_dir, top_classes)
+    return summary
+
+def plot_results(metrics, predictor, output_dir='evaluation', top_classes=30):
+    """Confusion heatmap over the most frequent classes, plus feature importances."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    per_class = sorted(metrics.per_class(), key=lambda r: -r['support'])[:top_classes]
+    names = [r['disease'] for r in per_class]
+    index = {name: i for i, name in enumerate(names)}
+    cm = np.zeros((len(names), len(names)), dtype=np.int64)
+    for actual, predicted, count in metrics.confusion_rows():
+        if actual in index and predicted in index:
+            cm[index[actual], index[predicted]] = count
+    
     plt.figure(figsize=(15, 10))
-    cm = confusion_matrix(y_test, y_pred)
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-    plt.title('Confusion Matrix')
+    # Numbers are only legible on small matrices
+    sns.heatmap(cm, annot=len(names) <= 20, fmt='d', cmap='Blues',
+                xticklabels=names, yticklabels=names)
+    plt.title(f'Confusion Matrix (top {len(names)} classes by support)')
     plt.xlabel('Predicted')
     plt.ylabel('Actual')
-    plt.savefig('confusion_matrix.png')
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'confusion_matrix.png'))
     plt.close()
     
-    # Feature importance analysis
+    # Only the sklearn forest carries importances; the compiled artifact does not
+    importances = getattr(predictor.model, 'feature_importances_', None)
+    if importances is None:
+        importances = _pickled_importances(predictor.symptoms)
+    if importances is None:
+        print(f"Skipping feature importances: '{MODEL_PATH}' does not hold the evaluated model")
+        return
     feature_importance = pd.DataFrame({
-        'symptom': symptoms,
-        'importance': model.feature_importances_
-    })
-    feature_importance = feature_importance.sort_values(
-        'importance', ascending=False
-    )
+        'symptom': predictor.symptoms,
+        'importance': importances
+    }).sort_values('importance', ascending=False)
     
-    # Plot feature importance
     plt.figure(figsize=(15, 8))
     sns.barplot(
         data=feature_importance.head(20),
@@ -60,10 +206,32 @@ def evaluate_model(test_data_path='Testing.csv'):
     plt.title('Top 20 Most Important Symptoms')
     plt.xlabel('Importance Score')
     plt.tight_layout()
-    plt.savefig('feature_importance.png')
+    plt.savefig(os.path.join(output_dir, 'feature_importance.png'))
     plt.close()
-    
-    return feature_importance
+
+def _pickled_importances(symptoms):
+    try:
+        with open(MODEL_PATH, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError):
+        return None
+    if list(data['symptoms']) != list(symptoms):
+        return None
+    return getattr(data['model'], 'feature_importances_', None)
 
 if __name__ == "__main__":
-    evaluate_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluate the model on a hold-out file")
+    parser.add_argument('test_data', nargs='?', default='Testing.csv')
+    parser.add_argument('--output-dir', default='evaluation')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--label-column',
+                        help="label column (default 'Disease' or 'prognosis' by layout)")
+    parser.add_argument('--backend', default='sklearn')
+    parser.add_argument('--plot', action='store_true',
+                        help='also draw the confusion heatmap and feature importances')
+    parser.add_argument('--top-classes', type=int, default=30,
+                        help='classes shown in the confusion heatmap')
+    args = parser.parse_args()
+    
+    evaluate_model(args.test_data, args.output_dir, args.chunk_size, args.label_column,
+                   args.backend, args.plot, args.top_classes)
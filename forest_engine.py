@@ -0,0 +1,116 @@
+"""
+Compiled Forest Inference Engine
+--------------------------------
+Flattens a fitted RandomForestClassifier into contiguous NumPy node arrays
+once, then scores batches of bit-packed 0/1 symptom vectors by walking every
+tree one level at a time with vectorized array operations. Leaf distributions
+are added up one tree at a time, so memory stays at rows x classes.
+"""
+
+import numpy as np
+
+# Rows walked together; keeps the (rows x trees) node arrays small enough to stay in cache
+_CHUNK_ROWS = 512
+# Up to this many (rows x trees x classes) leaf values are gathered and summed in one step
+_MAX_GATHER = 1 << 16
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 classes, n_features, max_depth):
+        # Plain views of memory-mapped arrays: the pages stay shared, but indexing
+        # skips np.memmap's per-call Python overhead
+        self.feature = np.asarray(feature)
+        self.threshold = np.asarray(threshold)
+        self.left = np.asarray(left)
+        self.right = np.asarray(right)
+        self.value = np.asarray(value)
+        self.roots = np.asarray(roots)
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+        self.n_estimators = len(roots)
+        # Inputs are 0/1, so each node's split reduces to a child per bit value:
+        # the walk reads children[2 * node + bit] instead of comparing thresholds
+        children = np.empty(2 * len(feature), dtype=np.intp)
+        children[0::2] = np.where(threshold >= 0, left, right)
+        children[1::2] = np.where(threshold >= 1, left, right)
+        self._children = children
+    
+    @classmethod
+    def from_sklearn(cls, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("Only single-output forests can be compiled")
+        
+        counts = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(tree.node_count) + offset
+            
+            # Leaves point back at themselves so extra levels are no-ops
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            
+            # Normalise each node to a class distribution, as predict_proba does
+            dist = tree.value[:, 0, :].astype(np.float64)
+            totals = dist.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            value.append(dist / totals)
+        
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(left), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(right), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(value) / len(trees)),
+            roots=offsets.astype(np.intp),
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+            max_depth=max(int(tree.max_depth) for tree in trees)
+        )
+    
+    @staticmethod
+    def pack(X):
+        """Bit-pack a dense or sparse 0/1 matrix row-wise (8 symptoms per byte)."""
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        return np.packbits(np.asarray(X) != 0, axis=1)
+    
+    def predict_proba(self, X):
+        X = X if hasattr(X, 'toarray') else np.atleast_2d(X)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the forest expects "
+                f"{self.n_features_in_}")
+        return self.predict_proba_packed(self.pack(X))
+    
+    def predict_proba_packed(self, packed):
+        packed = np.asarray(packed, dtype=np.uint8)
+        proba = np.zeros((packed.shape[0], self.value.shape[1]))
+        for start in range(0, packed.shape[0], _CHUNK_ROWS):
+            leaves = self._leaves(packed[start:start + _CHUNK_ROWS])
+            out = proba[start:start + _CHUNK_ROWS]
+            if leaves.size * proba.shape[1] <= _MAX_GATHER:
+                out[:] = self.value[leaves].sum(axis=1)
+                continue
+            for tree in range(self.n_estimators):
+                out += self.value[leaves[:, tree]]
+        return proba
+    
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+    
+    def _leaves(self, packed):
+        # One byte per symptom, flattened so a row's bit is at row * n_features + feature
+        bits = np.unpackbits(packed, axis=1, count=self.n_features_in_).ravel()
+        offsets = (np.arange(packed.shape[0]) * self.n_features_in_)[:, None]
+        # One row of current node ids per sample, one column per tree
+        nodes = np.broadcast_to(self.roots, (packed.shape[0], self.n_estimators))
+        for _ in range(self.max_depth):
+            nodes = self._children[2 * nodes + bits[offsets + self.feature[nodes]]]
+        return nodes
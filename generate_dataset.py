@@ -0,0 +1,220 @@
+"""
+Synthetic Dataset Generator
+---------------------------
+Generates training data at any scale for load and capacity testing: any
+number of diseases and symptoms, and any row count. Each disease gets a
+profile of primary and secondary symptoms drawn from a long-tailed symptom
+popularity, so common symptoms are shared across many diseases. Each row
+keeps every primary symptom with ``primary_prob`` and every secondary one
+with ``secondary_prob``, plus occasional unrelated noise.
+
+Rows are generated and appended to dataset.csv in blocks of CHUNK_ROWS, so
+memory does not grow with the row count. Each block has its own seed derived
+from ``seed``, so the same arguments always give byte-identical files.
+Symptom-severity.csv, symptom_Description.csv and symptom_precaution.csv
+are written in the same layout as the project's own files.
+    
+    python generate_dataset.py --diseases 2000 --symptoms 5000 --rows 10000000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 10000
+
+_BODY_PARTS = [
+    'chest', 'abdominal', 'back', 'neck', 'joint', 'muscle', 'eye', 'ear', 'throat',
+    'skin', 'knee', 'hip', 'shoulder', 'wrist', 'ankle', 'jaw', 'pelvic', 'rectal',
+    'scalp', 'tongue', 'gum', 'nasal', 'flank', 'foot', 'hand'
+]
+_COMPLAINTS = [
+    'pain', 'swelling', 'itching', 'numbness', 'stiffness', 'bleeding', 'rash',
+    'weakness', 'discharge', 'cramps', 'tenderness', 'burning', 'redness',
+    'tingling', 'spasms', 'dryness', 'lumps', 'bruising'
+]
+_QUALIFIERS = ['', 'mild ', 'severe ', 'chronic ', 'intermittent ', 'sudden ', 'recurring ']
+_GENERAL = [
+    'fever', 'fatigue', 'headache', 'nausea', 'vomiting', 'dizziness', 'chills',
+    'sweating', 'cough', 'dry cough', 'shortness of breath', 'weight loss',
+    'loss of appetite', 'insomnia', 'anxiety', 'confusion', 'diarrhea', 'constipation',
+    'blurred vision', 'frequent urination', 'excessive thirst', 'palpitations',
+    'wheezing', 'sore throat', 'runny nose', 'night sweats', 'fainting', 'hair loss'
+]
+_DISEASE_ROOTS = [
+    'Cardi', 'Gastr', 'Derm', 'Neur', 'Hepat', 'Nephr', 'Arthr', 'Pneum', 'Enter',
+    'Encephal', 'Oste', 'My', 'Bronch', 'Rhin', 'Col', 'Pancreat', 'Cyst', 'Vascul',
+    'Laryng', 'Sinus', 'Mening', 'Tendin', 'Derma', 'Retin', 'Thyro', 'Lymph'
+]
+_DISEASE_SUFFIXES = ['itis', 'osis', 'opathy', 'algia', 'oma', 'emia']
+_DISEASE_QUALIFIERS = ['', 'Acute ', 'Chronic ', 'Viral ', 'Bacterial ', 'Idiopathic ',
+                       'Juvenile ', 'Hereditary ']
+_PRECAUTIONS = [
+    'Consult a healthcare professional', 'Follow prescribed medication',
+    'Maintain healthy lifestyle', 'Regular health checkups', 'Stay hydrated',
+    'Get adequate rest', 'Avoid known triggers', 'Monitor symptoms daily',
+    'Eat a balanced diet', 'Exercise regularly', 'Avoid smoking and alcohol',
+    'Practice good hygiene', 'Keep vaccinations up to date', 'Manage stress',
+    'Seek emergency care if symptoms worsen', 'Limit contact with others while ill'
+]
+
+def _unique_names(candidates, count):
+    # Cycle through the pool and number the repeats once it runs out
+    names = []
+    for i in range(count):
+        base = candidates[i % len(candidates)]
+        round_ = i // len(candidates)
+        names.append(base if round_ == 0 else f'{base} {round_ + 1}')
+    return names
+
+def symptom_names(count):
+    pool = list(_GENERAL)
+    for qualifier in _QUALIFIERS:
+        for part in _BODY_PARTS:
+            for complaint in _COMPLAINTS:
+                pool.append(f'{qualifier}{part} {complaint}')
+    return _unique_names(pool, count)
+
+def disease_names(count):
+    pool = [f'{qualifier}{root}{suffix}'
+            for qualifier in _DISEASE_QUALIFIERS
+            for suffix in _DISEASE_SUFFIXES
+            for root in _DISEASE_ROOTS]
+    return _unique_names(pool, count)
+
+def build_profiles(n_diseases, n_symptoms, rng, primary_count=(3, 5), secondary_count=(3, 8)):
+    """(primary, secondary) index arrays of shape (diseases, max count), -1 padded."""
+    # Zipf-like popularity: a few symptoms (fever, fatigue...) appear everywhere
+    popularity = 1.0 / np.arange(1, n_symptoms + 1) ** 0.8
+    popularity /= popularity.sum()
+    max_primary = min(primary_count[1], n_symptoms)
+    max_secondary = min(secondary_count[1], n_symptoms)
+    primary = np.full((n_diseases, max_primary), -1, dtype=np.int64)
+    secondary = np.full((n_diseases, max_secondary), -1, dtype=np.int64)
+    for d in range(n_diseases):
+        n_primary = min(int(rng.integers(primary_count[0], primary_count[1] + 1)), max_primary)
+        n_secondary = min(int(rng.integers(secondary_count[0], secondary_count[1] + 1)),
+                          max_secondary, n_symptoms - n_primary)
+        chosen = rng.choice(n_symptoms, size=n_primary + n_secondary, replace=False, p=popularity)
+        primary[d, :n_primary] = chosen[:n_primary]
+        secondary[d, :n_secondary] = chosen[n_primary:]
+    return primary, secondary
+
+def generate_rows(n_rows, primary, secondary, prevalence, n_symptoms, rng,
+                  primary_prob=0.85, secondary_prob=0.3, noise_prob=0.05):
+    """Disease ids and a list of symptom index arrays for one block of rows."""
+    diseases = rng.choice(len(prevalence), size=n_rows, p=prevalence)
+    row_primary = primary[diseases]
+    row_secondary = secondary[diseases]
+    keep_primary = rng.random(row_primary.shape) < primary_prob
+    # Every row keeps at least its first primary symptom, but padding never survives
+    keep_primary[:, 0] = True
+    keep_primary &= row_primary >= 0
+    keep_secondary = (rng.random(row_secondary.shape) < secondary_prob) & (row_secondary >= 0)
+    noise = np.where(rng.random(n_rows) < noise_prob, rng.integers(0, n_symptoms, n_rows), -1)
+    
+    candidates = np.concatenate([row_primary, row_secondary, noise[:, None]], axis=1)
+    keep = np.concatenate([keep_primary, keep_secondary, noise[:, None] >= 0], axis=1)
+    return diseases, [row[mask] for row, mask in zip(candidates, keep)]
+
+def generate_dataset(n_diseases=1000, n_symptoms=2000, n_rows=1000000, output_dir='.',
+                     seed=42, primary_prob=0.85, secondary_prob=0.3, noise_prob=0.05,
+                     primary_count=(3, 5), secondary_count=(3, 8),
+                     primary_weight=(4, 6), secondary_weight=(1, 3)):
+    """Write dataset.csv and the three knowledge files into output_dir.
+    
+    Returns (symptoms, diseases), the generated name lists.
+    """
+    seeds = np.random.SeedSequence(seed)
+    profile_seed, weight_seed, rows_seed = seeds.spawn(3)
+    rng = np.random.default_rng(profile_seed)
+    
+    symptoms = np.array(symptom_names(n_symptoms), dtype=object)
+    diseases = np.array(disease_names(n_diseases), dtype=object)
+    primary, secondary = build_profiles(n_diseases, n_symptoms, rng, primary_count,
+                                        secondary_count)
+    # Uneven prevalence, so some diseases are far more common than others
+    prevalence = rng.dirichlet(np.full(n_diseases, 0.5))
+    
+    os.makedirs(output_dir, exist_ok=True)
+    dataset_path = os.path.join(output_dir, 'dataset.csv')
+    started = time.perf_counter()
+    with open(dataset_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('Disease,Symptoms\n')
+        n_chunks = (n_rows + CHUNK_ROWS - 1) // CHUNK_ROWS
+        for chunk, chunk_seed in enumerate(rows_seed.spawn(n_chunks)):
+            size = min(CHUNK_ROWS, n_rows - chunk * CHUNK_ROWS)
+            disease_ids, rows = generate_rows(size, primary, secondary, prevalence,
+                                              n_symptoms, np.random.default_rng(chunk_seed),
+                                              primary_prob, secondary_prob, noise_prob)
+            pd.DataFrame({
+                'Disease': diseases[disease_ids],
+                # dict.fromkeys drops a noise symptom that repeats a profile symptom
+                'Symptoms': [','.join(dict.fromkeys(symptoms[row])) for row in rows]
+            }).to_csv(f, index=False, header=False, lineterminator='\n')
+    
+    # Symptoms that are primary anywhere get the higher severity band
+    rng = np.random.default_rng(weight_seed)
+    is_primary = np.zeros(n_symptoms, dtype=bool)
+    is_primary[primary[primary >= 0]] = True
+    weights = np.where(is_primary,
+                       rng.integers(primary_weight[0], primary_weight[1] + 1, n_symptoms),
+                       rng.integers(secondary_weight[0], secondary_weight[1] + 1, n_symptoms))
+    pd.DataFrame({'Symptom': symptoms, 'weight': weights}) \
+        .to_csv(os.path.join(output_dir, 'Symptom-severity.csv'), index=False)
+    
+    descriptions = []
+    precautions = []
+    for d, disease in enumerate(diseases):
+        main = ', '.join(symptoms[primary[d][primary[d] >= 0]])
+        extra = ', '.join(symptoms[secondary[d][secondary[d] >= 0]])
+        descriptions.append({
+            'Disease': disease,
+            'Description': f"{disease} is characterized primarily by {main}. "
+                           f"Additional symptoms may include {extra}."
+        })
+        chosen = rng.choice(len(_PRECAUTIONS), size=4, replace=False)
+        precautions.append({'Disease': disease,
+                            **{f'Precaution_{i + 1}': _PRECAUTIONS[c] for i, c in enumerate(chosen)}})
+    pd.DataFrame(descriptions).to_csv(os.path.join(output_dir, 'symptom_Description.csv'),
+                                      index=False)
+    pd.DataFrame(precautions).to_csv(os.path.join(output_dir, 'symptom_precaution.csv'),
+                                     index=False)
+    
+    elapsed = time.perf_counter() - started
+    print(f"Generated {n_rows} rows for {n_diseases} diseases over {n_symptoms} symptoms "
+          f"in {elapsed:.1f}s")
+    return symptoms.tolist(), diseases.tolist()
+
+def _range(text):
+    low, _, high = text.partition(',')
+    return int(low), int(high or low)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic disease dataset")
+    parser.add_argument('--diseases', type=int, default=1000)
+    parser.add_argument('--symptoms', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--primary-prob', type=float, default=0.85,
+                        help='chance each primary symptom appears in a row')
+    parser.add_argument('--secondary-prob', type=float, default=0.3,
+                        help='chance each secondary symptom appears in a row')
+    parser.add_argument('--noise-prob', type=float, default=0.05,
+                        help='chance a row gets one unrelated symptom')
+    parser.add_argument('--primary-count', type=_range, default=(3, 5), metavar='MIN,MAX')
+    parser.add_argument('--secondary-count', type=_range, default=(3, 8), metavar='MIN,MAX')
+    parser.add_argument('--primary-weight', type=_range, default=(4, 6), metavar='MIN,MAX',
+                        help='severity weight range for symptoms that are primary anywhere')
+    parser.add_argument('--secondary-weight', type=_range, default=(1, 3), metavar='MIN,MAX',
+                        help='severity weight range for the other symptoms')
+    args = parser.parse_args()
+    
+    generate_dataset(args.diseases, args.symptoms, args.rows, args.output_dir, args.seed,
+                     args.primary_prob, args.secondary_prob, args.noise_prob,
+                     args.primary_count, args.secondary_count,
+                     args.primary_weight, args.secondary_weight)
@@ -11,43 +11,196 @@ Features:
 - Patient prediction history
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 import customtkinter as ctk
-import pickle
-import numpy as np
-import os
-import pandas as pd
-from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from database import PatientDatabase
-from datetime import datetime
+from datetime import date, timedelta
+_IMPORTS_DONE = time.perf_counter()
+
+# backend (numpy, pandas, scipy, the model) is imported on the loader thread
+# so the window can be drawn before any of it is ready.
+
+class StartupProfile:
+    def __init__(self):
+        self.phases = []
+    
+    def add(self, phase, seconds):
+        self.phases.append((phase, seconds))
+    
+    def since_start(self, phase):
+        self.add(phase, time.perf_counter() - _IMPORT_START)
+    
+    def report(self):
+        print("Startup profile:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<32}{seconds * 1000:9.1f} ms")
+
+class HistoryWindow:
+    # Rows fetched per query; more pages load as the user nears the bottom
+    PAGE_SIZE = 100
+    # Rows kept in the table; the oldest ones scrolled past are dropped
+    MAX_ROWS = 1000
+    COLUMNS = (('time', "Time", 150), ('patient', "Patient", 130), ('age', "Age", 50),
+               ('gender', "Gender", 70), ('disease', "Disease", 130),
+               ('confidence', "Confidence", 90), ('symptoms', "Symptoms", 300))
+    
+    def __init__(self, root, db):
+        self.db = db
+        self.cursor = None
+        self.exhausted = False
+        self.loading = False
+        self.filters = {}
+        
+        self.window = ctk.CTkToplevel(root)
+        self.window.title("Prediction History")
+        self.window.geometry("1000x600")
+        self.window.configure(fg_color='#1e1e2e')
+        
+        # Filters are pushed down to indexed queries in PatientDatabase
+        filter_frame = ctk.CTkFrame(self.window, fg_color='#313244')
+        filter_frame.pack(fill='x', padx=20, pady=(20, 10))
+        
+        self.patient_var = tk.StringVar()
+        self.disease_var = tk.StringVar()
+        self.start_var = tk.StringVar()
+        self.end_var = tk.StringVar()
+        for label, var, width in (("Patient:", self.patient_var, 140),
+                                  ("Disease:", self.disease_var, 140),
+                                  ("From (YYYY-MM-DD):", self.start_var, 100),
+                                  ("To:", self.end_var, 100)):
+            ctk.CTkLabel(filter_frame, text=label, text_color='#cdd6f4').pack(side='left', padx=5)
+            ctk.CTkEntry(filter_frame, textvariable=var, width=width).pack(side='left', padx=5)
+        
+        ctk.CTkButton(filter_frame,
+                      text="Apply",
+                      command=self.apply_filters,
+                      width=80,
+                      fg_color='#89b4fa',
+                      hover_color='#74c7ec').pack(side='left', padx=10, pady=10)
+        
+        table_frame = ctk.CTkFrame(self.window, fg_color='#313244')
+        table_frame.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+        
+        style = ttk.Style()
+        style.configure('History.Treeview',
+                        background='#1e1e2e',
+                        fieldbackground='#1e1e2e',
+                        foreground='#cdd6f4',
+                        rowheight=24)
+        style.configure('History.Treeview.Heading', font=('Helvetica', 11, 'bold'))
+        
+        self.tree = ttk.Treeview(table_frame,
+                                 columns=[name for name, _, _ in self.COLUMNS],
+                                 show='headings',
+                                 style='History.Treeview')
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, anchor='w')
+        
+        self.scrollbar = ctk.CTkScrollbar(table_frame, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        
+        self.load_page()
+    
+    def apply_filters(self):
+        filters = {
+            'patient_name': self.patient_var.get().strip(),
+            'disease': self.disease_var.get().strip(),
+            'start': self.start_var.get().strip(),
+            'end': _inclusive_end(self.end_var.get().strip())
+        }
+        self.filters = {key: value for key, value in filters.items() if value}
+        self.tree.delete(*self.tree.get_children())
+        self.cursor = None
+        self.exhausted = False
+        self.load_page()
+    
+    def load_page(self):
+        if self.exhausted or self.loading:
+            return
+        self.loading = True
+        try:
+            rows, self.cursor = self.db.get_predictions(limit=self.PAGE_SIZE,
+                                                        cursor=self.cursor,
+                                                        **self.filters)
+        finally:
+            self.loading = False
+        self.exhausted = self.cursor is None
+        
+        for pred in rows:
+            self.tree.insert('', 'end', values=(
+                pred[1].split('.')[0],
+                pred[5] or 'N/A',
+                pred[6] or 'N/A',
+                pred[7] or 'N/A',
+                pred[2],
+                f"{pred[3]*100:.2f}%",
+                pred[4] or ''
+            ))
+        
+        children = self.tree.get_children()
+        excess = len(children) - self.MAX_ROWS
+        if excess > 0:
+            # Keep the rows on screen in place while the ones above them go
+            top = int(self.tree.yview()[0] * len(children))
+            self.tree.delete(*children[:excess])
+            self.tree.yview_moveto(max(top - excess, 0) / self.MAX_ROWS)
+    
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Fetch the next page before the user reaches the end of what is loaded
+        if not self.exhausted and float(last) > 0.9:
+            self.window.after_idle(self.load_page)
+
+def _inclusive_end(value):
+    # The database's end bound is exclusive, so a bare date has to cover the whole day
+    try:
+        return (date.fromisoformat(value) + timedelta(days=1)).isoformat() \
+            if len(value) == 10 else value
+    except ValueError:
+        return value
 
 class DiseasePredictionGUI:
-    def __init__(self, root):
+    def __init__(self, root, startup_profile=False):
         # Configure main window
         self.root = root
         self.root.title("Disease Prediction System")
         self.root.geometry("1200x800")
         self.root.configure(bg='#1e1e2e')
         
-        # Initialize database
-        self.db = PatientDatabase()
+        self.profile = StartupProfile() if startup_profile else None
+        if self.profile:
+            self.profile.add("gui imports", _IMPORTS_DONE - _IMPORT_START)
+        
+        # Filled in by the background loader; predictor owns model, cache and database
+        self.predictor = None
+        self.db = None
+        self.symptoms = []
+        self._loader_results = queue.Queue()
+        
+        # Predictions run on a worker pool; finished jobs come back through a queue
+        # that the Tk thread polls, since widgets must only be touched from it
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='predict')
+        self._prediction_results = queue.Queue()
+        self._polling_predictions = False
+        self._request_seq = 0
+        self._active_request = None
+        self._live_request = None
         
         # Initialize core components
-        self.load_descriptions()
         self.setup_styles()
+        self.create_main_interface()
         self.load_model()
         
-    def load_descriptions(self):
-        try:
-            self.descriptions = pd.read_csv('symptom_Description.csv')
-            self.precautions = pd.read_csv('symptom_precaution.csv')
-        except:
-            self.descriptions = None
-            self.precautions = None
-    
     def setup_styles(self):
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
@@ -55,16 +208,66 @@ class DiseasePredictionGUI:
         self.style.configure('Main.TFrame', background='#1e1e2e')
         
     def load_model(self):
+        # Show the window in a loading state and load everything off the Tk thread
+        self.predict_btn.configure(state='disabled')
+        self.history_btn.configure(state='disabled')
+        self.result_label.configure(text="Loading model...")
+        if self.profile:
+            self.root.after_idle(self.profile.since_start, "window shown (since start)")
+        threading.Thread(target=self._load_in_background, daemon=True).start()
+        self.root.after(50, self._poll_loader)
+    
+    def _load_in_background(self):
         try:
-            with open('disease_model.pkl', 'rb') as f:
-                data = pickle.load(f)
-                self.model = data['model']
-                self.label_encoder = data['label_encoder']
-                self.symptoms = data['symptoms']
-            self.create_main_interface()
+            started = time.perf_counter()
+            from backend import DiseasePredictor
+            imported = time.perf_counter() - started
+            predictor = DiseasePredictor()
+            if predictor.model is None:
+                raise RuntimeError(predictor.load_error)
+            self._loader_results.put((predictor, imported, None))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load model: {str(e)}")
+            self._loader_results.put((None, 0.0, e))
+    
+    def _poll_loader(self):
+        # Tk widgets are only touched from the main thread, so poll for the result
+        try:
+            predictor, imported, error = self._loader_results.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self._poll_loader)
+            return
+        
+        if error is not None:
+            self.result_label.configure(text="Model unavailable")
+            messagebox.showerror("Error", f"Failed to load model: {str(error)}")
+            return
+        
+        self.predictor = predictor
+        # Retrained models are picked up without restarting the window
+        predictor.watch_model()
+        self.db = predictor.db
+        self.symptoms = predictor.symptoms
+        self.create_symptom_buttons()
+        self.root.after(1000, self._poll_model)
+        self.predict_btn.configure(state='normal')
+        self.history_btn.configure(state='normal')
+        self.result_label.configure(text="Select symptoms and click Predict")
+        
+        if self.profile:
+            self.profile.add("backend import", imported)
+            for phase, seconds in predictor.load_timings.items():
+                self.profile.add(f"load {phase}", seconds)
+            self.root.update_idletasks()
+            self.profile.since_start("ready (since start)")
+            self.profile.report()
             
+    def _poll_model(self):
+        # A reload swaps the predictor's symptom list; rebuild the checkboxes to match
+        if self.predictor.symptoms is not self.symptoms:
+            self.symptoms = self.predictor.symptoms
+            self.create_symptom_buttons()
+        self.root.after(1000, self._poll_model)
+    
     def create_main_interface(self):
         # Header section
         header_frame = ctk.CTkFrame(self.root, fg_color='#1e1e2e')
@@ -113,6 +316,7 @@ class DiseasePredictionGUI:
         search_label.pack(side='left', padx=10)
         
         self.search_var = tk.StringVar()
+        self._filter_job = None
         self.search_var.trace('w', self.filter_symptoms)
         search_entry = ctk.CTkEntry(search_frame,
                                   textvariable=self.search_var,
@@ -128,25 +332,36 @@ class DiseasePredictionGUI:
         
         self.symptom_vars = {}
         self.symptom_buttons = {}
+        # Grid cell each checkbox currently occupies; hidden ones are absent
+        self._symptom_slots = {}
+        self.search_index = None
         self.create_symptom_buttons()
         
         # Control buttons
         button_frame = ctk.CTkFrame(self.root, fg_color='#1e1e2e')
         button_frame.pack(pady=20)
         
-        predict_btn = ctk.CTkButton(button_frame,
-                                  text="Predict Disease",
-                                  command=self.predict,
-                                  fg_color='#89b4fa',
-                                  hover_color='#74c7ec')
-        predict_btn.pack(side='left', padx=10)
-        
-        history_btn = ctk.CTkButton(button_frame,
-                                  text="View History",
-                                  command=self.show_history,
-                                  fg_color='#89b4fa',
-                                  hover_color='#74c7ec')
-        history_btn.pack(side='left', padx=10)
+        self.predict_btn = ctk.CTkButton(button_frame,
+                                       text="Predict Disease",
+                                       command=self.predict,
+                                       fg_color='#89b4fa',
+                                       hover_color='#74c7ec')
+        self.predict_btn.pack(side='left', padx=10)
+        
+        self.history_btn = ctk.CTkButton(button_frame,
+                                       text="View History",
+                                       command=self.show_history,
+                                       fg_color='#89b4fa',
+                                       hover_color='#74c7ec')
+        self.history_btn.pack(side='left', padx=10)
+        
+        self.cancel_btn = ctk.CTkButton(button_frame,
+                                      text="Cancel",
+                                      command=self.cancel_prediction,
+                                      state='disabled',
+                                      fg_color='#fab387',
+                                      hover_color='#f9e2af')
+        self.cancel_btn.pack(side='left', padx=10)
         
         clear_btn = ctk.CTkButton(button_frame,
                                  text="Clear Selection",
@@ -155,6 +370,16 @@ class DiseasePredictionGUI:
                                  hover_color='#eba0ac')
         clear_btn.pack(side='left', padx=10)
         
+        # Live mode re-scores in the background whenever a symptom is toggled
+        self.live_var = tk.BooleanVar(value=False)
+        live_switch = ctk.CTkSwitch(button_frame,
+                                  text="Live prediction",
+                                  variable=self.live_var,
+                                  command=self.on_symptom_toggle,
+                                  text_color='#cdd6f4',
+                                  progress_color='#89b4fa')
+        live_switch.pack(side='left', padx=10)
+        
         # Results section
         self.result_frame = ctk.CTkFrame(self.root, fg_color='#313244')
         self.result_frame.pack(fill='x', padx=30, pady=10)
@@ -195,24 +420,58 @@ class DiseasePredictionGUI:
             self.precautions_labels.append(label)
     
     def create_symptom_buttons(self):
+        # Checkboxes are built once per vocabulary; searching only shows and hides them
+        if list(self.symptom_buttons) == list(self.symptoms):
+            return
+        from vocabulary import SymptomSearchIndex
+        
+        previous = {s: v.get() for s, v in self.symptom_vars.items()}
         for widget in self.symptoms_frame.winfo_children():
             widget.destroy()
-        
-        for i, symptom in enumerate(self.symptoms):
-            if self.search_var.get().lower() in symptom.lower():
-                var = tk.BooleanVar()
-                self.symptom_vars[symptom] = var
-                btn = ctk.CTkCheckBox(self.symptoms_frame,
-                                    text=symptom.replace('_', ' ').title(),
-                                    variable=var,
-                                    text_color='#cdd6f4',
-                                    fg_color='#89b4fa',
-                                    hover_color='#74c7ec')
-                btn.grid(row=i//3, column=i%3, padx=20, pady=10, sticky='w')
-                self.symptom_buttons[symptom] = btn
+        self.symptom_vars = {}
+        self.symptom_buttons = {}
+        self._symptom_slots = {}
+        
+        for symptom in self.symptoms:
+            var = tk.BooleanVar(value=previous.get(symptom, False))
+            self.symptom_vars[symptom] = var
+            btn = ctk.CTkCheckBox(self.symptoms_frame,
+                                text=symptom.replace('_', ' ').title(),
+                                variable=var,
+                                command=self.on_symptom_toggle,
+                                text_color='#cdd6f4',
+                                fg_color='#89b4fa',
+                                hover_color='#74c7ec')
+            self.symptom_buttons[symptom] = btn
+        
+        self.search_index = SymptomSearchIndex(self.symptoms)
+        self.apply_symptom_filter()
     
     def filter_symptoms(self, *args):
-        self.create_symptom_buttons()
+        # Debounce keystrokes: only the last one within 150 ms re-filters
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(150, self.apply_symptom_filter)
+    
+    def apply_symptom_filter(self):
+        self._filter_job = None
+        if self.search_index is None:
+            return
+        
+        visible = [self.symptoms[i] for i in self.search_index.search(self.search_var.get())]
+        slots = {symptom: divmod(i, 3) for i, symptom in enumerate(visible)}
+        
+        for symptom in list(self._symptom_slots):
+            if symptom not in slots:
+                self.symptom_buttons[symptom].grid_remove()
+                del self._symptom_slots[symptom]
+        
+        # Only checkboxes whose cell changed are re-gridded
+        for symptom, (row, column) in slots.items():
+            if self._symptom_slots.get(symptom) != (row, column):
+                self.symptom_buttons[symptom].grid(row=row, column=column,
+                                                   padx=20, pady=10, sticky='w')
+                self._symptom_slots[symptom] = (row, column)
     
     def predict(self):
         if not self.name_var.get().strip():
@@ -225,66 +484,121 @@ class DiseasePredictionGUI:
             messagebox.showwarning("Warning", "Please select at least one symptom")
             return
         
-        X = np.zeros(len(self.symptoms))
-        for symptom in selected_symptoms:
-            idx = self.symptoms.index(symptom)
-            X[idx] = 1
-        
+        # Store prediction with patient info
+        patient_info = {
+            'name': self.name_var.get(),
+            'age': self.age_var.get(),
+            'gender': self.gender_var.get()
+        }
+        
+        # A repeated click for the request already in flight is coalesced into it
+        key = (frozenset(selected_symptoms), tuple(patient_info.values()))
+        if self._active_request is not None:
+            if self._active_request['key'] == key:
+                return
+            self.cancel_prediction()
+        
+        self._active_request = self._submit_prediction(selected_symptoms, patient_info)
+        self._active_request['key'] = key
+        self.predict_btn.configure(text="Predicting...")
+        self.cancel_btn.configure(state='normal')
+        self.result_label.configure(text="Predicting...")
+    
+    def cancel_prediction(self):
+        request = self._active_request
+        if request is None:
+            return
+        # A job that already started is left to finish but neither saves nor reports
+        request['cancelled'].set()
+        request['future'].cancel()
+        self._active_request = None
+        self._reset_predict_controls()
+        self.result_label.configure(text="Prediction cancelled")
+    
+    def on_symptom_toggle(self):
+        if not self.live_var.get() or self.predictor is None:
+            return
+        selected_symptoms = [s for s, v in self.symptom_vars.items() if v.get()]
+        if not selected_symptoms:
+            self._live_request = None
+            return
+        # Only the newest live request is ever shown; older ones are dropped
+        if self._live_request is not None:
+            self._live_request['cancelled'].set()
+            self._live_request['future'].cancel()
+        self._live_request = self._submit_prediction(selected_symptoms, None)
+    
+    def _submit_prediction(self, symptoms, patient_info):
+        self._request_seq += 1
+        request = {
+            'id': self._request_seq,
+            'cancelled': threading.Event()
+        }
+        request['future'] = self._executor.submit(
+            self._run_prediction, request['id'], symptoms, patient_info, request['cancelled'])
+        if not self._polling_predictions:
+            self._polling_predictions = True
+            self.root.after(20, self._poll_predictions)
+        return request
+    
+    def _run_prediction(self, request_id, symptoms, patient_info, cancelled):
+        # Worker thread: model, knowledge base and database, but never Tk widgets
         try:
-            prediction = self.model.predict([X])
-            probability = self.model.predict_proba([X]).max()
-            disease = self.label_encoder.inverse_transform(prediction)[0]
-            
-            # Store prediction with patient info
-            patient_info = {
-                'name': self.name_var.get(),
-                'age': self.age_var.get(),
-                'gender': self.gender_var.get()
-            }
-            self.db.add_prediction(disease, probability, selected_symptoms, patient_info)
-            
-            self.result_label.configure(
-                text=f"Predicted Disease: {disease}\nConfidence: {probability*100:.2f}%")
-            
-            self.update_disease_info(disease)
-                        
+            result = self.predictor.predict_many([symptoms], top_k=1)[0]
+            if result is None:
+                raise RuntimeError("model returned no prediction")
+            info = self.predictor.get_disease_info(result['disease'])
+            if patient_info is not None and not cancelled.is_set():
+                self.db.add_prediction(result['disease'], result['confidence'],
+                                       symptoms, patient_info)
+            self._prediction_results.put((request_id, result, info, None))
         except Exception as e:
-            messagebox.showerror("Prediction Error", f"Error making prediction: {str(e)}")
+            self._prediction_results.put((request_id, None, None, e))
+    
+    def _poll_predictions(self):
+        while True:
+            try:
+                request_id, result, info, error = self._prediction_results.get_nowait()
+            except queue.Empty:
+                break
+            self._show_prediction(request_id, result, info, error)
+        
+        in_flight = [r for r in (self._active_request, self._live_request)
+                     if r is not None and not r['future'].done()]
+        if in_flight or not self._prediction_results.empty():
+            self.root.after(20, self._poll_predictions)
+        else:
+            self._polling_predictions = False
+    
+    def _show_prediction(self, request_id, result, info, error):
+        active = self._active_request
+        live = self._live_request
+        if active is not None and active['id'] == request_id:
+            self._active_request = None
+            self._reset_predict_controls()
+            prefix = "Predicted Disease"
+        elif live is not None and live['id'] == request_id:
+            self._live_request = None
+            prefix = "Live Prediction"
+        else:
+            # Cancelled or superseded
+            return
+        
+        if error is not None:
+            messagebox.showerror("Prediction Error", f"Error making prediction: {str(error)}")
+            return
+        
+        self.result_label.configure(
+            text=f"{prefix}: {result['disease']}\nConfidence: {result['confidence']*100:.2f}%"
+                 f" (model {result['model_version']})")
+        self.show_disease_info(*info)
+    
+    def _reset_predict_controls(self):
+        self.predict_btn.configure(text="Predict Disease")
+        self.cancel_btn.configure(state='disabled')
     
     def show_history(self):
-        history_window = ctk.CTkToplevel(self.root)
-        history_window.title("Prediction History")
-        history_window.geometry("800x600")
-        history_window.configure(fg_color='#1e1e2e')
-        
-        history_frame = ctk.CTkScrollableFrame(history_window,
-                                             fg_color='#313244',
-                                             width=750,
-                                             height=550)
-        history_frame.pack(pady=20, padx=20, fill='both', expand=True)
-        
-        predictions = self.db.get_all_predictions()
-        
-        for pred in predictions:
-            pred_frame = ctk.CTkFrame(history_frame, fg_color='#1e1e2e')
-            pred_frame.pack(fill='x', pady=5, padx=10)
-            
-            patient_info = eval(pred[5]) if pred[5] else {}
-            
-            info_text = f"Patient: {patient_info.get('name', 'N/A')}\n"
-            info_text += f"Age: {patient_info.get('age', 'N/A')} | "
-            info_text += f"Gender: {patient_info.get('gender', 'N/A')}\n"
-            info_text += f"Time: {pred[1].split('.')[0]}\n"
-            info_text += f"Disease: {pred[2]}\n"
-            info_text += f"Confidence: {pred[3]*100:.2f}%\n"
-            info_text += f"Symptoms: {pred[4]}"
-            
-            label = ctk.CTkLabel(pred_frame,
-                               text=info_text,
-                               font=('Helvetica', 12),
-                               text_color='#cdd6f4',
-                               justify='left')
-            label.pack(pady=10, padx=10)
+        HistoryWindow(self.root, self.db)
     
     def clear_selection(self):
         self.name_var.set("")
@@ -298,25 +612,23 @@ class DiseasePredictionGUI:
             label.configure(text="")
     
     def update_disease_info(self, disease):
-        if self.descriptions is not None:
-            description = self.descriptions[
-                self.descriptions['Disease'] == disease]['Description'].values
-            if len(description) > 0:
-                self.description_label.configure(text=description[0])
-            else:
-                self.description_label.configure(text="No description available")
-        
-        if self.precautions is not None:
-            precaution_row = self.precautions[self.precautions['Disease'] == disease]
-            if not precaution_row.empty:
-                for i, label in enumerate(self.precautions_labels):
-                    precaution = precaution_row[f'Precaution_{i+1}'].values[0]
-                    label.configure(text=f"{i+1}. {precaution}")
+        self.show_disease_info(*self.predictor.get_disease_info(disease))
+    
+    def show_disease_info(self, description, precautions):
+        self.description_label.configure(text=description or "No description available")
+        
+        for i, label in enumerate(self.precautions_labels):
+            if i < len(precautions):
+                label.configure(text=f"{i+1}. {precautions[i]}")
             else:
-                for label in self.precautions_labels:
-                    label.configure(text="")
+                label.configure(text="")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Disease Prediction System GUI")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="print import and load timings once the model is ready")
+    args = parser.parse_args()
+    
     root = ctk.CTk()
-    app = DiseasePredictionGUI(root)
+    app = DiseasePredictionGUI(root, startup_profile=args.startup_profile)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Disease Knowledge Base
+----------------------
+Loads symptom_Description.csv and symptom_precaution.csv once into an
+immutable dictionary keyed by disease name, so descriptions and precautions
+are O(1) lookups instead of DataFrame scans. One instance per file pair is
+shared by the backend and the GUI, and replaced when either file changes.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+import pandas as pd
+
+DiseaseInfo = namedtuple('DiseaseInfo', ['description', 'precautions'])
+EMPTY_INFO = DiseaseInfo('', ())
+
+def _precaution_columns(columns):
+    numbered = [c for c in columns if c.startswith('Precaution_') and c[11:].isdigit()]
+    return sorted(numbered, key=lambda c: int(c[11:]))
+
+class DiseaseKnowledgeBase:
+    def __init__(self, entries):
+        self._entries = MappingProxyType(dict(entries))
+    
+    @classmethod
+    def from_csv(cls, description_path='symptom_Description.csv',
+                 precaution_path='symptom_precaution.csv'):
+        descriptions = pd.read_csv(description_path)
+        precautions = pd.read_csv(precaution_path)
+        
+        # First row wins for duplicated diseases, as the old scans did
+        description_map = {}
+        for disease, description in zip(descriptions['Disease'], descriptions['Description']):
+            if disease not in description_map:
+                description_map[disease] = '' if pd.isna(description) else str(description)
+        
+        columns = _precaution_columns(precautions.columns)
+        precaution_map = {}
+        for row in precautions[['Disease'] + columns].itertuples(index=False):
+            disease = row[0]
+            if disease not in precaution_map:
+                precaution_map[disease] = tuple(
+                    str(value) for value in row[1:] if not pd.isna(value))
+        
+        entries = {
+            disease: DiseaseInfo(description_map.get(disease, ''),
+                                 precaution_map.get(disease, ()))
+            for disease in {**description_map, **precaution_map}
+        }
+        return cls(entries)
+    
+    def __contains__(self, disease):
+        return disease in self._entries
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def diseases(self):
+        return list(self._entries)
+    
+    def get(self, disease):
+        return self._entries.get(disease, EMPTY_INFO)
+    
+    def get_many(self, diseases):
+        entries = self._entries
+        return [entries.get(disease, EMPTY_INFO) for disease in diseases]
+
+# (absolute paths) -> (file signature, knowledge base)
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _file_signature(paths):
+    return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+
+def load_knowledge_base(description_path='symptom_Description.csv',
+                        precaution_path='symptom_precaution.csv'):
+    """The shared knowledge base for a file pair, read again once either file changes."""
+    key = (os.path.abspath(description_path), os.path.abspath(precaution_path))
+    # Taken before reading, so an edit made during the read is picked up next time
+    signature = _file_signature(key)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is None or cached[0] != signature:
+            cached = _cache[key] = (signature, DiseaseKnowledgeBase.from_csv(*key))
+        return cached[1]
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
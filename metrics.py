@@ -0,0 +1,274 @@
+"""
+Metrics
+-------
+In-process registry of counters, latency histograms and gauges for the
+prediction hot paths, exported as Prometheus text or as a JSON snapshot
+(on demand or periodically to a file).
+
+Recording is off until ``REGISTRY.enable()`` and can be switched at any
+time. Instrumented code takes ``started = REGISTRY.clock()`` before a stage
+and calls ``histogram.observe_since(started)`` after it; while disabled the
+clock returns 0 and both calls return at once, so an idle stage costs two
+method calls. Gauges are callbacks evaluated only at export time.
+
+Each process has its own registry. merge_snapshots() combines the JSON
+snapshots of several processes, which is how a pre-fork server reports one
+set of metrics for all of its workers.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, from a compiled-forest row (~50us) to a slow batch
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class Counter:
+    def __init__(self, registry, labels):
+        self._registry = registry
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+    
+    def sample(self):
+        return {'labels': self.labels, 'value': self.value}
+
+class Histogram:
+    def __init__(self, registry, labels, buckets=DEFAULT_BUCKETS):
+        self._registry = registry
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bound plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value):
+        if not self._registry.enabled:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+    
+    def observe_since(self, started):
+        # started is 0 when the clock was read while recording was off
+        if started:
+            self.observe(time.perf_counter() - started)
+    
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated within its bucket."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+    
+    def sample(self):
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.sum
+        return {'labels': self.labels, 'count': count, 'sum': total,
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], counts)),
+                'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+class Gauge:
+    def __init__(self, registry, labels, function):
+        self.labels = labels
+        self.function = function
+    
+    def sample(self):
+        try:
+            value = self.function()
+        except Exception as e:
+            print(f"Error reading gauge: {str(e)}")
+            value = None
+        return {'labels': self.labels, 'value': value}
+
+class MetricsRegistry:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        # name -> (type, help, {label items: metric})
+        self._families = {}
+        self._lock = threading.Lock()
+        self._dump_stop = threading.Event()
+    
+    def enable(self):
+        self.enabled = True
+    
+    def disable(self):
+        self.enabled = False
+    
+    def clock(self):
+        return time.perf_counter() if self.enabled else 0.0
+    
+    def _get(self, kind, name, help, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help, {}))
+            if family[0] != kind:
+                raise ValueError(f"Metric {name!r} is already registered as a {family[0]}")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = factory(dict(key))
+            return metric
+    
+    def counter(self, name, help, **labels):
+        return self._get('counter', name, help, labels, lambda l: Counter(self, l))
+    
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS, **labels):
+        return self._get('histogram', name, help, labels, lambda l: Histogram(self, l, buckets))
+    
+    def gauge(self, name, help, function, **labels):
+        """Register ``function`` as the gauge's value, replacing any earlier one."""
+        gauge = self._get('gauge', name, help, labels, lambda l: Gauge(self, l, function))
+        gauge.function = function
+        return gauge
+    
+    def collect(self):
+        """{name: {'type', 'help', 'samples'}} for every registered metric."""
+        with self._lock:
+            families = {name: (kind, help, list(metrics.values()))
+                        for name, (kind, help, metrics) in self._families.items()}
+        collected = {}
+        for name, (kind, help, metrics) in sorted(families.items()):
+            samples = [metric.sample() for metric in metrics]
+            collected[name] = {'type': kind, 'help': help,
+                               'samples': [s for s in samples if s.get('value', 0) is not None]}
+        return collected
+    
+    def to_prometheus(self):
+        """The registry in the Prometheus text exposition format."""
+        return format_prometheus(self.collect())
+    
+    def to_dict(self):
+        return {'timestamp': time.time(), 'pid': os.getpid(), 'enabled': self.enabled,
+                'metrics': self.collect()}
+    
+    def dump_json(self, path):
+        """Write a JSON snapshot to ``path`` ('{pid}' is replaced by the process id)."""
+        path = path.format(pid=os.getpid())
+        # Written aside and renamed, so readers never see a partial file
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(path + '.tmp', path)
+    
+    def dump_periodically(self, path, interval=10.0):
+        """Dump a JSON snapshot every ``interval`` seconds until stop_dumps()."""
+        self._dump_stop.clear()
+        
+        def dump():
+            while not self._dump_stop.wait(interval):
+                try:
+                    self.dump_json(path)
+                except Exception as e:
+                    print(f"Error writing metrics to {path}: {str(e)}")
+        
+        thread = threading.Thread(target=dump, name='metrics-dump', daemon=True)
+        thread.start()
+        return thread
+    
+    def stop_dumps(self):
+        self._dump_stop.set()
+
+def format_prometheus(collected):
+    """A collect() or merge_snapshots() result in the Prometheus text format."""
+    lines = []
+    for name, family in collected.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample in family['samples']:
+            labels = sample['labels']
+            if family['type'] != 'histogram':
+                lines.append(f"{name}{_labels(labels)} {_number(sample['value'])}")
+                continue
+            cumulative = 0
+            for bound, count in sample['buckets'].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(sample['sum'])}")
+            lines.append(f"{name}_count{_labels(labels)} {sample['count']}")
+    return '\n'.join(lines) + '\n'
+
+def load_snapshots(directory):
+    """Every JSON snapshot (as written by dump_json) in ``directory``."""
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except FileNotFoundError:
+            # Removed after its process exited
+            continue
+        except (OSError, ValueError) as e:
+            print(f"Error reading metrics from {name}: {str(e)}")
+    return snapshots
+
+def merge_snapshots(snapshots):
+    """Combine snapshots from several processes into one collect() result.
+    
+    Counters and histograms are summed per label set. Gauges such as a hit
+    rate do not add up, so each process keeps its own sample under a pid label.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for name, family in snapshot['metrics'].items():
+            kind = family['type']
+            samples = merged.setdefault(name, (kind, family['help'], {}))[2]
+            for sample in family['samples']:
+                labels = sample['labels']
+                if kind == 'gauge':
+                    labels = dict(labels, pid=snapshot['pid'])
+                key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+                total = samples.get(key)
+                if total is None:
+                    total = samples[key] = {'labels': labels}
+                    if kind == 'histogram':
+                        total.update(count=0, sum=0.0, buckets=dict.fromkeys(sample['buckets'], 0))
+                    else:
+                        total['value'] = 0
+                if kind == 'histogram':
+                    total['count'] += sample['count']
+                    total['sum'] += sample['sum']
+                    for bound, count in sample['buckets'].items():
+                        total['buckets'][bound] = total['buckets'].get(bound, 0) + count
+                else:
+                    total['value'] += sample['value']
+    return {name: {'type': kind, 'help': help, 'samples': list(samples.values())}
+            for name, (kind, help, samples) in sorted(merged.items())}
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Shared by every instrumented module in the process
+REGISTRY = MetricsRegistry()
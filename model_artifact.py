@@ -0,0 +1,209 @@
+"""
+Versioned Model Artifact
+------------------------
+Exports a trained model as a directory of flat .npy arrays (the compiled
+forest nodes, label classes and symptom list) plus a manifest holding the
+schema version and a SHA-256 checksum per file. Loading memory-maps the
+arrays, so startup skips unpickling and worker processes share the pages.
+
+Every export goes into a new version subdirectory and is published by
+atomically replacing the manifest, so arrays that running processes have
+memory-mapped are never overwritten. The previous version is kept for
+processes still reading it; older ones are removed.
+
+The manifest also records the pickle the artifact was exported from (its
+SHA-256, size and mtime). When loading is given that pickle's path and the
+pickle has since changed, the artifact is rejected as stale.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from forest_engine import CompiledForest
+
+ARTIFACT_DIR = 'disease_model'
+MANIFEST = 'manifest.json'
+SCHEMA_VERSION = 1
+
+# Node arrays of CompiledForest, stored under the same names
+_FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+class ArtifactError(Exception):
+    pass
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def new_version_dir(directory):
+    """Create a fresh, uniquely named subdirectory of directory for one export."""
+    os.makedirs(directory, exist_ok=True)
+    path = tempfile.mkdtemp(prefix=time.strftime('v%Y%m%d-%H%M%S-'), dir=directory)
+    # mkdtemp makes it private; other service users need to read the export
+    os.chmod(path, 0o755)
+    return path
+
+def publish(directory, manifest, name=MANIFEST):
+    """Atomically make manifest (naming its 'version' subdirectory) the current one.
+    
+    Keeps the version it replaces and removes every other one. Top-level .npy
+    files are the layout from before versioned exports.
+    """
+    path = os.path.join(directory, name)
+    try:
+        with open(path) as f:
+            previous = json.load(f).get('version', '')
+    except (FileNotFoundError, ValueError):
+        previous = None
+    
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    
+    keep = {manifest['version'], previous}
+    for entry in os.listdir(directory):
+        entry_path = os.path.join(directory, entry)
+        if os.path.isdir(entry_path) and entry.startswith('v') and entry not in keep:
+            shutil.rmtree(entry_path, ignore_errors=True)
+        elif entry.endswith('.npy') and '' not in keep:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # Still mapped on platforms that lock open files; the next export retries
+                pass
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def export_artifact(model_data, directory=ARTIFACT_DIR, *, source_sha256, source_path=None):
+    """Write model_data ({'model', 'label_encoder', 'symptoms'}) as an artifact.
+    
+    source_sha256 is the checksum of the pickle holding the same model; pass
+    source_path as well so loads can tell when that pickle is replaced.
+    """
+    if not source_sha256:
+        raise ValueError("export_artifact needs the source pickle's sha256")
+    forest = CompiledForest.from_sklearn(model_data['model'])
+    arrays = {name: getattr(forest, name) for name in _FOREST_ARRAYS}
+    arrays['feature'] = arrays['feature'].astype(np.int64)
+    arrays['left'] = arrays['left'].astype(np.int64)
+    arrays['right'] = arrays['right'].astype(np.int64)
+    arrays['roots'] = arrays['roots'].astype(np.int64)
+    arrays['model_classes'] = np.asarray(forest.classes_, dtype=np.int64)
+    arrays['label_classes'] = np.asarray(model_data['label_encoder'].classes_, dtype=str)
+    arrays['symptoms'] = np.asarray(model_data['symptoms'], dtype=str)
+    
+    version_dir = new_version_dir(directory)
+    entries = {}
+    for name, array in arrays.items():
+        path = os.path.join(version_dir, f'{name}.npy')
+        np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+        entries[name] = {
+            'file': f'{name}.npy',
+            'sha256': _sha256(path),
+            'dtype': str(array.dtype),
+            'shape': list(array.shape)
+        }
+    
+    manifest = {
+        'schema_version': SCHEMA_VERSION,
+        'format': 'compiled-forest',
+        'version': os.path.basename(version_dir),
+        'source_sha256': source_sha256,
+        'source': _source_stat(source_path) if source_path else None,
+        'n_features': forest.n_features_in_,
+        'n_estimators': forest.n_estimators,
+        'max_depth': forest.max_depth,
+        'arrays': entries
+    }
+    # Manifest goes last so a half-written export never looks valid
+    publish(directory, manifest)
+    return manifest
+
+def check_source(manifest, source_path):
+    """Raise ArtifactError unless source_path is the pickle the artifact came from.
+    
+    A missing pickle is accepted, so an artifact can be deployed on its own.
+    The pickle is only hashed when its size or mtime differ from the export's.
+    """
+    if not manifest.get('source_sha256'):
+        raise ArtifactError("Artifact does not record its source model")
+    try:
+        current = _source_stat(source_path)
+    except FileNotFoundError:
+        return
+    if current == manifest.get('source'):
+        return
+    if _sha256(source_path) != manifest['source_sha256']:
+        raise ArtifactError(f"Artifact is stale: '{source_path}' has changed since the export")
+
+def load_artifact(directory=ARTIFACT_DIR, mmap=True, verify=True, source_path=None):
+    """Load an exported artifact.
+    
+    Returns a dict with 'forest' (CompiledForest), 'classes' (disease name per
+    label index), 'symptoms' and 'manifest'. Raises FileNotFoundError when no
+    artifact exists and ArtifactError when it is stale (see check_source),
+    corrupt or from an unsupported schema version.
+    """
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    
+    if manifest.get('schema_version') != SCHEMA_VERSION:
+        raise ArtifactError(
+            f"Unsupported artifact schema {manifest.get('schema_version')!r}, "
+            f"expected {SCHEMA_VERSION}")
+    if source_path is not None:
+        check_source(manifest, source_path)
+    
+    version_dir = os.path.join(directory, manifest.get('version', ''))
+    arrays = {}
+    for name, entry in manifest['arrays'].items():
+        path = os.path.join(version_dir, entry['file'])
+        if verify and _sha256(path) != entry['sha256']:
+            raise ArtifactError(f"Checksum mismatch for {entry['file']}")
+        array = np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        if list(array.shape) != entry['shape'] or str(array.dtype) != entry['dtype']:
+            raise ArtifactError(f"Unexpected layout for {entry['file']}")
+        arrays[name] = array
+    
+    missing = set(_FOREST_ARRAYS + ('model_classes', 'label_classes', 'symptoms')) - set(arrays)
+    if missing:
+        raise ArtifactError(f"Artifact is missing arrays: {sorted(missing)}")
+    
+    forest = CompiledForest(
+        feature=arrays['feature'],
+        threshold=arrays['threshold'],
+        left=arrays['left'],
+        right=arrays['right'],
+        value=arrays['value'],
+        roots=arrays['roots'],
+        classes=arrays['model_classes'],
+        n_features=manifest['n_features'],
+        max_depth=manifest['max_depth']
+    )
+    return {
+        'forest': forest,
+        'classes': arrays['label_classes'],
+        'symptoms': arrays['symptoms'].tolist(),
+        'manifest': manifest
+    }
+
+if __name__ == "__main__":
+    # Export an artifact next to an existing pickled model
+    with open('disease_model.pkl', 'rb') as f:
+        raw = f.read()
+    manifest = export_artifact(pickle.loads(raw), source_sha256=hashlib.sha256(raw).hexdigest(),
+                               source_path='disease_model.pkl')
+    print(f"Exported {manifest['n_estimators']} trees to '{ARTIFACT_DIR}'")
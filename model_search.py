@@ -0,0 +1,239 @@
+"""
+Model Search
+------------
+Cross-validated search over forest sizes and depths. The dataset is
+featurized once and cached under feature_cache/ (keyed by the dataset and
+severity file contents), then every (configuration, fold) pair is fitted on
+a process pool. Each configuration is scored on held-out accuracy, the
+median single-row latency of the compiled forest the service runs, and the
+size of its exported artifact.
+
+The configurations that no other configuration beats on all three are the
+Pareto front. Latencies measured in the pool compete with the other fits,
+so the front is re-timed one configuration at a time before it is final.
+From that front the smallest artifact, then the fastest, that meets
+--min-accuracy is chosen; with --save it is refitted on all rows and saved
+through the same contract as train_model.
+    
+    python model_search.py --trees 25,50,100,300 --depths 6,8,12 --min-accuracy 0.95 --save
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import LabelEncoder
+
+from forest_engine import CompiledForest
+from model_artifact import ARTIFACT_DIR, export_artifact
+from train_model import build_model, load_training_data, save_model
+from vocabulary import SymptomVocabulary
+
+CACHE_DIR = 'feature_cache'
+
+# Set in each pool process by _init_worker
+_X = None
+_y = None
+
+def _file_digest(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def load_features(dataset_path='dataset.csv', severity_path='Symptom-severity.csv',
+                  cache_dir=CACHE_DIR):
+    """(path to cached features, symptoms, label encoder), featurizing on a cache miss."""
+    key = _file_digest(dataset_path, severity_path)
+    path = os.path.join(cache_dir, f'{key}.npz')
+    meta_path = os.path.join(cache_dir, f'{key}.json')
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        print(f"Using cached features '{path}'")
+    else:
+        started = time.perf_counter()
+        symptoms = pd.read_csv(severity_path)['Symptom'].unique().tolist()
+        X, y, le = load_training_data(SymptomVocabulary(symptoms), dataset_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        sparse.save_npz(path + '.tmp.npz', X)
+        np.save(os.path.join(cache_dir, f'{key}.labels.npy'), y)
+        os.replace(path + '.tmp.npz', path)
+        meta = {'symptoms': symptoms, 'classes': le.classes_.tolist()}
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        print(f"Featurized {X.shape[0]} rows in {time.perf_counter() - started:.1f}s, "
+              f"cached as '{path}'")
+    
+    le = LabelEncoder()
+    le.classes_ = np.array(meta['classes'], dtype=object)
+    return path, meta['symptoms'], le
+
+def _read_cache(path):
+    X = sparse.load_npz(path).tocsr()
+    y = np.load(path[:-len('.npz')] + '.labels.npy')
+    return X, y
+
+def _init_worker(path):
+    global _X, _y
+    _X, _y = _read_cache(path)
+
+def single_row_latencies(model, X, rows=200):
+    """Seconds per single-row predict_proba of the compiled forest for up to ``rows`` rows."""
+    engine = CompiledForest.from_sklearn(model)
+    timings = []
+    for row in X[:rows].toarray() if hasattr(X, 'toarray') else np.asarray(X[:rows]):
+        started = time.perf_counter()
+        engine.predict_proba(row[None, :])
+        timings.append(time.perf_counter() - started)
+    return np.array(timings)
+
+def artifact_size(model):
+    """Bytes of the exported artifact for a fitted forest."""
+    with tempfile.TemporaryDirectory() as directory:
+        # Only the forest arrays matter here; the label encoder is a stand-in
+        le = LabelEncoder()
+        le.classes_ = np.arange(len(model.classes_))
+        export_artifact({'model': model, 'label_encoder': le,
+                         'symptoms': [str(i) for i in range(model.n_features_in_)]}, directory,
+                        source_sha256='0' * 64)
+        # Exports live in a version subdirectory next to the manifest
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(directory) for name in names)
+
+def _measure(model, X_test, latency_rows=200):
+    """Median seconds per single-row prediction and artifact bytes for a fitted model."""
+    timings = single_row_latencies(model, X_test, latency_rows)
+    return float(np.median(timings)) if len(timings) else 0.0, artifact_size(model)
+
+def _evaluate(n_estimators, max_depth, train_idx, test_idx):
+    model = build_model(n_estimators=n_estimators, max_depth=max_depth, n_jobs=1)
+    started = time.perf_counter()
+    model.fit(_X[train_idx], _y[train_idx])
+    fit_s = time.perf_counter() - started
+    accuracy = float((model.predict(_X[test_idx]) == _y[test_idx]).mean())
+    latency, size = _measure(model, _X[test_idx])
+    return {'accuracy': accuracy, 'latency_s': latency, 'size_bytes': size, 'fit_s': fit_s}
+
+def pareto_front(results):
+    """Results not dominated on (higher accuracy, lower latency, lower size)."""
+    def dominates(a, b):
+        no_worse = (a['accuracy'] >= b['accuracy'] and a['latency_s'] <= b['latency_s']
+                    and a['size_bytes'] <= b['size_bytes'])
+        better = (a['accuracy'] > b['accuracy'] or a['latency_s'] < b['latency_s']
+                  or a['size_bytes'] < b['size_bytes'])
+        return no_worse and better
+    return [r for r in results if not any(dominates(other, r) for other in results)]
+
+def choose(front, min_accuracy):
+    """Smallest, then fastest, front member meeting the accuracy bar (else the most accurate)."""
+    eligible = [r for r in front if r['accuracy'] >= min_accuracy]
+    if not eligible:
+        print(f"No configuration reaches accuracy {min_accuracy:.3f}; taking the most accurate")
+        return max(front, key=lambda r: (r['accuracy'], -r['size_bytes']))
+    return min(eligible, key=lambda r: (r['size_bytes'], r['latency_s'], -r['accuracy']))
+
+def model_search(trees=(25, 50, 100, 300), depths=(6, 8, 12), folds=5, min_accuracy=0.0,
+                 workers=None, dataset_path='dataset.csv', severity_path='Symptom-severity.csv',
+                 save=False, model_path='disease_model.pkl', artifact_dir=ARTIFACT_DIR,
+                 report_path='model_search.json'):
+    path, symptoms, le = load_features(dataset_path, severity_path)
+    X, y = _read_cache(path)
+    
+    # Stratified folds need every class at least `folds` times
+    folds = max(2, min(folds, int(np.bincount(y).min())))
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y))
+    configs = list(product(trees, depths))
+    
+    scores = {config: [] for config in configs}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(path,)) as pool:
+        futures = {pool.submit(_evaluate, n, d, train_idx, test_idx): (n, d)
+                   for (n, d), (train_idx, test_idx) in product(configs, splits)}
+        for future in as_completed(futures):
+            scores[futures[future]].append(future.result())
+    print(f"Evaluated {len(configs)} configurations x {folds} folds "
+          f"in {time.perf_counter() - started:.1f}s")
+    
+    results = []
+    for (n_estimators, max_depth), runs in scores.items():
+        accuracies = [run['accuracy'] for run in runs]
+        results.append({
+            'n_estimators': n_estimators,
+            'max_depth': max_depth,
+            'accuracy': float(np.mean(accuracies)),
+            'accuracy_std': float(np.std(accuracies)),
+            'latency_s': float(np.median([run['latency_s'] for run in runs])),
+            'size_bytes': int(np.median([run['size_bytes'] for run in runs])),
+            'fit_s': float(np.mean([run['fit_s'] for run in runs]))
+        })
+    
+    # Pool timings ran alongside other fits; time the front again on a quiet process
+    train_idx, test_idx = splits[0]
+    for r in pareto_front(results):
+        model = build_model(n_estimators=r['n_estimators'], max_depth=r['max_depth'])
+        model.fit(X[train_idx], y[train_idx])
+        r['latency_s'], _ = _measure(model, X[test_idx])
+        r['retimed'] = True
+    front = pareto_front(results)
+    best = choose(front, min_accuracy)
+    
+    print(f"{'trees':>6} {'depth':>6} {'accuracy':>14} {'latency ms':>11} {'size KB':>9}")
+    for r in sorted(results, key=lambda r: (r['n_estimators'], r['max_depth'] or float('inf'))):
+        marker = ' *' if r is best else ' +' if r in front else ''
+        print(f"{r['n_estimators']:>6} {str(r['max_depth']):>6} "
+              f"{r['accuracy']:>8.4f}±{r['accuracy_std']:.3f} {r['latency_s'] * 1000:>11.3f} "
+              f"{r['size_bytes'] / 1024:>9.0f}{marker}")
+    print("(+ Pareto front, * chosen)")
+    
+    with open(report_path, 'w') as f:
+        json.dump({'folds': folds, 'min_accuracy': min_accuracy, 'results': results,
+                   'pareto_front': front, 'chosen': best}, f, indent=2)
+    
+    if save:
+        model = build_model(n_estimators=best['n_estimators'], max_depth=best['max_depth'])
+        model.fit(X, y)
+        save_model({'model': model, 'label_encoder': le, 'symptoms': symptoms},
+                   model_path, artifact_dir)
+        print(f"Saved {best['n_estimators']} trees, depth {best['max_depth']} "
+              f"as '{model_path}' and '{artifact_dir}/'")
+    return best
+
+def _depth(text):
+    return None if text.lower() == 'none' else int(text)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated forest size/depth search")
+    parser.add_argument('--trees', default='25,50,100,300',
+                        help='comma-separated forest sizes')
+    parser.add_argument('--depths', default='6,8,12',
+                        help="comma-separated max depths ('none' for unlimited)")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--min-accuracy', type=float, default=0.0,
+                        help='held-out accuracy the saved model must reach')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes fitting folds (default: one per CPU)')
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--severity', default='Symptom-severity.csv')
+    parser.add_argument('--report', default='model_search.json')
+    parser.add_argument('--save', action='store_true',
+                        help='replace disease_model.pkl and its artifact with the chosen model')
+    args = parser.parse_args()
+    
+    model_search(trees=[int(t) for t in args.trees.split(',')],
+                 depths=[_depth(d) for d in args.depths.split(',')],
+                 folds=args.folds, min_accuracy=args.min_accuracy, workers=args.workers,
+                 dataset_path=args.dataset, severity_path=args.severity,
+                 save=args.save, report_path=args.report)
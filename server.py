@@ -0,0 +1,595 @@
+"""
+Prediction Service
+------------------
+JSON-over-HTTP front end for DiseasePredictor built on asyncio streams.
+Concurrent /predict requests are collected by a MicroBatcher for up to a
+short window (or until a batch is full) and scored with one predict_many
+call on a dedicated thread; every caller then gets its own slice of the
+result. Database reads and writes run in the default executor so the event
+loop only ever parses, batches and serialises.
+
+With ``--workers N`` the parent loads the model and knowledge base once,
+binds the listening socket and forks N workers that accept from it, so the
+kernel spreads connections across them and every worker shares the parent's
+model pages. Crashed workers are restarted.
+
+With ``--watch`` every process reloads the model when its files change, and
+SIGHUP triggers a reload on demand (the pre-fork parent forwards it).
+
+``--metrics`` turns on the registry in metrics.py from the start, and
+POST /metrics switches it on or off at runtime. ``--metrics-json`` also
+writes each process's snapshot to a file periodically. Under ``--workers``
+each worker keeps a snapshot in a shared directory (refreshed every second)
+and GET /metrics sums them, while POST /metrics goes through the parent to
+every worker.
+    
+    POST /predict        {"symptoms": [...], "top_k": 3, "patient": {...}, "save": true}
+    GET  /disease?name=  description and precautions
+    GET  /history        ?limit=&cursor=&start=&end=&disease=&patient_name=&symptom=
+    GET  /health         model and batching statistics
+    GET  /metrics        Prometheus text exposition of the metrics of every worker
+    POST /metrics        {"enabled": true|false} switches recording in every worker
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from backend import DiseasePredictor
+from analytics import PredictionAnalytics
+from database import PREDICTION_COLUMNS, PatientDatabase
+from metrics import REGISTRY, format_prometheus, load_snapshots, merge_snapshots
+from vocabulary import UnknownSymptomError
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable'
+}
+
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+MAX_HEADER_BYTES = 1 << 16
+
+# How stale another worker's share of GET /metrics can be
+_WORKER_DUMP_INTERVAL = 1.0
+
+_BATCH_SIZE = REGISTRY.histogram('server_batch_size', 'Requests scored per predict_many call',
+                                 buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+_QUEUE_WAIT = REGISTRY.histogram('server_queue_wait_seconds',
+                                 'Time a request waited for its batch to be scored')
+_SCORE = REGISTRY.histogram('server_score_seconds', 'predict_many time per batch')
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class MicroBatcher:
+    """Coalesces concurrent predict requests into single predict_many calls.
+    
+    A batch opens with the first queued request and closes when ``max_batch``
+    requests are waiting, when ``window`` seconds have passed, or earlier if
+    waiting longer would push the oldest request past ``latency_budget``
+    given the recent scoring time per batch.
+    """
+    
+    def __init__(self, predictor, window=0.002, max_batch=64, latency_budget=0.05):
+        self.predictor = predictor
+        self.window = window
+        self.max_batch = max_batch
+        self.latency_budget = latency_budget
+        # One scoring thread: predict_many is CPU bound and batches are the parallelism
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='score')
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._score_time = 0.0
+        self.batches = 0
+        self.requests = 0
+        REGISTRY.gauge('server_queue_depth', 'Requests waiting to join a batch',
+                       lambda: self._queue.qsize())
+    
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+    
+    async def predict(self, symptoms, top_k=3):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time.perf_counter(), symptoms, top_k, future))
+        return await future
+    
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'score_time_ms': self._score_time * 1000
+        }
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Never hold a batch open longer than the budget leaves after scoring
+            wait = min(self.window, max(0.0, self.latency_budget - self._score_time))
+            deadline = batch[0][0] + wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Whatever arrived in the meantime rides along without further waiting
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            started = time.perf_counter()
+            try:
+                # Symptoms are checked per request against the model that scores
+                # the batch, so one request cannot fail the others
+                results = await loop.run_in_executor(
+                    self._executor, partial(self.predictor.predict_many, return_errors=True),
+                    [item[1] for item in batch], max(item[2] for item in batch))
+            except Exception as e:
+                for item in batch:
+                    if not item[3].done():
+                        item[3].set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+            _SCORE.observe(elapsed)
+            _BATCH_SIZE.observe(len(batch))
+            for item in batch:
+                _QUEUE_WAIT.observe(started - item[0])
+            # Moving average keeps the budget check responsive to model changes
+            self._score_time = elapsed if not self.batches else 0.8 * self._score_time + 0.2 * elapsed
+            self.batches += 1
+            self.requests += len(batch)
+            
+            for (_, _, top_k, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, UnknownSymptomError):
+                    future.set_exception(result)
+                    continue
+                if result is not None:
+                    result = dict(result, top_k=result['top_k'][:top_k])
+                future.set_result(result)
+
+class PredictionServer:
+    def __init__(self, predictor, window=0.002, max_batch=64, latency_budget=0.05,
+                 watch_interval=None, metrics_path=None, metrics_interval=10.0):
+        self.predictor = predictor
+        self.watch_interval = watch_interval
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        # Set by serve_prefork for its workers
+        self.metrics_dir = None
+        self.parent_pid = None
+        self.batcher = MicroBatcher(predictor, window=window, max_batch=max_batch,
+                                    latency_budget=latency_budget)
+        self._routes = {
+            ('POST', '/predict'): self.handle_predict,
+            ('GET', '/disease'): self.handle_disease,
+            ('GET', '/history'): self.handle_history,
+            ('GET', '/health'): self.handle_health,
+            ('GET', '/metrics'): self.handle_metrics,
+            ('POST', '/metrics'): self.handle_metrics_switch
+        }
+    
+    async def serve(self, host='127.0.0.1', port=8000, sock=None):
+        self.batcher.start()
+        # Started here so that each pre-fork worker runs its own watcher thread
+        if self.watch_interval:
+            self.predictor.watch_model(self.watch_interval)
+        if self.metrics_path:
+            REGISTRY.dump_periodically(self.metrics_path, self.metrics_interval)
+        if self.metrics_dir:
+            REGISTRY.dump_json(self._worker_metrics_path())
+            REGISTRY.dump_periodically(self._worker_metrics_path(), _WORKER_DUMP_INTERVAL)
+        if hasattr(signal, 'SIGHUP'):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP,
+                                                          self.predictor.reload_model)
+        if sock is None:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            print(f"Serving predictions on http://{host}:{port}")
+        else:
+            server = await asyncio.start_server(self._handle_connection, sock=sock)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            REGISTRY.stop_dumps()
+            await self.batcher.stop()
+    
+    async def handle_predict(self, query, body):
+        if self.predictor.vocabulary is None:
+            raise HTTPError(503, f"Model not loaded: {self.predictor.load_error}")
+        symptoms = body.get('symptoms')
+        if not isinstance(symptoms, list) or not symptoms \
+                or not all(isinstance(symptom, str) for symptom in symptoms):
+            raise HTTPError(400, "'symptoms' must be a non-empty list of strings")
+        top_k = body.get('top_k', 3)
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            raise HTTPError(400, "'top_k' must be a positive integer")
+        patient = body.get('patient') if body.get('save', True) else None
+        if patient is not None and (not isinstance(patient, dict) or not patient.get('name')):
+            raise HTTPError(400, "'patient' must be an object with a 'name'")
+        
+        try:
+            result = await self.batcher.predict(symptoms, top_k)
+        except UnknownSymptomError as e:
+            raise HTTPError(400, str(e))
+        if result is None:
+            raise HTTPError(500, "Prediction failed")
+        
+        if patient is not None:
+            # add_prediction blocks when the write-behind queue is full
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.predictor.save_prediction,
+                result['disease'], result['confidence'], symptoms, patient)
+        
+        return {
+            'disease': result['disease'],
+            'confidence': result['confidence'],
+            'top_k': [{'disease': d, 'probability': p} for d, p in result['top_k']],
+            'model_version': result['model_version']
+        }
+    
+    async def handle_disease(self, query, body):
+        name = _param(query, 'name')
+        if not name:
+            raise HTTPError(400, "Missing 'name' parameter")
+        description, precautions = self.predictor.get_disease_info(name)
+        return {'disease': name, 'description': description, 'precautions': precautions}
+    
+    async def handle_history(self, query, body):
+        try:
+            limit = min(int(_param(query, 'limit') or 50), 1000)
+        except ValueError:
+            raise HTTPError(400, "'limit' must be an integer")
+        cursor = _param(query, 'cursor')
+        if cursor is not None:
+            timestamp, _, row_id = cursor.rpartition('|')
+            if not timestamp or not row_id.isdigit():
+                raise HTTPError(400, "Malformed 'cursor'")
+            cursor = (timestamp, int(row_id))
+        filters = {name: _param(query, name)
+                   for name in ('start', 'end', 'disease', 'patient_name', 'symptom')}
+        
+        rows, next_cursor = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self.predictor.get_prediction_page(limit=limit, cursor=cursor, **filters))
+        return {
+            'predictions': [dict(zip(PREDICTION_COLUMNS, row)) for row in rows],
+            'next_cursor': f'{next_cursor[0]}|{next_cursor[1]}' if next_cursor else None
+        }
+    
+    async def handle_health(self, query, body):
+        predictor = self.predictor
+        return {
+            'status': 'ok' if predictor.load_error is None else 'error',
+            'load_error': predictor.load_error,
+            'model_sha256': predictor.model_sha256,
+            'model_version': predictor.model_version,
+            'symptoms': len(predictor.symptoms or ()),
+            'batching': self.batcher.stats()
+        }
+    
+    async def handle_metrics(self, query, body):
+        if not self.metrics_dir:
+            return REGISTRY.to_prometheus()
+        return await asyncio.get_running_loop().run_in_executor(None, self._merged_metrics)
+    
+    def _worker_metrics_path(self):
+        return os.path.join(self.metrics_dir, '{pid}.json')
+    
+    def _merged_metrics(self):
+        # This worker's snapshot is brought up to date; the others are at most
+        # one dump interval old
+        REGISTRY.dump_json(self._worker_metrics_path())
+        return format_prometheus(merge_snapshots(load_snapshots(self.metrics_dir)))
+    
+    async def handle_metrics_switch(self, query, body):
+        enabled = body.get('enabled')
+        if not isinstance(enabled, bool):
+            raise HTTPError(400, "'enabled' must be true or false")
+        if enabled:
+            REGISTRY.enable()
+        else:
+            REGISTRY.disable()
+        if self.parent_pid:
+            # The parent switches itself (for restarted workers) and every worker
+            os.kill(self.parent_pid, signal.SIGUSR1 if enabled else signal.SIGUSR2)
+        return {'enabled': REGISTRY.enabled}
+    
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self._dispatch(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            _write_response(writer, e.status, {'error': str(e)}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        handler = self._routes.get((method, url.path))
+        if handler is None:
+            allowed = [m for m, path in self._routes if path == url.path]
+            return (405, {'error': 'Method not allowed'}) if allowed \
+                else (404, {'error': 'Not found'})
+        
+        started = REGISTRY.clock()
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise HTTPError(400, 'Request body must be a JSON object')
+            status, response = 200, await handler(parse_qs(url.query), payload)
+        except json.JSONDecodeError as e:
+            status, response = 400, {'error': f"Invalid JSON: {str(e)}"}
+        except HTTPError as e:
+            status, response = e.status, {'error': str(e)}
+        except Exception as e:
+            print(f"Error handling {method} {url.path}: {str(e)}")
+            status, response = 500, {'error': str(e)}
+        if started:
+            REGISTRY.histogram('server_request_seconds', 'Handling time per request',
+                               route=url.path).observe_since(started)
+            REGISTRY.counter('server_requests_total', 'Requests by route and status',
+                             route=url.path, status=status).inc()
+        return status, response
+
+def serve_prefork(server, workers, host='127.0.0.1', port=8000, restart_delay=1.0):
+    """Run ``workers`` forked copies of server on one shared listening socket.
+    
+    The predictor should be built with lazy_db=True: each worker then opens
+    its own database connections and writer thread after the fork.
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("Pre-fork serving needs os.fork, which this platform lacks")
+    
+    # Migrations and analytics backfill run once here rather than racing in every worker
+    db = PatientDatabase(server.predictor.db_path)
+    PredictionAnalytics(db)
+    db.close()
+    
+    sock = socket.create_server((host, port), backlog=1024)
+    sock.setblocking(False)
+    server.metrics_dir = tempfile.mkdtemp(prefix='disease-metrics-')
+    server.parent_pid = os.getpid()
+    
+    # Move everything loaded so far out of the collector's reach, so the
+    # workers' collections never write to (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    
+    children = {}
+    stopping = False
+    
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            os._exit(_run_worker(server, sock))
+        children[pid] = time.monotonic()
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        _forward(children, signal.SIGTERM)
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: _forward(children, signum))
+    
+    def switch_metrics(signum, frame):
+        _switch_metrics(signum, frame)
+        _forward(children, signum)
+    
+    signal.signal(signal.SIGUSR1, switch_metrics)
+    signal.signal(signal.SIGUSR2, switch_metrics)
+    
+    for _ in range(workers):
+        spawn()
+    print(f"Serving predictions on http://{host}:{port} with {workers} workers")
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is not None:
+            # A dead worker's counts would otherwise be summed forever
+            _remove(os.path.join(server.metrics_dir, f'{pid}.json'))
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        # A worker that dies straight away would otherwise be respawned in a tight loop
+        if time.monotonic() - started < restart_delay:
+            time.sleep(restart_delay)
+        if not stopping:
+            spawn()
+    sock.close()
+    shutil.rmtree(server.metrics_dir, ignore_errors=True)
+
+def _forward(children, signum):
+    for pid in list(children):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+def _switch_metrics(signum, frame):
+    if signum == signal.SIGUSR1:
+        REGISTRY.enable()
+    else:
+        REGISTRY.disable()
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _run_worker(server, sock):
+    gc.unfreeze()
+    # The parent turns Ctrl+C into SIGTERM for every worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Switched by the parent rather than forwarded on to the parent's children
+    signal.signal(signal.SIGUSR1, _switch_metrics)
+    signal.signal(signal.SIGUSR2, _switch_metrics)
+    if hasattr(signal, 'SIGHUP'):
+        # Ignored until the worker's event loop installs its reload handler
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    
+    async def main():
+        task = asyncio.current_task()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        await server.serve(sock=sock)
+    
+    code = 0
+    try:
+        asyncio.run(main())
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        print(f"Error in worker {os.getpid()}: {str(e)}")
+        code = 1
+    finally:
+        server.predictor.close()
+    return code
+
+def _param(query, name):
+    values = query.get(name)
+    return values[0] if values else None
+
+async def _readline(reader, status, message):
+    # readline raises ValueError once a line outgrows the stream's buffer limit
+    try:
+        return await reader.readline()
+    except ValueError:
+        raise HTTPError(status, message)
+
+async def _read_request(reader):
+    line = await _readline(reader, 400, 'Request line too long')
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, 'Malformed request line')
+    
+    headers = {}
+    header_lines = header_bytes = 0
+    while True:
+        line = await _readline(reader, 431, 'Request headers too large')
+        if line in (b'\r\n', b'\n', b''):
+            break
+        header_lines += 1
+        header_bytes += len(line)
+        if header_lines > MAX_HEADERS or header_bytes > MAX_HEADER_BYTES:
+            raise HTTPError(431, 'Request headers too large')
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HTTPError(400, 'Invalid Content-Length')
+    if length > MAX_BODY:
+        raise HTTPError(413, 'Request body too large')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, headers, body
+
+def _write_response(writer, status, payload, keep_alive):
+    # Text payloads are the Prometheus exposition; everything else is JSON
+    if isinstance(payload, str):
+        body = payload.encode('utf-8')
+        content_type = 'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        body = json.dumps(payload).encode('utf-8')
+        content_type = 'application/json'
+    head = (f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    writer.write(head.encode('latin-1') + body)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Disease prediction HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--backend', default='compiled')
+    parser.add_argument('--window-ms', type=float, default=2.0,
+                        help='how long a batch waits for more requests')
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--latency-budget-ms', type=float, default=50.0,
+                        help='target upper bound on queueing plus scoring time')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of forked worker processes (1 serves in-process)')
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                        help='poll the model files and hot-reload them when they change')
+    parser.add_argument('--metrics', action='store_true',
+                        help='record metrics from start-up (POST /metrics switches it later)')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help="write a JSON metrics snapshot here periodically ('{pid}' is "
+                             "replaced by each worker's process id)")
+    parser.add_argument('--metrics-interval', type=float, default=10.0, metavar='SECONDS')
+    args = parser.parse_args()
+    
+    if args.metrics:
+        REGISTRY.enable()
+    
+    server = PredictionServer(DiseasePredictor(backend=args.backend, lazy_db=args.workers > 1),
+                              window=args.window_ms / 1000,
+                              max_batch=args.max_batch,
+                              latency_budget=args.latency_budget_ms / 1000,
+                              watch_interval=args.watch,
+                              metrics_path=args.metrics_json,
+                              metrics_interval=args.metrics_interval)
+    if args.workers > 1:
+        serve_prefork(server, args.workers, args.host, args.port)
+    else:
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
\ No newline at end of file
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from backend import DiseasePredictor
+from train_model import save_model
+
+DISEASES = ['Allergy', 'Common Cold', 'Influenza', 'Migraine']
+
+@pytest.fixture(scope='session')
+def training_data():
+    # Each disease follows from a few symptom columns, with some noise on top
+    rng = np.random.default_rng(0)
+    X = (rng.random((600, 20)) < 0.3).astype(np.uint8)
+    y = (X[:, 0] + 2 * X[:, 1] + X[:, 5] * (1 - X[:, 2])) % len(DISEASES)
+    flip = rng.random(len(y)) < 0.1
+    y[flip] = rng.integers(0, len(DISEASES), flip.sum())
+    return X, y
+
+@pytest.fixture(scope='session')
+def model_data(training_data):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, min_samples_leaf=2,
+                                   random_state=0).fit(X, y)
+    le = LabelEncoder().fit(DISEASES)
+    return {'model': model, 'label_encoder': le,
+            'symptoms': [f'symptom_{i}' for i in range(X.shape[1])]}
+
+def write_knowledge_base(directory, suffix=''):
+    pd.DataFrame({'Disease': DISEASES,
+                  'Description': [f'About {d}{suffix}' for d in DISEASES]}).to_csv(
+        directory / 'symptom_Description.csv', index=False)
+    pd.DataFrame({'Disease': DISEASES,
+                  **{f'Precaution_{i}': [f'{d} step {i}' for d in DISEASES] for i in (1, 2)}}).to_csv(
+        directory / 'symptom_precaution.csv', index=False)
+
+@pytest.fixture
+def project(tmp_path, monkeypatch, model_data):
+    """A working directory holding the model files and knowledge base, as the app expects."""
+    monkeypatch.chdir(tmp_path)
+    save_model(model_data)
+    write_knowledge_base(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def predictor(project):
+    predictor = DiseasePredictor(lazy_db=True)
+    yield predictor
+    predictor.close()
\ No newline at end of file
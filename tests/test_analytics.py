@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+
+from analytics import PredictionAnalytics
+from database import PatientDatabase
+
+SUMMARIES = ('daily_disease_counts', 'confidence_histogram', 'symptom_pair_counts')
+SYMPTOMS = ['fever', 'cough', 'headache', 'nausea', 'fatigue']
+
+def _add(db, n, rng):
+    for _ in range(n):
+        db.add_prediction(rng.choice(['Influenza', 'Migraine']), rng.random(),
+                          rng.sample(SYMPTOMS, 3), {'name': 'Ada'})
+
+def _summaries(db):
+    return [sorted(db.conn.execute(f'SELECT * FROM {table}')) for table in SUMMARIES]
+
+def test_rows_written_without_analytics_are_caught_up(tmp_path):
+    path = str(tmp_path / 'patients.db')
+    rng = random.Random(0)
+    db = PatientDatabase(path)
+    PredictionAnalytics(db)
+    _add(db, 40, rng)
+    db.close()
+    
+    # A bare PatientDatabase, as bulk tools and older clients open it
+    db = PatientDatabase(path)
+    _add(db, 60, rng)
+    db.close()
+    
+    db = PatientDatabase(path)
+    try:
+        analytics = PredictionAnalytics(db)
+        _add(db, 20, rng)
+        db.flush()
+        incremental = _summaries(db)
+        analytics.rebuild()
+        assert incremental == _summaries(db)
+        assert sum(row[2] for row in incremental[0]) == 120
+    finally:
+        db.close()
+
+def test_attach_while_writes_are_in_flight(tmp_path):
+    for round in range(10):
+        db = PatientDatabase(str(tmp_path / f'{round}.db'), flush_interval=0.001)
+        rng = random.Random(round)
+        stop = threading.Event()
+        added = []
+        
+        def keep_writing():
+            while not stop.is_set():
+                _add(db, 1, rng)
+                added.append(1)
+                time.sleep(0.0001)
+        
+        writer = threading.Thread(target=keep_writing)
+        writer.start()
+        try:
+            analytics = PredictionAnalytics(db)
+            _add(db, 20, rng)
+        finally:
+            stop.set()
+            writer.join()
+        try:
+            db.flush()
+            # No batch was dropped for lack of a high-water mark...
+            assert db.count_predictions() == len(added) + 20
+            incremental = _summaries(db)
+            # ...and every row is counted exactly once
+            analytics.rebuild()
+            assert incremental == _summaries(db)
+        finally:
+            db.close()
\ No newline at end of file
@@ -0,0 +1,46 @@
+from itertools import combinations
+
+import pytest
+
+from answer_table import AnswerTable, build_answer_table
+from backend import DiseasePredictor
+
+@pytest.fixture(params=['sklearn', 'compiled'])
+def predictors(project, request):
+    # One predictor answering from the model only, one from a table built for it
+    without_table = DiseasePredictor(backend=request.param, cache_size=0, lazy_db=True)
+    build_answer_table(max_size=2, top_n=3)
+    with_table = DiseasePredictor(backend=request.param, cache_size=0, lazy_db=True)
+    yield request.param, without_table, with_table
+    without_table.close()
+    with_table.close()
+
+def test_lookups_match_the_model(predictors):
+    backend, without_table, with_table = predictors
+    assert without_table.answer_table is None and with_table.answer_table is not None
+    symptoms = with_table.symptoms
+    sets = [[s] for s in symptoms] + [list(pair) for pair in combinations(symptoms, 2)]
+    
+    expected = without_table.predict_many(sets, top_k=3)
+    actual = with_table.predict_many(sets, top_k=3)
+    for want, got in zip(expected, actual):
+        assert [name for name, _ in got['top_k']] == [name for name, _ in want['top_k']]
+        if backend == 'sklearn':
+            # Stored at full precision: a table answer is the model's answer
+            assert got == want
+        else:
+            assert [p for _, p in got['top_k']] == \
+                pytest.approx([p for _, p in want['top_k']], abs=1e-12)
+
+def test_larger_sets_fall_back_to_the_model(predictors):
+    _, without_table, with_table = predictors
+    table = with_table.answer_table
+    assert table.lookup([0, 1, 2]) is None and table.lookup([]) is None
+    sets = [['symptom_0', 'symptom_1', 'symptom_2']]
+    assert with_table.predict_many(sets) == without_table.predict_many(sets)
+
+def test_table_for_another_model_is_ignored(project):
+    build_answer_table(max_size=1, top_n=2)
+    assert AnswerTable.load(model_sha256='0' * 64) is None
+    assert AnswerTable.load(symptoms=['other']) is None
+    assert AnswerTable.load() is not None
\ No newline at end of file
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from backend import BACKENDS, DiseasePredictor
+from vocabulary import UnknownSymptomError
+
+def _symptom_sets(model_data, training_data, n=60):
+    X, _ = training_data
+    names = np.asarray(model_data['symptoms'])
+    return [names[row.astype(bool)].tolist() for row in X[:n]]
+
+@pytest.fixture(params=BACKENDS)
+def any_predictor(project, request):
+    predictor = DiseasePredictor(backend=request.param, cache_size=0, lazy_db=True)
+    yield predictor
+    predictor.close()
+
+def test_predict_many_matches_predict_proba(any_predictor, model_data, training_data):
+    model, le = model_data['model'], model_data['label_encoder']
+    sets = [s for s in _symptom_sets(model_data, training_data) if s]
+    results = any_predictor.predict_many(sets, top_k=len(le.classes_))
+    
+    for symptoms, result in zip(sets, results):
+        x = np.isin(model_data['symptoms'], symptoms).astype(float)[None, :]
+        proba = model.predict_proba(x)[0]
+        # The old predict_disease: model.predict for the name, the max probability as confidence
+        assert result['disease'] == le.inverse_transform(model.predict(x))[0]
+        assert result['confidence'] == pytest.approx(proba.max(), abs=1e-12)
+        names = le.inverse_transform(model.classes_)
+        expected = sorted(zip(names, proba), key=lambda pair: -pair[1])
+        assert [p for _, p in result['top_k']] == pytest.approx([p for _, p in expected], abs=1e-12)
+        assert result['model_version'] == any_predictor.model_version
+
+def test_predict_disease_uses_the_batch_path(predictor, model_data, training_data):
+    symptoms = next(s for s in _symptom_sets(model_data, training_data) if s)
+    result = predictor.predict_many([symptoms], top_k=1)[0]
+    assert predictor.predict_disease(symptoms) == (result['disease'], result['confidence'])
+    assert predictor.predict_disease([]) == (None, None)
+
+def test_empty_sets_get_none(predictor):
+    results = predictor.predict_many([[], ['symptom_0'], []])
+    assert results[0] is None and results[2] is None
+    assert results[1]['disease'] in predictor.class_names
+
+def test_top_k_is_clamped_to_the_classes(predictor):
+    result = predictor.predict_many([['symptom_1']], top_k=50)[0]
+    assert len(result['top_k']) == len(predictor.class_names)
+    assert predictor.predict_many([['symptom_1']], top_k=0)[0]['top_k'][0][0] == result['disease']
+
+def test_unknown_symptom_raises(predictor):
+    with pytest.raises(UnknownSymptomError):
+        predictor.predict_many([['symptom_1'], ['no such symptom']])
+
+def test_unknown_symptom_can_be_returned_per_row(predictor):
+    results = predictor.predict_many([['symptom_1'], ['no such symptom'], []], return_errors=True)
+    assert results[0]['disease'] in predictor.class_names
+    assert isinstance(results[1], UnknownSymptomError)
+    assert results[2] is None
+
+def test_symptom_spelling_is_normalized(predictor):
+    assert predictor.predict_many([['Symptom 3', 'SYMPTOM_4']])[0] == \
+        predictor.predict_many([['symptom_3', 'symptom_4']])[0]
\ No newline at end of file
@@ -0,0 +1,25 @@
+from benchmark import best_of, compare
+
+def _report(**metrics):
+    return {'results': [{'benchmark': 'predictor', 'params': {'rows': 10}, 'metrics': metrics}]}
+
+def _flagged(current, baseline):
+    return {key[2]: gating for key, *_, gating in compare(current, baseline)}
+
+def test_small_absolute_changes_are_not_regressions():
+    baseline = _report(latency={'p50_ms': 0.10, 'mean_ms': 0.10}, load_s=0.02)
+    current = _report(latency={'p50_ms': 0.14, 'mean_ms': 0.20}, load_s=0.025)
+    # +40% of 0.1ms is timer noise; +0.1ms is not
+    assert _flagged(current, baseline) == {'latency.mean_ms': True}
+
+def test_tail_latency_is_reported_but_does_not_gate():
+    baseline = _report(latency={'p50_ms': 1.0, 'p99_ms': 2.0}, rows_per_s=1000.0)
+    current = _report(latency={'p50_ms': 1.0, 'p99_ms': 4.0}, rows_per_s=700.0)
+    assert _flagged(current, baseline) == {'latency.p99_ms': False, 'rows_per_s': True}
+
+def test_best_of_keeps_each_metrics_best_run():
+    runs = [_report(latency={'p50_ms': 2.0}, rows_per_s=900.0),
+            _report(latency={'p50_ms': 1.5}, rows_per_s=800.0)]
+    best = best_of(runs)
+    assert best['results'][0]['metrics'] == {'latency': {'p50_ms': 1.5}, 'rows_per_s': 900.0}
+    assert best['repeat'] == 2
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import bulk_score
+from bulk_score import _score_chunk, bulk_score as score_file
+
+def _write_input(path, n_rows, offset=0):
+    symptoms = [f'symptom_{(i + offset) % 20},symptom_{(i * 3 + offset) % 20}' for i in range(n_rows)]
+    pd.DataFrame({'Disease': 'unknown', 'Symptoms': symptoms}).to_csv(path, index=False)
+    return symptoms
+
+class Interrupted(Exception):
+    pass
+
+def _interrupt_after(monkeypatch, chunks):
+    # Scores the first few chunks, then fails the way a killed run would stop
+    calls = []
+    
+    def score(symptoms, top_k):
+        calls.append(len(symptoms))
+        if len(calls) > chunks:
+            raise Interrupted
+        return _score_chunk(symptoms, top_k)
+    monkeypatch.setattr(bulk_score, '_score_chunk', score)
+    return calls
+
+def test_scores_every_row_in_order(project, predictor):
+    symptoms = _write_input(project / 'in.csv', 25)
+    assert score_file('in.csv', 'out.csv', top_k=2, chunk_size=4, workers=1) == 25
+    
+    out = pd.read_csv('out.csv')
+    X = predictor.vocabulary.featurize(symptoms, packed=True)
+    diseases, probabilities = predictor.predict_matrix(X, top_k=2, packed=True)
+    assert out['Symptoms'].tolist() == symptoms
+    assert out['predicted_disease'].tolist() == diseases[:, 0].tolist()
+    assert out['probability_2'].tolist() == pytest.approx(probabilities[:, 1].tolist())
+    assert not os.path.exists('out.csv.checkpoint.json')
+
+def test_resume_continues_after_the_last_checkpoint(project, monkeypatch):
+    _write_input(project / 'in.csv', 25)
+    score_file('in.csv', 'expected.csv', chunk_size=4, workers=1)
+    
+    _interrupt_after(monkeypatch, 3)
+    with pytest.raises(Interrupted):
+        score_file('in.csv', 'out.csv', chunk_size=4, workers=1)
+    with open('out.csv.checkpoint.json') as f:
+        written = json.load(f)['rows']
+    assert 0 < written < 25
+    
+    calls = _interrupt_after(monkeypatch, 100)
+    assert score_file('in.csv', 'out.csv', chunk_size=4, workers=1, resume=True) == 25
+    # Only rows after the checkpoint are scored again
+    assert sum(calls) == 25 - written
+    with open('out.csv') as actual, open('expected.csv') as expected:
+        assert actual.read() == expected.read()
+
+def test_rewritten_input_starts_over(project, monkeypatch):
+    _write_input(project / 'in.csv', 25)
+    _interrupt_after(monkeypatch, 3)
+    with pytest.raises(Interrupted):
+        score_file('in.csv', 'out.csv', chunk_size=4, workers=1)
+    
+    # Same path, different rows: the checkpoint's offsets no longer apply
+    _write_input(project / 'in.csv', 25, offset=5)
+    stat = os.stat('in.csv')
+    os.utime('in.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    calls = _interrupt_after(monkeypatch, 100)
+    score_file('in.csv', 'out.csv', chunk_size=4, workers=1, resume=True)
+    assert sum(calls) == 25
+    
+    score_file('in.csv', 'expected.csv', chunk_size=4, workers=1)
+    with open('out.csv') as actual, open('expected.csv') as expected:
+        assert actual.read() == expected.read()
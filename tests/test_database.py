@@ -0,0 +1,209 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import PatientDatabase
+
+PATIENT = {'name': 'Ada', 'age': '36', 'gender': 'Female'}
+
+@pytest.fixture
+def db(tmp_path):
+    database = PatientDatabase(str(tmp_path / 'patients.db'), flush_interval=0.01)
+    yield database
+    database.close()
+
+def _add(db, n, disease='Influenza', patient=PATIENT):
+    for i in range(n):
+        db.add_prediction(disease, 0.5 + i % 5 / 10, ['fever', 'cough'], patient)
+
+def test_flush_commits_everything_queued(db):
+    _add(db, 600)
+    db.flush()
+    assert db.count_predictions() == 600
+
+def test_reads_do_not_wait_for_rows_added_after_them(db):
+    stop = threading.Event()
+    
+    def keep_writing():
+        while not stop.is_set():
+            _add(db, 1)
+    
+    writer = threading.Thread(target=keep_writing)
+    writer.start()
+    try:
+        time.sleep(0.1)
+        for i in range(3):
+            _add(db, 1, disease='Marker')
+            started = time.perf_counter()
+            rows, _ = db.get_predictions(limit=10)
+            assert time.perf_counter() - started < 2.0
+            # ...but everything queued before the read is in it
+            assert db.count_predictions(disease='Marker') == i + 1
+            assert len(rows) == 10
+    finally:
+        stop.set()
+        writer.join()
+
+def test_close_writes_pending_rows(tmp_path):
+    path = str(tmp_path / 'patients.db')
+    db = PatientDatabase(path, flush_interval=1.0)
+    _add(db, 50)
+    db.close()
+    reopened = sqlite3.connect(path)
+    assert reopened.execute('SELECT count(*) FROM predictions').fetchone()[0] == 50
+    reopened.close()
+
+def test_add_after_close_raises(db):
+    db.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        _add(db, 1)
+    # A second close is a no-op
+    db.close()
+
+def test_concurrent_add_and_close_never_hangs(tmp_path):
+    for round in range(20):
+        db = PatientDatabase(str(tmp_path / f'{round}.db'), flush_interval=0.001)
+        added = []
+        
+        def add():
+            try:
+                while True:
+                    _add(db, 1)
+                    added.append(1)
+            except sqlite3.ProgrammingError:
+                pass
+        
+        thread = threading.Thread(target=add)
+        thread.start()
+        db.close()
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+        
+        reopened = sqlite3.connect(db.path)
+        assert reopened.execute('SELECT count(*) FROM predictions').fetchone()[0] == len(added)
+        reopened.close()
+
+def test_failed_row_does_not_cost_the_batch(db):
+    def reject(conn, records):
+        if any(record[2] == 'Bad' for record in records):
+            raise ValueError('rejected')
+    
+    db.add_write_hook(reject)
+    _add(db, 5)
+    _add(db, 1, disease='Bad')
+    _add(db, 5)
+    db.flush()
+    assert db.count_predictions() == 10
+    assert db.count_predictions(disease='Bad') == 0
+
+def test_round_trip_columns(db):
+    db.add_prediction('Migraine', 0.75, ['headache', 'nausea', 'headache'], PATIENT)
+    row = db.get_all_predictions()[0]
+    assert row[2:] == ('Migraine', 0.75, 'headache,nausea', 'Ada', '36', 'Female')
+
+def _insert_at(db, timestamps):
+    # Explicit timestamps, so ties and ordering are under the test's control
+    for i, timestamp in enumerate(timestamps):
+        db._insert_prediction(db.conn, None, timestamp, 'Influenza' if i % 2 else 'Migraine',
+                              0.9, ['fever'], ('Ada', '36', 'Female'))
+    db.conn.commit()
+
+def _all_pages(db, limit, **filters):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = db.get_predictions(limit=limit, cursor=cursor, **filters)
+        rows.extend(page)
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+def test_keyset_pages_cover_every_row_once(db):
+    base = datetime(2026, 1, 1)
+    # Repeated timestamps force the id tie-breaker
+    _insert_at(db, [(base + timedelta(minutes=i // 3)).isoformat(' ') for i in range(95)])
+    rows, pages = _all_pages(db, limit=10)
+    assert pages == 10
+    assert [row[0] for row in rows] == [row[0] for row in db.get_all_predictions()]
+    assert len({row[0] for row in rows}) == 95
+
+def test_keyset_pages_with_filters(db):
+    base = datetime(2026, 1, 1)
+    _insert_at(db, [(base + timedelta(hours=i)).isoformat(' ') for i in range(48)])
+    rows, _ = _all_pages(db, limit=7, disease='Influenza', start=base + timedelta(hours=10),
+                         end=base + timedelta(hours=30))
+    assert all(row[2] == 'Influenza' for row in rows)
+    assert len(rows) == db.count_predictions(disease='Influenza',
+                                             start=base + timedelta(hours=10),
+                                             end=base + timedelta(hours=30)) == 10
+    timestamps = [row[1] for row in rows]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+def test_exact_page_has_no_cursor(db):
+    _insert_at(db, ['2026-01-01 00:00:00'] * 5)
+    rows, cursor = db.get_predictions(limit=5)
+    assert len(rows) == 5 and cursor is None
+
+def test_summary_helpers_match_the_rows(db):
+    rows = [('Influenza', 0.9, ['fever', 'cough']), ('Influenza', 0.7, ['fever']),
+            ('Migraine', 0.6, ['headache', 'nausea', 'fever'])]
+    for disease, confidence, symptoms in rows:
+        db.add_prediction(disease, confidence, symptoms, PATIENT)
+    
+    summary = db.disease_summary()
+    assert [(d, n) for d, n, _ in summary] == [('Influenza', 2), ('Migraine', 1)]
+    assert summary[0][2] == pytest.approx(0.8)
+    assert db.symptom_counts() == [('fever', 3), ('cough', 1), ('headache', 1), ('nausea', 1)]
+    assert db.symptom_counts(disease='Migraine', limit=2) == [('fever', 1), ('headache', 1)]
+    assert [d for d, _, _ in db.disease_summary(symptom='cough')] == ['Influenza']
+    assert db.count_predictions(symptom='fever', disease='Influenza') == 2
+
+def test_migrates_legacy_table(tmp_path):
+    path = str(tmp_path / 'patients.db')
+    legacy = sqlite3.connect(path)
+    legacy.execute('''
+        CREATE TABLE predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            disease TEXT,
+            confidence FLOAT,
+            symptoms TEXT,
+            patient_info TEXT
+        )
+    ''')
+    legacy.executemany('''
+        INSERT INTO predictions (timestamp, disease, confidence, symptoms, patient_info)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        ('2025-03-01 09:00:00', 'Influenza', 0.8, 'fever,cough', str(PATIENT)),
+        ('2025-03-02 10:00:00', 'Migraine', 0.6, 'headache', str({'name': 'Bob'})),
+        ('2025-03-03 11:00:00', 'Allergy', 0.7, '', 'not a dict'),
+        ('2025-03-04 12:00:00', 'Influenza', 0.9, 'cough,fever', str(PATIENT))
+    ])
+    legacy.commit()
+    legacy.close()
+    
+    db = PatientDatabase(path)
+    try:
+        rows = sorted(db.get_all_predictions())
+        assert [row[0] for row in rows] == [1, 2, 3, 4]
+        assert rows[0][1:] == ('2025-03-01 09:00:00', 'Influenza', 0.8, 'fever,cough',
+                               'Ada', '36', 'Female')
+        assert rows[1][5:] == ('Bob', '', '')
+        assert rows[2][4] is None and rows[2][5] == ''
+        assert rows[3][4] == 'cough,fever'
+        # Repeat patients share a row, and new rows carry on after the migrated ids
+        assert db.conn.execute('SELECT count(*) FROM patients').fetchone()[0] == 3
+        _add(db, 1)
+        db.flush()
+        assert max(row[0] for row in db.get_all_predictions()) == 5
+        assert db.count_predictions(symptom='fever') == 3
+    finally:
+        db.close()
+    
+    # Opening the migrated database again leaves it alone
+    db = PatientDatabase(path)
+    assert db.count_predictions() == 5
+    db.close()
\ No newline at end of file
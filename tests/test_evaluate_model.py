@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+
+from backend import DiseasePredictor
+from evaluate_model import NO_PREDICTION, StreamingMetrics, evaluate_model
+
+@pytest.fixture
+def labels():
+    rng = np.random.default_rng(0)
+    names = np.array(['Allergy', 'Common Cold', 'Influenza', 'Migraine', 'Typhoid'])
+    actual = names[rng.integers(0, 4, 1000)]
+    predicted = np.where(rng.random(1000) < 0.7, actual, names[rng.integers(0, 5, 1000)])
+    # 'Typhoid' is only ever predicted, never the true label
+    return actual, predicted
+
+def _streamed(actual, predicted, batch=128):
+    metrics = StreamingMetrics()
+    for start in range(0, len(actual), batch):
+        metrics.update(actual[start:start + batch], predicted[start:start + batch])
+    return metrics
+
+@pytest.mark.parametrize('average', ['macro', 'weighted'])
+def test_averages_match_sklearn(labels, average):
+    actual, predicted = labels
+    summary = _streamed(actual, predicted).summary()
+    expected = precision_recall_fscore_support(actual, predicted, average=average,
+                                               zero_division=0)
+    for name, value in zip(('precision', 'recall', 'f1'), expected[:3]):
+        assert summary[f'{average}_{name}'] == pytest.approx(value)
+    assert summary['accuracy'] == pytest.approx(accuracy_score(actual, predicted))
+    assert summary['rows'] == len(actual)
+
+def test_per_class_matches_sklearn(labels):
+    actual, predicted = labels
+    rows = {row['disease']: row for row in _streamed(actual, predicted).per_class()}
+    names = sorted(rows)
+    precision, recall, f1, support = precision_recall_fscore_support(
+        actual, predicted, labels=names, zero_division=0)
+    for i, name in enumerate(names):
+        assert rows[name]['precision'] == pytest.approx(precision[i])
+        assert rows[name]['recall'] == pytest.approx(recall[i])
+        assert rows[name]['f1'] == pytest.approx(f1[i])
+        assert rows[name]['support'] == support[i]
+
+def test_batching_does_not_change_counts(labels):
+    actual, predicted = labels
+    assert sorted(_streamed(actual, predicted, batch=7).confusion_rows()) == \
+        sorted(_streamed(actual, predicted, batch=1000).confusion_rows())
+@pytest.mark.parametrize('layout', ['symptoms', 'wide'])
+def test_evaluation_streams_both_layouts(project, model_data, training_data, layout):
+    X, y = training_data
+    names = np.array(model_data['symptoms'])
+    actual = model_data['label_encoder'].inverse_transform(y)
+    if layout == 'symptoms':
+        pd.DataFrame({'Disease': actual,
+                      'Symptoms': [','.join(names[row != 0]) for row in X]}).to_csv(
+            'holdout.csv', index=False)
+    else:
+        wide = pd.DataFrame(X, columns=names)
+        wide['prognosis'] = actual
+        wide.to_csv('holdout.csv', index=False)
+    
+    summary = evaluate_model('holdout.csv', 'evaluation', chunk_size=128)
+    # What the predictor gives for the whole matrix at once
+    predictor = DiseasePredictor(backend='sklearn', cache_size=0, lazy_db=True)
+    expected = predictor.predict_matrix(X, top_k=1)[0][:, 0]
+    predictor.close()
+    expected[pd.isna(expected)] = NO_PREDICTION
+    assert summary['rows'] == len(y)
+    assert summary['accuracy'] == pytest.approx(accuracy_score(actual, expected))
+    assert json.loads((project / 'evaluation' / 'metrics.json').read_text())['rows'] == len(y)
+    confusion = pd.read_csv(project / 'evaluation' / 'confusion.csv')
+    assert confusion['count'].sum() == len(y)
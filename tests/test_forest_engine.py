@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from forest_engine import CompiledForest
+
+@pytest.fixture(scope='module')
+def queries(training_data):
+    # Training rows plus unseen ones, including an empty symptom set
+    X, _ = training_data
+    rng = np.random.default_rng(1)
+    unseen = (rng.random((300, X.shape[1])) < 0.2).astype(np.uint8)
+    return np.vstack([X[:200], unseen, np.zeros((1, X.shape[1]), dtype=np.uint8)])
+
+def test_predict_proba_matches_sklearn(model_data, queries):
+    model = model_data['model']
+    forest = CompiledForest.from_sklearn(model)
+    np.testing.assert_allclose(forest.predict_proba(queries), model.predict_proba(queries),
+                               rtol=0, atol=1e-12)
+
+def test_packed_and_sparse_inputs_match_dense(model_data, queries):
+    forest = CompiledForest.from_sklearn(model_data['model'])
+    expected = forest.predict_proba(queries)
+    np.testing.assert_array_equal(
+        forest.predict_proba_packed(CompiledForest.pack(queries)), expected)
+    np.testing.assert_array_equal(forest.predict_proba(sparse.csr_matrix(queries)), expected)
+
+def test_predict_matches_sklearn(model_data, queries):
+    model = model_data['model']
+    forest = CompiledForest.from_sklearn(model)
+    np.testing.assert_array_equal(forest.predict(queries), model.predict(queries))
+
+def test_rejects_wrong_feature_count(model_data):
+    forest = CompiledForest.from_sklearn(model_data['model'])
+    with pytest.raises(ValueError):
+        forest.predict_proba(np.zeros((1, 3), dtype=np.uint8))
\ No newline at end of file
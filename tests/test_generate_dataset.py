@@ -0,0 +1,29 @@
+import pandas as pd
+
+import generate_dataset
+from generate_dataset import generate_dataset as generate
+
+FILES = ('dataset.csv', 'Symptom-severity.csv', 'symptom_Description.csv',
+         'symptom_precaution.csv')
+
+def _contents(directory):
+    return {name: (directory / name).read_bytes() for name in FILES}
+
+def test_same_seed_gives_identical_files(tmp_path, monkeypatch):
+    # Small blocks, so the row count spans several per-block seeds
+    monkeypatch.setattr(generate_dataset, 'CHUNK_ROWS', 64)
+    generate(12, 40, 300, output_dir=tmp_path / 'a', seed=7)
+    generate(12, 40, 300, output_dir=tmp_path / 'b', seed=7)
+    generate(12, 40, 300, output_dir=tmp_path / 'c', seed=8)
+    assert _contents(tmp_path / 'a') == _contents(tmp_path / 'b')
+    assert _contents(tmp_path / 'a')['dataset.csv'] != _contents(tmp_path / 'c')['dataset.csv']
+
+def test_rows_use_the_generated_vocabulary(tmp_path):
+    symptoms, diseases = generate(5, 30, 200, output_dir=tmp_path, seed=1)
+    data = pd.read_csv(tmp_path / 'dataset.csv')
+    assert len(data) == 200 and set(data['Disease']) <= set(diseases)
+    used = {s for row in data['Symptoms'] for s in row.split(',')}
+    assert used <= set(symptoms)
+    severity = pd.read_csv(tmp_path / 'Symptom-severity.csv')
+    assert severity['Symptom'].tolist() == symptoms
+    assert sorted(pd.read_csv(tmp_path / 'symptom_Description.csv')['Disease']) == sorted(diseases)
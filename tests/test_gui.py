@@ -0,0 +1,10 @@
+from gui import _inclusive_end
+
+def test_date_only_end_covers_the_whole_day():
+    assert _inclusive_end('2026-02-28') == '2026-03-01'
+    assert _inclusive_end('2026-12-31') == '2027-01-01'
+
+def test_other_end_values_pass_through():
+    assert _inclusive_end('2026-02-28 13:30') == '2026-02-28 13:30'
+    assert _inclusive_end('2026-13-01') == '2026-13-01'
+    assert _inclusive_end('') == ''
\ No newline at end of file
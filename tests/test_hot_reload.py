@@ -0,0 +1,93 @@
+import os
+import pickle
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend import BACKENDS, MODEL_PATH, DiseasePredictor
+from train_model import save_model
+
+def _retrained(model_data, training_data, seed=1):
+    X, y = training_data
+    model = RandomForestClassifier(n_estimators=7, random_state=seed).fit(X, y)
+    return dict(model_data, model=model)
+
+def _proba(model, symptoms, selected):
+    return model.predict_proba(np.isin(symptoms, selected).astype(float)[None, :])[0]
+
+def _replace_pickle(data):
+    # Rewrites disease_model.pkl only, leaving the exported artifact behind
+    with open(MODEL_PATH, 'wb') as f:
+        pickle.dump(data, f)
+    stat = os.stat(MODEL_PATH)
+    os.utime(MODEL_PATH, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+@pytest.fixture(params=BACKENDS)
+def any_predictor(project, request):
+    predictor = DiseasePredictor(backend=request.param, lazy_db=True)
+    yield predictor
+    predictor.close()
+
+def test_reload_swaps_in_the_new_model(any_predictor, model_data, training_data):
+    before = any_predictor.model_version
+    old_state = any_predictor._state
+    new_data = _retrained(model_data, training_data)
+    save_model(new_data)
+    any_predictor.reload_model(wait=True)
+    
+    assert any_predictor.model_version != before
+    result = any_predictor.predict_many([['symptom_4', 'symptom_9']], top_k=1)[0]
+    expected = _proba(new_data['model'], model_data['symptoms'], ['symptom_4', 'symptom_9'])
+    assert result['model_version'] == any_predictor.model_version
+    assert result['confidence'] == pytest.approx(expected.max(), abs=1e-12)
+    # Requests that took the old snapshot keep a complete, untouched model
+    assert old_state.version == before and old_state.engine is not any_predictor.engine
+
+def test_unchanged_files_keep_the_current_state(any_predictor):
+    state = any_predictor._state
+    any_predictor.reload_model(wait=True)
+    assert any_predictor._state is state
+
+def test_failed_reload_keeps_the_old_model(any_predictor, capsys):
+    before = any_predictor.model_version
+    expected = any_predictor.predict_many([['symptom_1']])
+    with open(MODEL_PATH, 'wb') as f:
+        f.write(b'not a pickle')
+    any_predictor.reload_model(wait=True)
+    
+    assert 'keeping version' in capsys.readouterr().out
+    assert any_predictor.model_version == before and any_predictor.load_error is None
+    assert any_predictor.predict_many([['symptom_1']]) == expected
+
+def test_model_failing_warm_up_is_not_installed(any_predictor, model_data, training_data):
+    before = any_predictor.model_version
+    X, y = training_data
+    # Trained on fewer columns than the symptom list it ships with
+    narrow = RandomForestClassifier(n_estimators=3, random_state=0).fit(X[:, :10], y)
+    _replace_pickle(dict(model_data, model=narrow))
+    any_predictor.reload_model(wait=True)
+    assert any_predictor.model_version == before
+
+def test_stale_artifact_falls_back_to_the_new_pickle(project, model_data, training_data):
+    predictor = DiseasePredictor(backend='compiled', lazy_db=True)
+    new_data = _retrained(model_data, training_data, seed=2)
+    _replace_pickle(new_data)
+    predictor.reload_model(wait=True)
+    
+    # Serving the old artifact here would silently keep the previous model
+    assert predictor.label_encoder is not None
+    result = predictor.predict_many([['symptom_3']], top_k=1)[0]
+    expected = _proba(new_data['model'], model_data['symptoms'], ['symptom_3'])
+    assert result['confidence'] == pytest.approx(expected.max(), abs=1e-12)
+    predictor.close()
+
+def test_watcher_reloads_changed_files(predictor, model_data, training_data):
+    before = predictor.model_version
+    predictor.watch_model(interval=0.05)
+    save_model(_retrained(model_data, training_data, seed=3))
+    deadline = time.monotonic() + 10
+    while predictor.model_version == before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert predictor.model_version != before
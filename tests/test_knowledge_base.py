@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from knowledge_base import EMPTY_INFO, DiseaseKnowledgeBase, load_knowledge_base
+from tests.conftest import DISEASES, write_knowledge_base
+
+def _bump_mtime(path):
+    # Coarse filesystem clocks could otherwise hide a rewrite within the same tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+def test_lookups(tmp_path):
+    pd.DataFrame({'Disease': ['Flu', 'Flu', 'Cold'],
+                  'Description': ['First', 'Second', None]}).to_csv(
+        tmp_path / 'd.csv', index=False)
+    pd.DataFrame({'Disease': ['Flu', 'Gout'], 'Precaution_2': ['rest', None],
+                  'Precaution_1': ['fluids', 'ice']}).to_csv(tmp_path / 'p.csv', index=False)
+    kb = DiseaseKnowledgeBase.from_csv(tmp_path / 'd.csv', tmp_path / 'p.csv')
+    
+    # First row wins for duplicates; precautions keep their numbered order
+    assert kb.get('Flu') == ('First', ('fluids', 'rest'))
+    assert kb.get('Cold') == ('', ())
+    assert kb.get('Gout') == ('', ('ice',))
+    assert kb.get('Unknown') is EMPTY_INFO
+    assert sorted(kb.diseases()) == ['Cold', 'Flu', 'Gout']
+    assert kb.get_many(['Gout', 'Unknown']) == [kb.get('Gout'), EMPTY_INFO]
+
+def test_cached_until_a_file_changes(project):
+    first = load_knowledge_base()
+    assert load_knowledge_base() is first
+    
+    write_knowledge_base(project, suffix=' (revised)')
+    _bump_mtime(project / 'symptom_Description.csv')
+    second = load_knowledge_base()
+    assert second is not first
+    assert second.get(DISEASES[0]).description == f'About {DISEASES[0]} (revised)'
+
+def test_reload_picks_up_edited_descriptions(predictor, project):
+    assert predictor.get_disease_info(DISEASES[1])[0] == f'About {DISEASES[1]}'
+    write_knowledge_base(project, suffix=' (revised)')
+    _bump_mtime(project / 'symptom_precaution.csv')
+    predictor.reload_model(wait=True)
+    assert predictor.get_disease_info(DISEASES[1])[0] == f'About {DISEASES[1]} (revised)'
\ No newline at end of file
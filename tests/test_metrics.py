@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from metrics import REGISTRY, MetricsRegistry, format_prometheus, load_snapshots, merge_snapshots
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry(enabled=True)
+
+@pytest.fixture
+def recording():
+    REGISTRY.enable()
+    yield REGISTRY
+    REGISTRY.disable()
+
+def test_nothing_is_recorded_while_disabled():
+    registry = MetricsRegistry()
+    counter = registry.counter('requests_total', 'Requests')
+    histogram = registry.histogram('latency_seconds', 'Latency')
+    counter.inc()
+    histogram.observe(0.1)
+    started = registry.clock()
+    histogram.observe_since(started)
+    assert started == 0.0
+    assert counter.value == 0 and histogram.count == 0
+    
+    registry.enable()
+    counter.inc(2)
+    histogram.observe_since(registry.clock())
+    assert counter.value == 2 and histogram.count == 1
+
+def test_metrics_are_shared_per_name_and_labels(registry):
+    first = registry.counter('requests_total', 'Requests', route='/predict')
+    assert registry.counter('requests_total', 'Requests', route='/predict') is first
+    assert registry.counter('requests_total', 'Requests', route='/health') is not first
+    with pytest.raises(ValueError):
+        registry.histogram('requests_total', 'Requests')
+
+def test_histogram_buckets_and_quantiles(registry):
+    histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 0.2, 0.4))
+    for value in (0.05, 0.1, 0.15, 0.3, 1.0):
+        histogram.observe(value)
+    sample = histogram.sample()
+    # Bounds are inclusive upper limits, as in Prometheus
+    assert sample['buckets'] == {'0.1': 2, '0.2': 1, '0.4': 1, '+Inf': 1}
+    assert sample['count'] == 5 and sample['sum'] == pytest.approx(1.6)
+    assert histogram.quantile(0.5) == pytest.approx(0.15)
+    assert histogram.quantile(0.99) == 0.4
+
+def test_prometheus_text_format(registry):
+    registry.counter('requests_total', 'Requests', route='/a"b').inc(3)
+    histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 0.2))
+    histogram.observe(0.05)
+    histogram.observe(0.15)
+    registry.gauge('queue_depth', 'Queued', lambda: 4)
+    registry.gauge('broken', 'Raises', lambda: 1 / 0)
+    
+    lines = registry.to_prometheus().splitlines()
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{route="/a\\"b"} 3' in lines
+    assert lines[lines.index('# TYPE latency_seconds histogram') + 1:][:5] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="0.2"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        'latency_seconds_sum 0.2',
+        'latency_seconds_count 2'
+    ]
+    assert 'queue_depth 4' in lines
+    # A gauge that fails to read is left out rather than breaking the export
+    assert not any(line.startswith('broken') for line in lines if not line.startswith('#'))
+
+def test_snapshots_from_several_processes_merge(tmp_path):
+    for pid, (count, depth) in {101: (2, 5), 202: (3, 7)}.items():
+        registry = MetricsRegistry(enabled=True)
+        registry.counter('requests_total', 'Requests', route='/predict').inc(count)
+        registry.histogram('latency_seconds', 'Latency', buckets=(0.1,)).observe(0.05 * count)
+        registry.gauge('queue_depth', 'Queued', lambda depth=depth: depth)
+        snapshot = registry.to_dict()
+        snapshot['pid'] = pid
+        (tmp_path / f'{pid}.json').write_text(json.dumps(snapshot))
+    
+    merged = merge_snapshots(load_snapshots(tmp_path))
+    assert merged['requests_total']['samples'] == [{'labels': {'route': '/predict'}, 'value': 5}]
+    [latency] = merged['latency_seconds']['samples']
+    assert latency['count'] == 2 and latency['buckets'] == {'0.1': 1, '+Inf': 1}
+    # Gauges do not add up, so each process keeps its own
+    assert sorted((s['labels']['pid'], s['value']) for s in merged['queue_depth']['samples']) \
+        == [(101, 5), (202, 7)]
+    assert 'requests_total{route="/predict"} 5' in format_prometheus(merged).splitlines()
+
+def test_dump_json_names_the_file_after_the_process(tmp_path, registry):
+    registry.counter('requests_total', 'Requests').inc()
+    registry.dump_json(str(tmp_path / '{pid}.json'))
+    [snapshot] = load_snapshots(tmp_path)
+    assert (tmp_path / f"{snapshot['pid']}.json").exists()
+    assert snapshot['metrics']['requests_total']['samples'][0]['value'] == 1
+
+def test_predictor_counts_rows_by_source(predictor, recording):
+    rows = {source: recording.counter('predictor_rows_total', '', source=source)
+            for source in ('model', 'cache')}
+    before = {source: counter.value for source, counter in rows.items()}
+    predictor.predict_many([['symptom_1'], ['symptom_2']])
+    predictor.predict_many([['symptom_1']])
+    assert rows['model'].value - before['model'] == 2
+    assert rows['cache'].value - before['cache'] == 1
+    assert 'predictor_cache_hits' in recording.to_prometheus()
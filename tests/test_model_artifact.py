@@ -0,0 +1,84 @@
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from model_artifact import MANIFEST, ArtifactError, export_artifact, load_artifact
+from train_model import save_model
+
+@pytest.fixture
+def saved(tmp_path, model_data):
+    model_path = str(tmp_path / 'disease_model.pkl')
+    artifact_dir = str(tmp_path / 'artifact')
+    save_model(model_data, model_path, artifact_dir)
+    return model_path, artifact_dir
+
+def _versions(artifact_dir):
+    return sorted(name for name in os.listdir(artifact_dir) if name.startswith('v'))
+
+def test_round_trip(saved, model_data, training_data):
+    model_path, artifact_dir = saved
+    loaded = load_artifact(artifact_dir, source_path=model_path)
+    X, _ = training_data
+    np.testing.assert_allclose(loaded['forest'].predict_proba(X),
+                               model_data['model'].predict_proba(X), rtol=0, atol=1e-12)
+    assert loaded['symptoms'] == model_data['symptoms']
+    assert loaded['classes'].tolist() == model_data['label_encoder'].classes_.tolist()
+
+def test_replaced_pickle_makes_artifact_stale(saved, model_data):
+    model_path, artifact_dir = saved
+    with open(model_path, 'wb') as f:
+        pickle.dump(dict(model_data, symptoms=model_data['symptoms'][::-1]), f)
+    with pytest.raises(ArtifactError, match='stale'):
+        load_artifact(artifact_dir, source_path=model_path)
+
+def test_touched_but_identical_pickle_is_not_stale(saved):
+    model_path, artifact_dir = saved
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    load_artifact(artifact_dir, source_path=model_path)
+
+def test_missing_pickle_is_accepted(saved):
+    model_path, artifact_dir = saved
+    os.remove(model_path)
+    load_artifact(artifact_dir, source_path=model_path)
+
+def test_export_requires_source_checksum(tmp_path, model_data):
+    with pytest.raises(ValueError):
+        export_artifact(model_data, str(tmp_path / 'artifact'), source_sha256=None)
+
+def test_manifest_without_source_is_rejected(saved):
+    model_path, artifact_dir = saved
+    manifest_path = os.path.join(artifact_dir, MANIFEST)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['source_sha256'] = None
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ArtifactError):
+        load_artifact(artifact_dir, source_path=model_path)
+
+def test_corrupt_array_fails_checksum(saved):
+    _, artifact_dir = saved
+    version_dir = os.path.join(artifact_dir, _versions(artifact_dir)[-1])
+    with open(os.path.join(version_dir, 'threshold.npy'), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\xff')
+    with pytest.raises(ArtifactError, match='Checksum'):
+        load_artifact(artifact_dir)
+
+def test_reexport_leaves_mapped_version_intact(saved, model_data, training_data):
+    model_path, artifact_dir = saved
+    mapped = load_artifact(artifact_dir, mmap=True)
+    X, _ = training_data
+    before = mapped['forest'].predict_proba(X)
+    
+    for _ in range(3):
+        save_model(model_data, model_path, artifact_dir)
+    
+    # Each export writes a new version beside the mapped one instead of over it
+    assert len(_versions(artifact_dir)) == 2
+    np.testing.assert_array_equal(mapped['forest'].predict_proba(X), before)
+    np.testing.assert_array_equal(load_artifact(artifact_dir)['forest'].predict_proba(X), before)
\ No newline at end of file
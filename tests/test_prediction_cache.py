@@ -0,0 +1,73 @@
+import types
+
+import numpy as np
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache
+from train_model import save_model
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+def test_hit_and_miss_counts():
+    cache = PredictionCache(maxsize=4)
+    assert cache.get(1) is None
+    cache.put(1, 'a')
+    assert cache.get(1) == 'a'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    cache.get(1)
+    cache.put(3, 'c')
+    assert cache.get(2) is None
+    assert cache.get(1) == 'a' and cache.get(3) == 'c'
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prediction_cache, 'time', types.SimpleNamespace(monotonic=clock.monotonic))
+    cache = PredictionCache(maxsize=4, ttl=10.0)
+    cache.put(1, 'a')
+    clock.now += 9.9
+    assert cache.get(1) == 'a'
+    clock.now += 0.2
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+def test_zero_size_cache_stores_nothing():
+    cache = PredictionCache(maxsize=0)
+    cache.put(1, 'a')
+    assert cache.get(1) is None and len(cache) == 0
+
+def test_repeat_requests_are_served_from_cache(predictor):
+    first = predictor.predict_many([['symptom_2', 'symptom_7']])[0]
+    # Same set in another order and spelling maps to the same bitmask
+    second = predictor.predict_many([['Symptom 7', 'symptom_2']])[0]
+    assert first == second
+    stats = predictor.cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+def test_reload_starts_with_an_empty_cache(predictor, model_data, training_data):
+    predictor.predict_many([['symptom_2']])
+    assert len(predictor.cache) == 1
+    before = predictor.model_version
+    
+    X, y = training_data
+    retrained = type(model_data['model'])(n_estimators=5, random_state=1).fit(X, y)
+    save_model(dict(model_data, model=retrained))
+    predictor.reload_model(wait=True)
+    
+    assert predictor.model_version != before
+    assert len(predictor.cache) == 0
+    result = predictor.predict_many([['symptom_2']], top_k=1)[0]
+    x = np.isin(model_data['symptoms'], ['symptom_2']).astype(float)[None, :]
+    assert result['confidence'] == pytest.approx(retrained.predict_proba(x).max(), abs=1e-12)
\ No newline at end of file
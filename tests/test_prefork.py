@@ -0,0 +1,87 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork') or not os.path.exists('/proc'),
+                                reason='pre-fork serving needs os.fork and /proc')
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _workers(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return {int(child) for child in f.read().split()}
+
+def _wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError('timed out')
+
+def _get(port, path, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', data=data, timeout=5) as response:
+        body = response.read().decode()
+        return json.loads(body) if response.headers['Content-Type'] == 'application/json' else body
+
+def _answers(port):
+    try:
+        return _get(port, '/health')['status'] == 'ok'
+    except OSError:
+        return False
+
+@pytest.fixture
+def prefork(project):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO, 'server.py'), '--workers', '2', '--port', str(port),
+         '--backend', 'sklearn', '--metrics'],
+        cwd=project, env=dict(os.environ, PYTHONPATH=REPO),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for(lambda: _answers(port) and len(_workers(process.pid)) == 2)
+        yield process, port
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+def test_crashed_workers_are_restarted(prefork):
+    process, port = prefork
+    before = _workers(process.pid)
+    os.kill(min(before), signal.SIGKILL)
+    
+    # The dead worker stays listed until the parent reaps it
+    after = _wait_for(lambda: min(before) not in _workers(process.pid)
+                      and len(_workers(process.pid)) == 2 and _workers(process.pid))
+    assert max(before) in after
+    assert _answers(port)
+
+def test_metrics_cover_every_worker(prefork):
+    process, port = prefork
+    for _ in range(20):
+        _get(port, '/predict', {'symptoms': ['symptom_1'], 'save': False})
+    
+    # Each worker's share is at most one dump interval behind
+    def total():
+        text = _get(port, '/metrics')
+        return sum(float(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+                   if line.startswith('server_requests_total{') and 'route="/predict"' in line)
+    assert _wait_for(lambda: total() == 20, timeout=10)
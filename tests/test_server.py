@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+
+from server import MAX_HEADERS, MicroBatcher, PredictionServer
+
+def _run(predictor, scenario, **options):
+    # Serves on an ephemeral port for the length of one scenario
+    async def main():
+        server = PredictionServer(predictor, **options)
+        server.batcher.start()
+        listener = await asyncio.start_server(server._handle_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return await scenario(server, port)
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            await server.batcher.stop()
+    return asyncio.run(main())
+
+async def _request(port, method, target, payload=None, headers=()):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    head = [f'{method} {target} HTTP/1.1', f'Content-Length: {len(body)}', 'Connection: close']
+    writer.write(('\r\n'.join(head + list(headers)) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b'\r\n')
+    return int(status_line.split()[1]), json.loads(rest.partition(b'\r\n\r\n')[2])
+
+def test_concurrent_requests_share_batches(predictor):
+    sets = [[f'symptom_{i % 20}', f'symptom_{(i * 7) % 20}'] for i in range(40)]
+    expected = predictor.predict_many(sets, top_k=2)
+    
+    async def scenario(server, port):
+        batcher = MicroBatcher(predictor, window=0.05, max_batch=16)
+        batcher.start()
+        try:
+            results = await asyncio.gather(*(batcher.predict(s, top_k=2) for s in sets))
+        finally:
+            await batcher.stop()
+        return results, batcher.stats()
+    results, stats = _run(predictor, scenario)
+    
+    # Each caller gets its own answer, and 40 requests need at least 3 batches of 16
+    assert results == expected
+    assert stats['requests'] == 40 and 3 <= stats['batches'] < 40
+
+def test_each_caller_gets_its_own_top_k(predictor):
+    async def scenario(server, port):
+        return await asyncio.gather(server.batcher.predict(['symptom_1'], top_k=1),
+                                    server.batcher.predict(['symptom_1'], top_k=3))
+    one, three = _run(predictor, scenario, window=0.05)
+    assert len(one['top_k']) == 1 and len(three['top_k']) == 3
+    assert one['top_k'][0] == three['top_k'][0]
+
+def test_predict_route(predictor):
+    async def scenario(server, port):
+        return await _request(port, 'POST', '/predict',
+                              {'symptoms': ['symptom_3', 'symptom_4'], 'top_k': 2, 'save': False})
+    status, body = _run(predictor, scenario)
+    expected = predictor.predict_many([['symptom_3', 'symptom_4']], top_k=2)[0]
+    assert status == 200
+    assert body['disease'] == expected['disease']
+    assert [entry['disease'] for entry in body['top_k']] == [d for d, _ in expected['top_k']]
+
+@pytest.mark.parametrize('payload', [
+    {'symptoms': []},
+    {'symptoms': 'symptom_1'},
+    {'symptoms': ['symptom_1'], 'top_k': 0},
+    {'symptoms': ['symptom_1'], 'top_k': True},
+    {'symptoms': ['symptom_1'], 'top_k': '3'},
+    {'symptoms': ['symptom_1'], 'patient': {'age': 3}},
+    {'symptoms': ['no such symptom'], 'save': False},
+])
+def test_predict_rejects_bad_input(predictor, payload):
+    async def scenario(server, port):
+        return await _request(port, 'POST', '/predict', payload)
+    status, body = _run(predictor, scenario)
+    assert status == 400 and body['error']
+
+def test_saved_predictions_show_up_in_history(predictor):
+    async def scenario(server, port):
+        await _request(port, 'POST', '/predict',
+                       {'symptoms': ['symptom_5'], 'patient': {'name': 'Ada', 'age': 36}})
+        predictor.db.flush()
+        return await _request(port, 'GET', '/history?patient_name=Ada')
+    status, body = _run(predictor, scenario)
+    assert status == 200 and len(body['predictions']) == 1
+    assert body['predictions'][0]['symptoms'] == 'symptom_5'
+    assert body['next_cursor'] is None
+
+def test_disease_and_unknown_routes(predictor):
+    async def scenario(server, port):
+        return [await _request(port, 'GET', '/disease?name=Migraine'),
+                await _request(port, 'GET', '/disease'),
+                await _request(port, 'GET', '/nowhere'),
+                await _request(port, 'DELETE', '/predict')]
+    disease, missing, unknown, method = _run(predictor, scenario)
+    assert disease == (200, {'disease': 'Migraine', 'description': 'About Migraine',
+                             'precautions': ['Migraine step 1', 'Migraine step 2']})
+    assert missing[0] == 400 and unknown[0] == 404 and method[0] == 405
+
+@pytest.mark.parametrize('headers', [
+    [f'X-Filler-{i}: x' for i in range(MAX_HEADERS + 1)],
+    ['X-Filler: ' + 'x' * 70000],
+])
+def test_oversized_headers_get_an_error_response(predictor, headers):
+    async def scenario(server, port):
+        return await _request(port, 'GET', '/health', headers=headers)
+    status, body = _run(predictor, scenario)
+    assert status == 431 and body['error']
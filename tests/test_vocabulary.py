@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from train_model import load_training_data
+from vocabulary import SymptomVocabulary, UnknownSymptomError
+
+SYMPTOMS = ['itching', 'skin_rash', 'high fever', 'Joint Pain', 'cough', 'chills',
+            'fatigue', 'nausea', 'headache']
+
+@pytest.fixture
+def vocabulary():
+    return SymptomVocabulary(SYMPTOMS)
+
+def _reference(vocabulary, strings):
+    # One symptom at a time through index(): what featurize must reproduce in bulk
+    X = np.zeros((len(strings), len(vocabulary)), dtype=np.uint8)
+    for row, text in enumerate(strings):
+        for token in (text or '').split(','):
+            idx = vocabulary.get(token)
+            if idx is not None:
+                X[row, idx] = 1
+    return X
+
+def test_names_are_normalized(vocabulary):
+    assert vocabulary.index('Skin Rash') == vocabulary.index(' skin_rash ') == 1
+    assert vocabulary.index('joint_pain') == 3
+    assert 'HIGH_FEVER' in vocabulary and 'fever' not in vocabulary
+
+def test_unknown_symptoms_raise_with_their_names(vocabulary):
+    with pytest.raises(UnknownSymptomError) as error:
+        vocabulary.indices(['cough', 'sneezing', 'hiccups'])
+    assert error.value.symptoms == ['sneezing', 'hiccups']
+    assert isinstance(error.value, ValueError)
+    assert vocabulary.indices(['cough', 'sneezing'], unknown='ignore') == {4}
+
+def test_featurize_matches_per_symptom_lookup(vocabulary):
+    strings = ['itching,skin_rash', ' Cough , chills ,', '', None, 'nausea,nausea,headache',
+               'fatigue,unknown thing', 'High Fever']
+    X = vocabulary.featurize(pd.Series(strings))
+    assert X.shape == (len(strings), len(SYMPTOMS)) and X.dtype == np.uint8
+    np.testing.assert_array_equal(X.toarray(), _reference(vocabulary, strings))
+
+def test_packed_rows_match_packbits(vocabulary):
+    strings = ['itching,headache', 'cough', '', 'skin_rash,chills,fatigue,nausea']
+    packed = vocabulary.featurize(strings, packed=True)
+    np.testing.assert_array_equal(packed, np.packbits(_reference(vocabulary, strings), axis=1))
+
+def test_featurize_can_reject_unknown_symptoms(vocabulary):
+    with pytest.raises(UnknownSymptomError) as error:
+        vocabulary.featurize(['cough,sneezing', 'chills'], unknown='error')
+    assert error.value.symptoms == ['sneezing']
+
+def test_training_and_serving_share_columns(tmp_path):
+    pd.DataFrame({'Disease': ['Flu', 'Rash', 'Flu'],
+                  'Symptoms': ['high_fever,chills', 'itching,Skin Rash', 'cough']}).to_csv(
+        tmp_path / 'dataset.csv', index=False)
+    vocabulary = SymptomVocabulary(SYMPTOMS)
+    X, y, le = load_training_data(vocabulary, str(tmp_path / 'dataset.csv'), chunk_size=2)
+    expected = _reference(vocabulary, ['high_fever,chills', 'itching,Skin Rash', 'cough'])
+    np.testing.assert_array_equal(X.toarray(), expected)
+    assert le.inverse_transform(y).tolist() == ['Flu', 'Rash', 'Flu']
\ No newline at end of file
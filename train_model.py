@@ -1,65 +1,162 @@
+import argparse
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 import pickle
+import hashlib
+import time
+from model_artifact import ARTIFACT_DIR, export_artifact
+from vocabulary import SymptomVocabulary
 
-def train_model():
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _peak_memory_mb():
+    # Peak resident set size of this process so far; ru_maxrss is in KB on Linux
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class _PhaseTimer:
+    def __init__(self):
+        self.phases = []
+        self._started = time.perf_counter()
+    
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self._started, _peak_memory_mb()))
+        self._started = now
+    
+    def report(self):
+        for name, seconds, peak in self.phases:
+            memory = f", peak RSS {peak:.0f} MB" if peak is not None else ""
+            print(f"  {name}: {seconds:.2f}s{memory}")
+
+class _HashingWriter:
+    # Hashes the pickle as it is written instead of building it in memory first
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+    
+    def write(self, data):
+        self.digest.update(data)
+        return self.f.write(data)
+
+def load_training_data(vocabulary, dataset_path='dataset.csv', chunk_size=100000):
+    """Read the dataset in chunks into a uint8 CSR matrix and integer labels.
+    
+    Only one chunk of raw text is held at a time. Returns (X, y, label_encoder)
+    with y encoded exactly as LabelEncoder().fit_transform would.
+    """
+    blocks = []
+    codes = []
+    diseases = {}
+    for chunk in pd.read_csv(dataset_path, usecols=['Disease', 'Symptoms'], dtype=str,
+                             chunksize=chunk_size):
+        blocks.append(vocabulary.featurize(chunk['Symptoms']))
+        codes.append(np.fromiter((diseases.setdefault(d, len(diseases)) for d in chunk['Disease']),
+                                 dtype=np.int32, count=len(chunk)))
+    
+    X = sparse.vstack(blocks, format='csr') if blocks else \
+        sparse.csr_matrix((0, len(vocabulary)), dtype=np.uint8)
+    
+    # Re-number the first-seen codes into LabelEncoder's sorted order
+    le = LabelEncoder()
+    le.classes_ = np.array(sorted(diseases), dtype=object)
+    remap = np.empty(len(diseases), dtype=np.int32)
+    for i, disease in enumerate(le.classes_):
+        remap[diseases[disease]] = i
+    y = remap[np.concatenate(codes)] if codes else np.empty(0, dtype=np.int32)
+    return X, y, le
+
+def build_model(n_estimators=300, max_depth=12, n_jobs=-1):
+    # Initialize improved Random Forest model
+    return RandomForestClassifier(
+        n_estimators=n_estimators, # More trees for better learning
+        max_depth=max_depth,       # Deeper trees for complex patterns
+        min_samples_split=4,       # Minimum samples for splitting
+        min_samples_leaf=2,        # Minimum samples in leaf nodes
+        class_weight='balanced',   # Handle imbalanced disease classes
+        criterion='entropy',       # Use entropy for splits
+        random_state=42,           # For reproducibility
+        n_jobs=n_jobs              # Build trees on every core
+    )
+
+def save_model(model_data, model_path='disease_model.pkl', artifact_dir=ARTIFACT_DIR):
+    """Write model_data as the pickle and the memory-mappable artifact."""
+    with open(model_path, 'wb') as f:
+        writer = _HashingWriter(f)
+        pickle.dump(model_data, writer)
+    
+    # Memory-mappable artifact for fast, shared loading
+    return export_artifact(model_data, artifact_dir, source_sha256=writer.digest.hexdigest(),
+                           source_path=model_path)
+
+def train_model(dataset_path='dataset.csv', severity_path='Symptom-severity.csv',
+                chunk_size=100000, n_jobs=-1, model_path='disease_model.pkl',
+                artifact_dir=ARTIFACT_DIR, raise_errors=False):
+    """Train and save the model; returns its training accuracy.
+    
+    Errors are printed and reported as 0.0 unless ``raise_errors`` is set.
+    """
     try:
-        # Load dataset and severity information
-        df = pd.read_csv('dataset.csv')
-        severity_df = pd.read_csv('Symptom-severity.csv')
+        timer = _PhaseTimer()
         
         # Extract unique symptoms from severity data
+        severity_df = pd.read_csv(severity_path)
         symptoms = severity_df['Symptom'].unique().tolist()
+        vocabulary = SymptomVocabulary(symptoms)
         
-        # Create feature matrix (symptoms x patients)
-        X = np.zeros((len(df), len(symptoms)))
-        for i, row in df.iterrows():
-            for symptom in row['Symptoms'].split(','):
-                if symptom.strip() in symptoms:
-                    symptom_idx = symptoms.index(symptom.strip())
-                    X[i, symptom_idx] = 1
+        # Sparse uint8 feature matrix (patients x symptoms), built chunk by chunk
+        X, y, le = load_training_data(vocabulary, dataset_path, chunk_size)
+        timer.mark(f"load {X.shape[0]} rows x {X.shape[1]} symptoms ({X.nnz} set)")
         
-        # Encode disease labels
-        le = LabelEncoder()
-        y = le.fit_transform(df['Disease'])
-        
-        # Initialize improved Random Forest model
-        model = RandomForestClassifier(
-            n_estimators=300,          # More trees for better learning
-            max_depth=12,              # Deeper trees for complex patterns
-            min_samples_split=4,       # Minimum samples for splitting
-            min_samples_leaf=2,        # Minimum samples in leaf nodes
-            class_weight='balanced',   # Handle imbalanced disease classes
-            criterion='entropy',       # Use entropy for splits
-            random_state=42           # For reproducibility
-        )
+        model = build_model(n_jobs=n_jobs)
         
         # Train the model
         model.fit(X, y)
+        timer.mark("fit")
         
         # Save model and related data
-        model_data = {
+        save_model({
             'model': model,
             'label_encoder': le,
             'symptoms': symptoms
-        }
-        with open('disease_model.pkl', 'wb') as f:
-            pickle.dump(model_data, f)
+        }, model_path, artifact_dir)
+        timer.mark("save")
         
         print("Model trained successfully!")
         
-        # Calculate and return accuracy
-        accuracy = model.score(X, y)
+        # Calculate and return accuracy, a chunk at a time to bound memory
+        correct = 0
+        for start in range(0, X.shape[0], chunk_size):
+            correct += int((model.predict(X[start:start + chunk_size]) == y[start:start + chunk_size]).sum())
+        accuracy = correct / X.shape[0] if X.shape[0] else 0.0
+        timer.mark("score")
+        timer.report()
         return accuracy
-        
+    
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error training model: {str(e)}")
         return 0.0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the disease prediction model")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--severity', default='Symptom-severity.csv')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                        help='dataset rows read per chunk')
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help='cores used to build trees (-1 for all)')
+    args = parser.parse_args()
+    
     print("Training disease prediction model...")
-    accuracy = train_model()
+    accuracy = train_model(args.dataset, args.severity, args.chunk_size, args.n_jobs)
     print(f"Model accuracy: {accuracy:.2f}")
-    print("\nModel saved as 'disease_model.pkl'")
\ No newline at end of file
+    print("\nModel saved as 'disease_model.pkl' and 'disease_model/'")
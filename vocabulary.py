@@ -0,0 +1,138 @@
+"""
+Symptom Vocabulary
+------------------
+Single symptom-to-column mapping shared by training and serving. Lookups go
+through a hash index over normalised names (case, whitespace and underscores
+are ignored), and whole columns of comma-separated ``Symptoms`` strings are
+featurized in one vectorized pass into a sparse CSR or bit-packed matrix.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+_SEPARATORS = re.compile(r'[\s_]+')
+
+class UnknownSymptomError(ValueError):
+    def __init__(self, symptoms):
+        self.symptoms = list(symptoms)
+        preview = ', '.join(repr(s) for s in self.symptoms[:5])
+        more = f" and {len(self.symptoms) - 5} more" if len(self.symptoms) > 5 else ""
+        super().__init__(f"Unknown symptom(s): {preview}{more}")
+
+def normalize_symptom(symptom):
+    return _SEPARATORS.sub(' ', str(symptom)).strip().lower()
+
+class SymptomVocabulary:
+    def __init__(self, symptoms):
+        self.symptoms = list(symptoms)
+        self._index = {}
+        for i, symptom in enumerate(self.symptoms):
+            self._index.setdefault(normalize_symptom(symptom), i)
+    
+    def __len__(self):
+        return len(self.symptoms)
+    
+    def __iter__(self):
+        return iter(self.symptoms)
+    
+    def __contains__(self, symptom):
+        return normalize_symptom(symptom) in self._index
+    
+    def get(self, symptom, default=None):
+        return self._index.get(normalize_symptom(symptom), default)
+    
+    def index(self, symptom):
+        idx = self._index.get(normalize_symptom(symptom))
+        if idx is None:
+            raise UnknownSymptomError([symptom])
+        return idx
+    
+    def indices(self, symptoms, unknown='error'):
+        """Column indices for a collection of symptoms.
+        
+        ``unknown`` is 'error' to raise UnknownSymptomError or 'ignore' to drop
+        symptoms that are not in the vocabulary.
+        """
+        columns = set()
+        missing = []
+        for symptom in symptoms:
+            idx = self._index.get(normalize_symptom(symptom))
+            if idx is None:
+                missing.append(symptom)
+            else:
+                columns.add(idx)
+        if missing and unknown == 'error':
+            raise UnknownSymptomError(missing)
+        return columns
+    
+    def featurize(self, column, unknown='ignore', packed=False):
+        """Turn comma-separated symptom strings into one row per string.
+        
+        Returns a uint8 CSR matrix of shape (rows, len(self)), or with
+        ``packed=True`` a dense uint8 array of 8 symptoms per byte in
+        np.packbits order. Blank entries are skipped; unknown symptoms follow
+        the same ``unknown`` policy as indices().
+        """
+        values = column.to_numpy(dtype=object) if isinstance(column, pd.Series) else list(column)
+        tokens = pd.Series(values, dtype=object).fillna('').str.split(',').explode()
+        names = tokens.str.replace(_SEPARATORS, ' ', regex=True).str.strip().str.lower()
+        names = names[names.notna() & (names != '')]
+        codes = names.map(self._index)
+        
+        known = codes.notna()
+        if unknown == 'error' and not known.all():
+            raise UnknownSymptomError(names[~known].unique())
+        
+        rows = codes.index.to_numpy()[known.to_numpy()]
+        cols = codes[known].to_numpy(dtype=np.intp)
+        n_rows = len(values)
+        
+        if packed:
+            X = np.zeros((n_rows, (len(self) + 7) // 8), dtype=np.uint8)
+            np.bitwise_or.at(X, (rows, cols >> 3), (0x80 >> (cols & 7)).astype(np.uint8))
+            return X
+        
+        X = sparse.csr_matrix((np.ones(len(rows), dtype=np.uint8), (rows, cols)),
+                              shape=(n_rows, len(self)))
+        # Repeated symptoms within a row collapse to a single flag
+        X.sum_duplicates()
+        X.data[:] = 1
+        return X
+
+class SymptomSearchIndex:
+    """Substring search over symptom names backed by n-gram postings.
+    
+    Every 1-, 2- and 3-character substring of each normalised name maps to the
+    set of symptoms containing it. Queries of up to three characters are a
+    single lookup; longer queries intersect their trigram postings and verify
+    the few remaining candidates.
+    """
+    
+    def __init__(self, symptoms):
+        self.symptoms = list(symptoms)
+        self._names = [normalize_symptom(symptom) for symptom in self.symptoms]
+        self._postings = {}
+        for i, name in enumerate(self._names):
+            for n in (1, 2, 3):
+                for start in range(len(name) - n + 1):
+                    self._postings.setdefault(name[start:start + n], set()).add(i)
+    
+    def search(self, query):
+        """Indices of matching symptoms, in vocabulary order."""
+        query = normalize_symptom(query)
+        if not query:
+            return list(range(len(self.symptoms)))
+        if len(query) <= 3:
+            return sorted(self._postings.get(query, ()))
+        
+        grams = sorted((query[i:i + 3] for i in range(len(query) - 2)),
+                       key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+        return sorted(i for i in candidates if query in self._names[i])